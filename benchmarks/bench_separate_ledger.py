@@ -0,0 +1,186 @@
+"""
+Benchmark: per-row vs vectorized separate-ledger split.
+
+Builds a synthetic header-less ledger (same shape as `pd.read_excel(header=None)`),
+runs both implementations, checks that rows and totals are identical and prints
+timings plus the retained size of the result. Excel parsing is excluded so only
+the split itself is measured; a smaller ledger is then written to a real .xlsx
+and read back through every reader (pandas for the engine and read_raw_rows,
+openpyxl for streaming), which must agree, placeholder cells included.
+
+Usage:
+    uv run python benchmarks/bench_separate_ledger.py [ROWS]   # default 1_000_000
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from application.use_cases.separate_ledger import SeparateLedgerUseCase
+from domain.dto.file_source import FileSource
+from infrastructure.engines.pandas_ledger_engine import PandasLedgerSplitEngine
+from infrastructure.repositories.excel_pandas_repo import ExcelPandasRepository
+
+# Text pandas reads as NaN by default; must be reported, not split as 0
+PLACEHOLDERS = ["N/A", "NULL", "NA", "-nan", "n/a", "None"]
+
+CODES = ["KW", "HL", "JH", "AB", "CD", "EF", "GH", "IJ"]
+
+
+def build_frame(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    dates = np.array([f"2024/{m}/{d}" for m in range(1, 13) for d in range(1, 29)])
+    date_col = dates[rng.integers(0, len(dates), n_rows)].astype(object)
+    date_col[rng.random(n_rows) < 0.02] = None  # Blank dates are skipped
+
+    amounts = rng.integers(0, 5_000_000, n_rows) / 100
+    debit = np.where(
+        rng.random(n_rows) < 0.5,
+        [f"{a:,.2f}" for a in amounts],  # Thousands separators
+        amounts,
+    ).astype(object)
+    debit[rng.random(n_rows) < 0.1] = None
+    debit[rng.random(n_rows) < 0.001] = "（１，２３４．５０）"  # Full-width, negative
+    debit[rng.random(n_rows) < 0.001] = "(2,000)"  # Accounting-style negative
+    debit[rng.random(n_rows) < 0.001] = "N/A"  # Unparseable -> reported, not split
+    credit = np.where(rng.random(n_rows) < 0.3, amounts / 3, None).astype(object)
+
+    n_codes = rng.integers(1, 4, n_rows)
+    picks = rng.integers(0, len(CODES), (n_rows, 3))
+    remark = np.array(
+        [" ".join(CODES[c] for c in row[:k]) for row, k in zip(picks, n_codes)],
+        dtype=object,
+    )
+    remark[rng.random(n_rows) < 0.05] = None  # Not auto-filled -> skipped
+
+    data = {
+        0: date_col,
+        1: np.array([f"摘要 {i % 997}" for i in range(n_rows)], dtype=object),
+        2: debit,
+        3: credit,
+        4: None,
+        5: None,
+        6: None,
+        7: None,
+        8: np.where(rng.random(n_rows) < 0.5, "法務部", None).astype(object),
+        9: remark,
+    }
+    df = pd.DataFrame(data)
+    header = pd.DataFrame(
+        [
+            ["明細分類帳"] + [None] * 9,
+            ["日期", "摘要", "借方", "貸方", None, None, None, None, "部門", "備註"],
+        ]
+    )
+    return pd.concat([header, df], ignore_index=True)
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Building {n_rows:,} synthetic ledger rows...")
+    df = build_frame(n_rows)
+
+    use_case = SeparateLedgerUseCase(None, None, None)  # type: ignore[arg-type]
+    engine = PandasLedgerSplitEngine()
+
+    t0 = time.perf_counter()
+    rows = df.fillna("").values.tolist()  # Same shape read_raw_rows returns
+    ref_rows, ref_totals = use_case._split_rows(rows)
+    ref_debit, ref_credit = ref_totals.total_debit, ref_totals.total_credit
+    t_ref = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = engine.split_frame(df)
+    t_vec = time.perf_counter() - t0
+
+    assert result.total_debit == ref_debit, (result.total_debit, ref_debit)
+    assert result.total_credit == ref_credit, (result.total_credit, ref_credit)
+    assert list(result.rows) == list(ref_rows), "row mismatch"
+    assert result.summary == ref_totals.summary, "summary mismatch"
+    assert result.invalid_amounts == ref_totals.invalid_amounts, "invalid mismatch"
+
+    print(f"Output rows:  {len(ref_rows):,}")
+    print(f"Totals:       debit={ref_debit:,} credit={ref_credit:,}")
+    print(f"Invalid:      {len(ref_totals.invalid_amounts):,} amount cells")
+    print(f"Per-row:      {t_ref:8.2f}s")
+    print(f"Vectorized:   {t_vec:8.2f}s  ({t_ref / t_vec:.1f}x)")
+
+    # Retained memory: columnar table vs one SeparateLedgerRow object per row
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    as_objects = list(result.rows)
+    object_bytes = tracemalloc.get_traced_memory()[0] - base
+    del as_objects
+    base = tracemalloc.get_traced_memory()[0]
+    compact = engine.split_frame(df).rows
+    compact_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del compact
+
+    print(f"Row objects:  {object_bytes / 2**20:8.1f} MiB")
+    print(
+        f"Columnar:     {compact_bytes / 2**20:8.1f} MiB"
+        f"  ({object_bytes / compact_bytes:.1f}x smaller)"
+    )
+
+    check_xlsx(min(n_rows, 5_000))
+
+
+def check_xlsx(n_rows: int) -> None:
+    """
+    Same split from a real workbook, whichever reader loads it. Placeholder
+    text is reported in the amounts but is an empty remark elsewhere.
+    """
+    df = build_frame(n_rows, seed=7)
+    body = df.index[2:]
+    for i, text in enumerate(PLACEHOLDERS):
+        df.loc[body[i * 7], 2] = text
+        df.loc[body[i * 7 + 3], 3] = text
+        df.loc[body[i * 7 + 5], 9] = text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger.xlsx")
+        df.to_excel(path, header=False, index=False)
+        source = FileSource(path=path)
+        repo = ExcelPandasRepository()
+        use_case = SeparateLedgerUseCase(None, None, None)  # type: ignore[arg-type]
+
+        t0 = time.perf_counter()
+        result = PandasLedgerSplitEngine().split(source).value
+        t_read = time.perf_counter() - t0
+        raw_rows = repo.read_raw_rows(source).value
+        streamed_rows = list(repo.iter_raw_rows(source).value)
+        ref_rows, ref_totals = use_case._split_rows(raw_rows)
+        stream_rows, stream_totals = use_case._split_rows(streamed_rows)
+
+    for i in range(len(PLACEHOLDERS)):
+        position = body[i * 7 + 5]
+        assert raw_rows[position][9] == streamed_rows[position][9] == "", position
+    codes = {row.lawyer_code for row in result.rows}
+    assert not codes & set(PLACEHOLDERS), codes & set(PLACEHOLDERS)
+
+    reported = {invalid.text for invalid in ref_totals.invalid_amounts}
+    assert set(PLACEHOLDERS) <= reported, reported
+    for totals in (ref_totals, stream_totals):
+        assert result.total_debit == totals.total_debit
+        assert result.total_credit == totals.total_credit
+        assert result.invalid_amounts == totals.invalid_amounts, "invalid mismatch"
+    assert list(result.rows) == list(ref_rows) == list(stream_rows), "row mismatch"
+    print(
+        f"Excel check:  {n_rows:,} rows read and split in {t_read:.2f}s, "
+        f"{len(ref_totals.invalid_amounts)} invalid cells reported by every reader"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Check: update downloader against a local HTTP server.
+
+Serves random bytes from a threaded local server with range support and
+runs ResumableDownloader through the cases the updater relies on: a
+parallel ranged download, a resume after the server drops every
+connection part-way, rejection of a wrong SHA-256, and the single plain
+request used when the server ignores ranges. Each case must give back
+the served bytes, in order, to both the file and the `consumer`.
+
+Usage:
+    uv run python benchmarks/check_update_download.py [MIB]   # default 64, min 16
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from services import downloader
+from services.downloader import ChecksumMismatch, ResumableDownloader
+
+_served_lock = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    data = b""
+    ranges = True  # False: answer every request with the whole file (200)
+    fail_after: int | None = None  # Drop each connection after this many bytes
+    served = 0  # Body bytes sent (probes included)
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        data = type(self).data
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match and type(self).ranges:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(data) - 1
+            body = data[start : end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            body = data
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        fail_after = type(self).fail_after
+        if fail_after is not None and len(body) > 1:
+            body_sent = min(fail_after, len(body))
+        else:
+            body_sent = len(body)
+        with _served_lock:
+            _Handler.served += body_sent
+        try:
+            if fail_after is not None and len(body) > 1:  # The probe passes
+                self.wfile.write(body[:fail_after])
+                self.wfile.flush()
+                self.connection.shutdown(2)
+                return
+            self.wfile.write(body)
+        except ConnectionError:
+            pass  # A probe answered in full (no ranges) is not read to the end
+
+
+def _download(url: str, dest: Path, sha256: str) -> tuple[bytes, float]:
+    received = bytearray()
+    t0 = time.perf_counter()
+    ResumableDownloader().download(url, dest, sha256, consumer=received.extend)
+    return bytes(received), time.perf_counter() - t0
+
+
+def main() -> None:
+    # Big enough that a dropped range has whole read chunks to keep
+    mib = max(16, int(sys.argv[1]) if len(sys.argv) > 1 else 64)
+    data = os.urandom(mib * 2**20 + 123)  # Not a multiple of any chunk size
+    sha256 = hashlib.sha256(data).hexdigest()
+    _Handler.data = data
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/release.zip"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / "release.zip"
+        part_path = dest.with_name(dest.name + ".part")
+        state_path = dest.with_name(dest.name + ".part.json")
+
+        # 1. Parallel ranges
+        parts = len(downloader._split(len(data), downloader.MAX_PARTS))
+        received, elapsed = _download(url, dest, sha256)
+        assert dest.read_bytes() == data and received == data
+        assert not part_path.exists() and not state_path.exists()
+        print(f"Parallel:     {mib} MiB in {parts} ranges, {elapsed:.2f}s")
+        dest.unlink()
+
+        # 2. Every connection drops part-way; the next attempt resumes
+        _Handler.fail_after = len(data) // (parts * 2)  # Half of each range
+        try:
+            _download(url, dest, sha256)
+            raise AssertionError("download should have failed")
+        except OSError:  # requests.ConnectionError
+            pass
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        saved = sum(done for _, _, done in state["ranges"])
+        assert 0 < saved < len(data) and not dest.exists()
+        _Handler.fail_after = None
+        _Handler.served = 0
+        received, elapsed = _download(url, dest, sha256)
+        assert dest.read_bytes() == data and received == data
+        assert not state_path.exists()
+        assert _Handler.served <= len(data) - saved + 1, "kept bytes fetched again"
+        print(
+            f"Resume:       {saved / 2**20:.1f} MiB kept after the drop, "
+            f"{_Handler.served / 2**20:.1f} MiB fetched in {elapsed:.2f}s"
+        )
+        dest.unlink()
+
+        # 3. Wrong checksum: rejected, and nothing left to resume from
+        try:
+            ResumableDownloader().download(url, dest, "0" * 64)
+            raise AssertionError("checksum mismatch not detected")
+        except ChecksumMismatch:
+            pass
+        assert not dest.exists() and not part_path.exists()
+        assert not state_path.exists()
+        print("Checksum:     mismatch rejected, partial file removed")
+
+        # 4. No range support: one plain request
+        _Handler.ranges = False
+        received, elapsed = _download(url, dest, sha256)
+        assert dest.read_bytes() == data and received == data
+        print(f"Plain:        {mib} MiB in one request, {elapsed:.2f}s")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
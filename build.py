@@ -1,3 +1,5 @@
+import hashlib
+import json
 import os
 import shutil
 import subprocess
@@ -69,6 +71,28 @@ def build():
 import platform
 
 
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(src_dir, manifest_path, version):
+    """Per-file hashes of the release, for differential updates"""
+    files = {}
+    for root, _, names in os.walk(src_dir):
+        for name in names:
+            file_path = Path(root) / name
+            files[file_path.relative_to(src_dir).as_posix()] = {
+                "sha256": file_sha256(file_path),
+                "size": file_path.stat().st_size,
+            }
+    manifest = {"version": version, "root": src_dir.name, "files": files}
+    manifest_path.write_text(json.dumps(manifest, indent=1))
+
+
 def package_zip(version):
     """Zip the output"""
     app_name = "Income-Statement-App"
@@ -100,7 +124,15 @@ def package_zip(version):
                 arcname = file_path.relative_to(Path("dist"))
                 zf.write(file_path, arcname)
 
+    # Checksum for the updater to verify the download against
+    checksum_path = zip_path.with_name(zip_name + ".sha256")
+    checksum_path.write_text(f"{file_sha256(zip_path)}  {zip_name}\n")
+    manifest_path = zip_path.with_name(zip_name + ".manifest.json")
+    write_manifest(src_dir, manifest_path, version)
+
     print(f"Success! Package created at: {zip_path}")
+    print(f"Checksum written to: {checksum_path}")
+    print(f"Manifest written to: {manifest_path}")
 
 
 def main():
@@ -0,0 +1,37 @@
+from typing import Any, Protocol
+
+from common.types import Result
+from domain.dto.file_source import FileSource
+from domain.dto.separate_ledger import (
+    LedgerDiff,
+    LedgerRunState,
+    SeparateLedgerResult,
+)
+
+
+class LedgerSplitEngine(Protocol):
+    """
+    Interface for the bulk "separate ledger" computation.
+    Implementations read only the columns they need and split shared
+    transactions per lawyer code using whole-column operations.
+    """
+
+    def split(self, source: FileSource) -> Result[SeparateLedgerResult, Exception]:
+        """Splits the ledger in `source`; the result has no output_path yet."""
+        ...
+
+    def split_rows(
+        self, rows: list[list[Any]]
+    ) -> Result[SeparateLedgerResult, Exception]:
+        """Like split(), for raw rows already in memory (as read_raw_rows)."""
+        ...
+
+    def split_incremental(
+        self, source: FileSource, previous: LedgerRunState | None
+    ) -> Result[tuple[SeparateLedgerResult, LedgerRunState, LedgerDiff], Exception]:
+        """
+        Like split(), but reuses `previous` for rows whose content is
+        unchanged and only splits inserted/changed rows. Returns the result,
+        the state to store for the next run and what changed.
+        """
+        ...
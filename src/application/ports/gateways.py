@@ -1,10 +1,17 @@
+from collections.abc import Iterable
 from typing import Protocol
 
 
 from common.types import Result
 from domain.dto.auto_fill import AutoFillPrompt, AutoFillResponse
 from domain.dto.file_source import FileSource
-from domain.dto.separate_ledger import SeparateLedgerResult
+from domain.dto.progress import ProgressUpdate
+from domain.dto.separate_ledger import (
+    LawyerReport,
+    LedgerRecord,
+    LedgerTotals,
+    SeparateLedgerResult,
+)
 
 
 class FilePickerGateway(Protocol):
@@ -24,6 +31,16 @@ class NotificationGateway(Protocol):
     def show_error(self, message: str) -> None: ...
 
 
+class ProgressGateway(Protocol):
+    """
+    Interface for reporting progress of a long-running use case.
+    May be called from worker threads and as often as every few thousand
+    rows; implementations may drop intermediate updates but not the last.
+    """
+
+    def report(self, update: ProgressUpdate) -> None: ...
+
+
 class UserInteractionGateway(Protocol):
     """Interface for direct user interaction (Dialogs)."""
 
@@ -33,10 +50,44 @@ class UserInteractionGateway(Protocol):
 
 
 class ReportGateway(Protocol):
-    """Interface for generating reports."""
+    """Interface for generating reports (one implementation per file format)."""
 
     def generate_ledger_report(
-        self, data: SeparateLedgerResult, output_path: str
+        self,
+        data: SeparateLedgerResult,
+        output_path: str,
+        progress: ProgressGateway | None = None,
+    ) -> Result[str, Exception]:
+        """
+        Generates the separate ledger Excel report, reporting the rows
+        written so far ("writing" updates) to `progress` as it goes.
+        """
+        ...
+
+    def write_ledger_report_stream(
+        self,
+        records: Iterable[LedgerRecord],
+        totals: LedgerTotals,
+        output_path: str,
+    ) -> Result[str, Exception]:
+        """
+        Writes records as they arrive, then the totals row from `totals`
+        (read only after `records` is exhausted). Data-only formats such as
+        CSV/Parquet omit the totals row.
+        """
+        ...
+
+    def generate_lawyer_reports(
+        self,
+        data: SeparateLedgerResult,
+        output_dir: str,
+        max_workers: int | None = None,
+    ) -> Result[list[LawyerReport], Exception]:
+        """Writes one workbook per lawyer code into `output_dir`."""
+        ...
+
+    def generate_report_index(
+        self, reports: list[LawyerReport], output_path: str
     ) -> Result[str, Exception]:
-        """Generates the separate ledger Excel report."""
+        """Writes an index workbook listing the per-lawyer reports."""
         ...
@@ -1,3 +1,4 @@
+from collections.abc import AsyncIterator, Iterator
 from typing import Any, Protocol
 
 
@@ -5,9 +6,27 @@ from common.types import Result
 from domain.dto.code_replacement import CodeReplacement
 from domain.dto.file_source import FileSource
 from domain.dto.lawyer import Lawyer
+from domain.dto.page import PageQuery, PageResult
+from domain.dto.separate_ledger import LedgerRunState
 from domain.dto.statement import Statement
 
 
+class EditableSheet(Protocol):
+    """
+    A sheet parsed once for both reading and patching: `rows` as in
+    read_raw_rows, and save() writes cell updates back to the same file
+    without parsing it again.
+    """
+
+    rows: list[list[Any]]
+
+    def save(self, updates: list[tuple[int, int, Any]]) -> Result[int, Exception]:
+        """Applies updates = [(row, col, value), ...] (1-based) and saves."""
+        ...
+
+    def close(self) -> None: ...
+
+
 class ExcelRepository(Protocol):
     """
     Interface for accessing Excel data.
@@ -22,12 +41,22 @@ class ExcelRepository(Protocol):
         """Reads raw rows for low-level processing (e.g. AutoFill)."""
         ...
 
+    def iter_raw_rows(
+        self, source: FileSource
+    ) -> Result[Iterator[list[Any]], Exception]:
+        """Streams raw rows one at a time; cell values match read_raw_rows."""
+        ...
+
     def update_cells(
         self, source: FileSource, updates: list[tuple[int, int, Any]]
     ) -> Result[int, Exception]:
         """Updates specific cells in the Excel file. updates = [(row, col, value), ...]"""
         ...
 
+    def open_for_update(self, source: FileSource) -> Result[EditableSheet, Exception]:
+        """Parses the sheet once; its rows can be read and then patched in place."""
+        ...
+
 
 class SettingsRepository(Protocol):
     """Interface for app settings persistence."""
@@ -40,15 +69,89 @@ class LawyerRepository(Protocol):
     """Interface for accessing Lawyer data."""
 
     def get_all(self) -> list[Lawyer]: ...
-    def add(self, lawyer: Lawyer) -> None: ...
-    def ensure_exists(self, codes: list[str]) -> None: ...
+    def get_page(self, query: PageQuery) -> PageResult[Lawyer]: ...
+    def get_existing_codes(self, codes: list[str]) -> set[str]: ...
+    def add(self, lawyer: Lawyer) -> bool: ...
+    def ensure_exists(self, codes: list[str]) -> list[str]:
+        """Creates missing codes in one transaction; returns the newly created ones."""
+        ...
 
 
 class CodeReplacementRepository(Protocol):
     """Interface for accessing CodeReplacement data."""
 
     def get_all(self) -> list[CodeReplacement]: ...
-    def add(self, replacement: CodeReplacement) -> None: ...
+    def get_page(self, query: PageQuery) -> PageResult[CodeReplacement]: ...
+    def add(self, replacement: CodeReplacement) -> CodeReplacement: ...
     def update(self, replacement: CodeReplacement) -> None: ...
     def delete(self, id: int) -> None: ...
     def get_by_source(self, source_code: str) -> CodeReplacement | None: ...
+    def apply_batch(
+        self, upserts: list[CodeReplacement], delete_ids: list[int]
+    ) -> list[CodeReplacement]:
+        """Applies many edits in one transaction; returns upserts with their ids."""
+        ...
+
+
+class AsyncLawyerRepository(Protocol):
+    """Async variant of LawyerRepository for use inside event-loop handlers."""
+
+    async def get_all(self) -> list[Lawyer]: ...
+    async def get_page(self, query: PageQuery) -> PageResult[Lawyer]: ...
+    async def get_existing_codes(self, codes: list[str]) -> set[str]: ...
+    async def add(self, lawyer: Lawyer) -> bool: ...
+    async def ensure_exists(self, codes: list[str]) -> list[str]: ...
+
+
+class AsyncCodeReplacementRepository(Protocol):
+    """Async variant of CodeReplacementRepository for use inside event-loop handlers."""
+
+    async def get_all(self) -> list[CodeReplacement]: ...
+    async def get_page(self, query: PageQuery) -> PageResult[CodeReplacement]: ...
+    async def add(self, replacement: CodeReplacement) -> CodeReplacement: ...
+    async def update(self, replacement: CodeReplacement) -> None: ...
+    async def delete(self, id: int) -> None: ...
+    async def get_by_source(self, source_code: str) -> CodeReplacement | None: ...
+    async def apply_batch(
+        self, upserts: list[CodeReplacement], delete_ids: list[int]
+    ) -> list[CodeReplacement]: ...
+
+
+class LedgerStateRepository(Protocol):
+    """
+    Interface for persisting the state of the last separate ledger run,
+    keyed by the report's output path (used by incremental re-runs).
+    """
+
+    def load(self, output_path: str) -> Result[LedgerRunState | None, Exception]:
+        """Returns the stored state, or None if there is none (or it is stale)."""
+        ...
+
+    def save(
+        self, output_path: str, state: LedgerRunState
+    ) -> Result[None, Exception]: ...
+
+    def delete(self, output_path: str) -> Result[None, Exception]:
+        """Forgets the state, e.g. once the report is written another way."""
+        ...
+
+
+class UploadStore(Protocol):
+    """
+    Interface for storing uploaded workbooks (Web mode).
+    Uploads are stored by content: identical files share one stored copy,
+    and the returned FileSource.upload_id is the same for both.
+    """
+
+    async def put(
+        self, chunks: AsyncIterator[bytes], filename: str
+    ) -> Result[FileSource, Exception]:
+        """
+        Stores the upload and returns a FileSource for a private working
+        copy (steps may write to it without affecting other uploads).
+        """
+        ...
+
+    def evict(self) -> int:
+        """Drops stored files over the age/size budget; returns bytes freed."""
+        ...
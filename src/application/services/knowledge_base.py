@@ -0,0 +1,126 @@
+import asyncio
+
+from application.ports.repositories import (
+    AsyncCodeReplacementRepository,
+    AsyncLawyerRepository,
+)
+from domain.dto.code_replacement import CodeReplacement
+from domain.dto.lawyer import Lawyer
+from domain.dto.page import PageQuery, PageResult
+from domain.knowledge_base import KnowledgeBase
+
+
+class KnowledgeBaseService:
+    """
+    Shares one read-only KnowledgeBase snapshot between all clients.
+    The snapshot is loaded on first use and reloaded after a write; the new
+    one replaces the old in a single assignment, so runs in progress keep
+    the snapshot they started with and nobody sees a half-built one.
+    Writes must go through `lawyers` / `replacements`: the repositories,
+    wrapped to mark the snapshot stale on every write.
+    """
+
+    def __init__(
+        self,
+        lawyer_repo: AsyncLawyerRepository,
+        replacement_repo: AsyncCodeReplacementRepository,
+    ):
+        self.lawyers = _TrackedLawyerRepository(lawyer_repo, self.invalidate)
+        self.replacements = _TrackedCodeReplacementRepository(
+            replacement_repo, self.invalidate
+        )
+        self._version = 0
+        self._current: KnowledgeBase | None = None
+        # One reload at a time; concurrent callers wait for it
+        self._reload_lock = asyncio.Lock()
+
+    async def get(self) -> KnowledgeBase:
+        current = self._current
+        if current is not None and current.version == self._version:
+            return current
+        async with self._reload_lock:
+            current = self._current
+            if current is not None and current.version == self._version:
+                return current
+            version = self._version
+            lawyers = await self.lawyers.get_all()
+            replacements = await self.replacements.get_all()
+            snapshot = KnowledgeBase.build(
+                (lawyer.code for lawyer in lawyers), replacements, version
+            )
+            # A write during the reload makes this snapshot stale at once;
+            # it is still consistent, and the next get() reloads again
+            self._current = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        """Marks the snapshot stale (after a write to the underlying tables)."""
+        self._version += 1
+
+
+class _TrackedLawyerRepository(AsyncLawyerRepository):
+    def __init__(self, repo: AsyncLawyerRepository, on_write):
+        self._repo = repo
+        self._on_write = on_write
+
+    async def get_all(self) -> list[Lawyer]:
+        return await self._repo.get_all()
+
+    async def get_page(self, query: PageQuery) -> PageResult[Lawyer]:
+        return await self._repo.get_page(query)
+
+    async def get_existing_codes(self, codes: list[str]) -> set[str]:
+        return await self._repo.get_existing_codes(codes)
+
+    async def add(self, lawyer: Lawyer) -> bool:
+        created = await self._repo.add(lawyer)
+        if created:
+            self._on_write()
+        return created
+
+    async def ensure_exists(self, codes: list[str]) -> list[str]:
+        created = await self._repo.ensure_exists(codes)
+        if created:
+            self._on_write()
+        return created
+
+
+class _TrackedCodeReplacementRepository(AsyncCodeReplacementRepository):
+    def __init__(self, repo: AsyncCodeReplacementRepository, on_write):
+        self._repo = repo
+        self._on_write = on_write
+
+    async def get_all(self) -> list[CodeReplacement]:
+        return await self._repo.get_all()
+
+    async def get_page(self, query: PageQuery) -> PageResult[CodeReplacement]:
+        return await self._repo.get_page(query)
+
+    async def get_by_source(self, source_code: str) -> CodeReplacement | None:
+        return await self._repo.get_by_source(source_code)
+
+    async def add(self, replacement: CodeReplacement) -> CodeReplacement:
+        try:
+            return await self._repo.add(replacement)
+        finally:
+            self._on_write()
+
+    async def update(self, replacement: CodeReplacement) -> None:
+        try:
+            await self._repo.update(replacement)
+        finally:
+            self._on_write()
+
+    async def delete(self, id: int) -> None:
+        try:
+            await self._repo.delete(id)
+        finally:
+            self._on_write()
+
+    async def apply_batch(
+        self, upserts: list[CodeReplacement], delete_ids: list[int]
+    ) -> list[CodeReplacement]:
+        try:
+            return await self._repo.apply_batch(upserts, delete_ids)
+        finally:
+            self._on_write()
@@ -1,14 +1,17 @@
+import asyncio
 from typing import Any
 
-from application.ports.gateways import UserInteractionGateway
-from application.ports.repositories import (
-    CodeReplacementRepository,
-    ExcelRepository,
-    LawyerRepository,
-)
+from application.ports.gateways import ProgressGateway, UserInteractionGateway
+from application.ports.repositories import ExcelRepository
+from application.services.knowledge_base import KnowledgeBaseService
 from common.types import Result
 from domain.dto.auto_fill import AutoFillPrompt, AutoFillResult
 from domain.dto.file_source import FileSource
+from domain.dto.progress import ProgressUpdate
+from domain.knowledge_base import KnowledgeBase
+
+# Rows between two progress reports
+PROGRESS_EVERY = 1000
 
 
 class AutoFillUseCase:
@@ -16,130 +19,171 @@ class AutoFillUseCase:
     Use Case: Auto-Fill Lawyer Codes
     Scans the Excel file for transactions, matches summary text against Lawyers/Aliases,
     and asks the user for input if ambiguous.
+    Codes and replacement rules come from the shared KnowledgeBase snapshot
+    (not re-read per run); codes learned from the user are added through
+    the service, which publishes a new snapshot for later runs.
+    Reading and saving the workbook run on worker threads, so the event
+    loop stays free while the prompts are awaited on it.
     """
 
     def __init__(
         self,
         excel_repo: ExcelRepository,
-        lawyer_repo: LawyerRepository,
-        replacement_repo: CodeReplacementRepository,
+        knowledge_base: KnowledgeBaseService,
         interaction: UserInteractionGateway,
     ):
         self._excel_repo = excel_repo
-        self._lawyer_repo = lawyer_repo
-        self._replacement_repo = replacement_repo
+        self._knowledge_base = knowledge_base
         self._interaction = interaction
-        self._replacement_map: dict[str, list[str]] = {}
 
-    async def execute(self, source: FileSource) -> Result[AutoFillResult, Exception]:
+    async def execute(
+        self, source: FileSource, progress: ProgressGateway | None = None
+    ) -> Result[AutoFillResult, Exception]:
         try:
             # 1. Read Raw Data
-            rows_result = self._excel_repo.read_raw_rows(source)
+            if progress:
+                progress.report(ProgressUpdate("reading"))
+            rows_result = await asyncio.to_thread(
+                self._excel_repo.read_raw_rows, source
+            )
             if not rows_result.is_success:
                 return Result.failure(rows_result.error)
 
-            rows = rows_result.value  # list[list[Any]]
+            # 2-4. Decide codes per row
+            result, updates = await self.fill_rows(rows_result.value, progress)
 
-            # 2. Locate Header
-            header_index, header_row = self._locate_header(rows)
-            # data_rows start after header
-            data_rows = rows[header_index + 1 :]
+            # 5. Save Updates
+            if updates:
+                if progress:
+                    progress.report(ProgressUpdate("writing", written=0))
+                save_result = await asyncio.to_thread(
+                    self._excel_repo.update_cells, source, updates
+                )
+                if not save_result.is_success:
+                    return Result.failure(save_result.error)
+            if progress:
+                progress.report(ProgressUpdate("done", written=len(updates)))
 
-            # 3. Load Knowledge Base
-            known_lawyers = [l.code for l in self._lawyer_repo.get_all()]
-            known_codes_set = set(known_lawyers)
+            return Result.success(result)
 
-            # Load Replacements
-            replacements = self._replacement_repo.get_all()
-            self._replacement_map = {
-                r.source_code: [
-                    t.strip()
-                    for t in r.target_codes.replace("，", ",").split(",")
-                    if t.strip()
-                ]
-                for r in replacements
-            }
+        except Exception as e:
+            return Result.failure(e)
 
-            updated_count = 0
-            updates: list[tuple[int, int, str]] = []  # (row, col, value)
-            skip_manual = False
+    async def fill_rows(
+        self, rows: list[list[Any]], progress: ProgressGateway | None = None
+    ) -> tuple[AutoFillResult, list[tuple[int, int, str]]]:
+        """
+        Fills empty remarks of `rows` in memory (rows are patched in place,
+        so a splitter can consume them directly) and returns the matching
+        cell updates for the source file: [(row, col, value), ...], 1-based.
+        Reports rows scanned, auto-matched and prompted every PROGRESS_EVERY rows.
+        """
+        # 2. Locate Header
+        header_index, header_row = self._locate_header(rows)
+        # data_rows start after header
+        data_rows = rows[header_index + 1 :]
+
+        # 3. Load Knowledge Base (shared snapshot)
+        kb = await self._knowledge_base.get()
+        # Codes learned during this run, matched like known ones
+        learned: set[str] = set()
+
+        updated_count = 0
+        updates: list[tuple[int, int, str]] = []  # (row, col, value)
+        skip_manual = False
+        matched_count = 0
+        prompted_count = 0
+
+        def report(stage: str, scanned: int):
+            if progress:
+                progress.report(
+                    ProgressUpdate(
+                        stage,
+                        rows_scanned=scanned,
+                        rows_total=len(data_rows),
+                        matched=matched_count,
+                        prompted=prompted_count,
+                    )
+                )
+
+        # 4. Iterate Rows
+        offset = 0
+        for offset, row in enumerate(data_rows, start=1):
+            excel_row_num = header_index + offset + 1
+            if offset % PROGRESS_EVERY == 0:
+                report("filling", offset)
+                # Let other clients' events through between batches of rows
+                await asyncio.sleep(0)
+
+            # Check "Remark" column (Assuming col 10, index 9)
+            if len(row) < 10:
+                continue
 
-            # 4. Iterate Rows
-            for offset, row in enumerate(data_rows, start=1):
-                excel_row_num = header_index + offset + 1
+            remark_val = str(row[9]).strip()
+            if remark_val and remark_val.lower() != "nan":
+                continue  # Already filled
 
-                # Check "Remark" column (Assuming col 10, index 9)
-                if len(row) < 10:
-                    continue
+            # Check Date/Summary
+            date_val = str(row[0]).strip()
+            summary_val = str(row[1]).strip()
+            if not date_val or date_val.lower() == "nan":
+                continue
+            if not summary_val or summary_val.lower() == "nan":
+                continue
 
-                remark_val = str(row[9]).strip()
-                if remark_val and remark_val.lower() != "nan":
-                    continue  # Already filled
+            # Match Logic
+            matched = self._find_matches(summary_val, kb, learned)
 
-                # Check Date/Summary
-                date_val = str(row[0]).strip()
-                summary_val = str(row[1]).strip()
-                if not date_val or date_val.lower() == "nan":
-                    continue
-                if not summary_val or summary_val.lower() == "nan":
+            if not matched:
+                if skip_manual:
                     continue
 
-                # Match Logic
-                matched = self._find_matches(summary_val, known_codes_set)
-
-                if not matched:
-                    if skip_manual:
-                        continue
-
-                    # Ask User
-                    prompt = AutoFillPrompt(
-                        summary=summary_val,
-                        row_number=excel_row_num,
-                        available_codes=list(known_codes_set),
-                    )
-
-                    # AWAIT Interaction
-                    response = await self._interaction.select_lawyers(prompt)
-
-                    if response.action == "abort":
-                        break  # Stop processing
-                    if response.action == "skip_all":
-                        skip_manual = True
-                        continue
-                    if response.action == "skip":
-                        continue
-
-                    selected_codes = response.selected_codes
-                    if not selected_codes:
-                        continue
-
-                    # Learn new codes
-                    new_codes = [c for c in selected_codes if c not in known_codes_set]
-                    if new_codes:
-                        self._lawyer_repo.ensure_exists(new_codes)
-                        known_codes_set.update(new_codes)
-
-                    # Apply Replacements
-                    final_codes = self._resolve_replacements(selected_codes)
-                    self._apply_updates(excel_row_num, final_codes, updates)
-                    updated_count += 1
-                else:
-                    # Auto Matched
-                    # Apply Replacements
-                    final_codes = self._resolve_replacements(matched)
-                    self._apply_updates(excel_row_num, final_codes, updates)
-                    updated_count += 1
+                # Ask User
+                prompt = AutoFillPrompt(
+                    summary=summary_val,
+                    row_number=excel_row_num,
+                    available_codes=sorted(kb.codes | learned),
+                )
+
+                # AWAIT Interaction
+                prompted_count += 1
+                report("filling", offset)
+                response = await self._interaction.select_lawyers(prompt)
+
+                if response.action == "abort":
+                    break  # Stop processing
+                if response.action == "skip_all":
+                    skip_manual = True
+                    continue
+                if response.action == "skip":
+                    continue
 
-            # 5. Save Updates
-            if updates:
-                save_result = self._excel_repo.update_cells(source, updates)
-                if not save_result.is_success:
-                    return Result.failure(save_result.error)
+                selected_codes = response.selected_codes
+                if not selected_codes:
+                    continue
 
-            return Result.success(AutoFillResult(updated_count=updated_count))
+                # Learn new codes
+                new_codes = [
+                    c for c in selected_codes if c not in kb.codes and c not in learned
+                ]
+                if new_codes:
+                    await self._knowledge_base.lawyers.ensure_exists(new_codes)
+                    learned.update(new_codes)
+
+                # Apply Replacements
+                final_codes = kb.resolve_replacements(selected_codes)
+                self._apply_updates(row, excel_row_num, final_codes, updates)
+                updated_count += 1
+            else:
+                # Auto Matched
+                # Apply Replacements
+                final_codes = kb.resolve_replacements(matched)
+                self._apply_updates(row, excel_row_num, final_codes, updates)
+                updated_count += 1
+                matched_count += 1
 
-        except Exception as e:
-            return Result.failure(e)
+        report("filling", offset)
+        return AutoFillResult(updated_count=updated_count), updates
 
     def _locate_header(self, rows: list[list[Any]]) -> tuple[int, list[Any]]:
         for idx, row in enumerate(rows):
@@ -150,22 +194,19 @@ class AutoFillUseCase:
                 return idx, row
         raise Exception("Header not found (expected '備註' in column 10)")
 
-    def _find_matches(self, summary: str, known_codes: set[str]) -> list[str]:
+    def _find_matches(
+        self, summary: str, kb: KnowledgeBase, learned: set[str]
+    ) -> list[str]:
         # 1. Direct match with known codes
-        matches = [c for c in known_codes if c in summary]
+        matches = kb.find_matches(summary)
+        matches += [c for c in learned if c in summary and c not in matches]
         return matches
 
-    def _resolve_replacements(self, codes: list[str]) -> list[str]:
-        final = []
-        for code in codes:
-            if code in self._replacement_map:
-                final.extend(self._replacement_map[code])
-            else:
-                final.append(code)
-        return final
-
-    def _apply_updates(self, row_num: int, codes: list[str], updates: list):
+    def _apply_updates(
+        self, row: list[Any], row_num: int, codes: list[str], updates: list
+    ):
         # Join unique codes
         val = " ".join(list(dict.fromkeys(codes)))
+        row[9] = val
         # Update col 10 (index 10 for 1-based openpyxl)
         updates.append((row_num, 10, val))
@@ -0,0 +1,78 @@
+import asyncio
+
+from application.ports.gateways import ProgressGateway
+from application.ports.repositories import ExcelRepository
+from application.use_cases.auto_fill import AutoFillUseCase
+from application.use_cases.separate_ledger import SeparateLedgerUseCase
+from common.types import Result
+from domain.dto.file_source import FileSource
+from domain.dto.fill_and_split import FillAndSplitResult
+from domain.dto.progress import ProgressUpdate
+from domain.dto.separate_ledger import SeparateLedgerOptions
+
+
+class FillAndSplitUseCase:
+    """
+    Use Case: Auto-Fill + Separate Ledger in one pass
+    Parses the workbook once; auto-fill decisions patch the rows in memory,
+    the patched rows go straight to the splitter, and only then are the
+    report(s) and the remark cells written. Results equal running Step 2
+    and then Step 3.
+    Loading, splitting and saving run on worker threads; only the auto-fill
+    prompts are awaited on the event loop.
+    """
+
+    def __init__(
+        self,
+        excel_repo: ExcelRepository,
+        auto_fill: AutoFillUseCase,
+        separate_ledger: SeparateLedgerUseCase,
+    ):
+        self._excel_repo = excel_repo
+        self._auto_fill = auto_fill
+        self._separate_ledger = separate_ledger
+
+    async def execute(
+        self,
+        source: FileSource,
+        options: SeparateLedgerOptions | None = None,
+        progress: ProgressGateway | None = None,
+    ) -> Result[FillAndSplitResult, Exception]:
+        # 1. Parse once
+        if progress:
+            progress.report(ProgressUpdate("reading"))
+        sheet_res = await asyncio.to_thread(self._excel_repo.open_for_update, source)
+        if not sheet_res.is_success:
+            return Result.failure(sheet_res.error)
+        sheet = sheet_res.value
+
+        try:
+            # 2. Auto-fill in memory (may prompt the user)
+            fill_result, updates = await self._auto_fill.fill_rows(sheet.rows, progress)
+
+            # 3. Split the patched rows and write the report(s)
+            ledger_res = await asyncio.to_thread(
+                self._separate_ledger.execute_rows,
+                source,
+                sheet.rows,
+                options,
+                progress,
+            )
+
+            # 4. Patch the remark cells (kept even if the split failed, so the
+            # user's answers to the prompts are not lost)
+            if updates:
+                save_res = await asyncio.to_thread(sheet.save, updates)
+                if not save_res.is_success:
+                    return Result.failure(save_res.error)
+            if not ledger_res.is_success:
+                return Result.failure(ledger_res.error)
+
+            return Result.success(
+                FillAndSplitResult(auto_fill=fill_result, ledger=ledger_res.value)
+            )
+
+        except Exception as e:  # noqa: BLE001 - use cases return failures
+            return Result.failure(e)
+        finally:
+            await asyncio.to_thread(sheet.close)
@@ -1,20 +1,40 @@
+import threading
+from collections import OrderedDict
+
 from application.ports.repositories import ExcelRepository
 from common.types import Result
 from domain.dto.file_source import FileSource
 from domain.dto.statement import Statement
 
+# Parsed uploads kept for reuse (see ImportExcelUseCase)
+PARSE_CACHE_SIZE = 4
+
 
 class ImportExcelUseCase:
     """
     Use Case: Import Excel File
     Orchestrates the process of reading an Excel file and converting it to a domain Statement.
+    Uploads identified by content (FileSource.upload_id, see UploadStore)
+    are parsed once: the same workbook uploaded again, by any client, reuses
+    the Statement of the last PARSE_CACHE_SIZE distinct uploads.
     """
 
-    def __init__(self, excel_repo: ExcelRepository):
+    def __init__(self, excel_repo: ExcelRepository, cache_size: int = PARSE_CACHE_SIZE):
         self._excel_repo = excel_repo
+        self._cache_size = cache_size
+        self._cache: OrderedDict[str, Statement] = OrderedDict()
+        # execute() runs in worker threads
+        self._cache_lock = threading.Lock()
 
     def execute(self, source: FileSource) -> Result[Statement, Exception]:
         # 1. Validation (Optional Step: check file extension etc. if not done in Gateway)
+        key = source.upload_id
+        if key:
+            with self._cache_lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    return Result.success(cached)
 
         # 2. Read from Repository
         result = self._excel_repo.read_statement(source)
@@ -23,6 +43,10 @@ class ImportExcelUseCase:
         if result.is_success:
             statement = result.value
             # Apply domain rules here (e.g. self._rules.apply(statement))
-            pass
+            if key and self._cache_size > 0:
+                with self._cache_lock:
+                    self._cache[key] = statement
+                    while len(self._cache) > self._cache_size:
+                        self._cache.popitem(last=False)
 
         return result
@@ -1,19 +1,53 @@
+import itertools
 import os
 import secrets
-from typing import List
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any, List
 
-from application.ports.gateways import ReportGateway
-from application.ports.repositories import ExcelRepository, LawyerRepository
+from application.ports.engines import LedgerSplitEngine
+from application.ports.gateways import ProgressGateway, ReportGateway
+from application.ports.repositories import (
+    ExcelRepository,
+    LawyerRepository,
+    LedgerStateRepository,
+)
 from common.errors import ValidationError
 from common.types import Result
+from domain.amounts import parse_amount_cents, split_amount
 from domain.dto.file_source import FileSource
-from domain.dto.separate_ledger import SeparateLedgerResult, SeparateLedgerRow
+from domain.dto.progress import ProgressUpdate
+from domain.dto.separate_ledger import (
+    InvalidAmount,
+    LedgerDiff,
+    LedgerRecord,
+    LedgerRunState,
+    LedgerTotals,
+    ReportFormat,
+    SeparateLedgerOptions,
+    SeparateLedgerResult,
+    SeparateLedgerTable,
+    SeparateLedgerTableBuilder,
+)
+
+# Records between two progress reports in streaming mode (the report
+# gateways report as often while writing a split result)
+PROGRESS_EVERY = 1000
 
 
 class SeparateLedgerUseCase:
     """
     Use Case: Generate Separate Ledger
     Parses Auto-Filled Excel, splits shared transactions, and generates a report.
+    When a LedgerSplitEngine is provided the split runs vectorized in the engine;
+    otherwise rows are split one by one here (same results).
+    With `options.streaming` rows flow reader -> splitter -> writer one at a
+    time and are not retained in the result (only totals and output_path).
+    With `options.per_lawyer` one workbook per lawyer code and an index are
+    written as well (needs the materialized rows, so not with streaming).
+    With `options.incremental` the engine re-splits only rows changed since
+    the last run for the same output (state kept by `state_repo`); if nothing
+    changed and the report exists it is not rewritten. Every other run
+    deletes that state, since it no longer describes the report on disk.
     """
 
     def __init__(
@@ -21,119 +55,419 @@ class SeparateLedgerUseCase:
         excel_repo: ExcelRepository,
         lawyer_repo: LawyerRepository,
         report_gateway: ReportGateway,
+        split_engine: LedgerSplitEngine | None = None,
+        report_gateways: Mapping[ReportFormat, ReportGateway] | None = None,
+        state_repo: LedgerStateRepository | None = None,
     ):
         self._excel_repo = excel_repo
         self._lawyer_repo = lawyer_repo
         self._report_gateway = report_gateway
+        self._split_engine = split_engine
+        # Extra output formats; `report_gateway` serves xlsx
+        self._report_gateways = dict(report_gateways or {})
+        self._state_repo = state_repo
 
-    def execute(self, source: FileSource) -> Result[SeparateLedgerResult, Exception]:
+    def execute(
+        self,
+        source: FileSource,
+        options: SeparateLedgerOptions | None = None,
+        progress: ProgressGateway | None = None,
+    ) -> Result[SeparateLedgerResult, Exception]:
+        options = options or SeparateLedgerOptions()
         try:
-            # 1. Read Raw Data
-            rows_res = self._excel_repo.read_raw_rows(source)
-            if not rows_res.is_success:
-                return Result.failure(rows_res.error)
-
-            rows = rows_res.value
-
-            # 2. Locate Header & Filter Rows
-            header_index = self._locate_header_index(rows)
-            data_rows = rows[header_index + 1 :]
-
-            result_rows: list[SeparateLedgerRow] = []
-            total_debit = 0
-            total_credit = 0
-
-            # 3. Process Rows
-            for offset, row in enumerate(data_rows, start=1):
-                raw_row = row
-                # Validation
-                if len(raw_row) < 10:
-                    continue
-                # Date check
-                date_val = str(raw_row[0]).strip()
-                if not date_val or date_val.lower() == "nan":
-                    continue
-
-                abstract = str(raw_row[1]).strip()
-                department = str(raw_row[8]).strip()  # Col 9 is Dept
-                if department.lower() == "nan":
-                    department = ""
-
-                # Remark (Lawyer Codes)
-                remark = str(raw_row[9]).strip()
-                if not remark or remark.lower() == "nan":
-                    # Skip or Error? Original logic raised error or skipped.
-                    # We skip for now unless strict mode.
-                    continue
-
-                codes = [c.strip() for c in remark.split(" ") if c.strip()]
-                if not codes:
-                    continue
-
-                # Amounts (Cols 3 & 4 -> Index 2 & 3)
-                try:
-                    debit = float(str(raw_row[2]).replace(",", "") or 0)
-                    credit = float(str(raw_row[3]).replace(",", "") or 0)
-                except ValueError:
-                    continue  # Skip invalid amount rows
-
-                # Split Logic
-                count = len(codes)
-                split_debit = int(round(debit / count))
-                split_credit = int(round(credit / count))
-
-                for code in codes:
-                    # Create Row per Lawyer
-                    result_rows.append(
-                        SeparateLedgerRow(
-                            date=date_val,
-                            abstract=abstract,
-                            department=department,
-                            debit=split_debit,
-                            credit=split_credit,
-                            lawyer_code=code,
+            _report(progress, "reading")
+            gateway = self._gateway_for(options.report_format)
+            if gateway is None:
+                return Result.failure(
+                    ValidationError(
+                        f"Unsupported report format: {options.report_format}"
+                    )
+                )
+            out_path = self._output_path(source, options.report_format)
+            if options.streaming:
+                if options.per_lawyer:
+                    return Result.failure(
+                        ValidationError(
+                            "Per-lawyer reports are not available in streaming mode."
+                        )
+                    )
+                if options.incremental:
+                    return Result.failure(
+                        ValidationError(
+                            "Incremental mode is not available in streaming mode."
                         )
                     )
-                    total_debit += split_debit
-                    total_credit += split_credit
+                return self._execute_streaming(source, out_path, gateway, progress)
+            if options.incremental:
+                if not (self._split_engine and self._state_repo):
+                    return Result.failure(
+                        ValidationError("Incremental mode is not available.")
+                    )
+                return self._execute_incremental(
+                    source, options, out_path, gateway, progress
+                )
+
+            # 1-3. Read & Split
+            if self._split_engine:
+                split_res = self._split_engine.split(source)
+                if not split_res.is_success:
+                    return Result.failure(split_res.error)
+                split = split_res.value
+            else:
+                rows_res = self._excel_repo.read_raw_rows(source)
+                if not rows_res.is_success:
+                    return Result.failure(rows_res.error)
+                split = self._split_rows_result(rows_res.value)
+
+            return self._write_reports(split, out_path, options, gateway, progress)
+
+        except Exception as e:  # noqa: BLE001 - use cases return failures
+            return Result.failure(e)
 
-            if not result_rows:
+    def execute_rows(
+        self,
+        source: FileSource,
+        rows: list[list[Any]],
+        options: SeparateLedgerOptions | None = None,
+        progress: ProgressGateway | None = None,
+    ) -> Result[SeparateLedgerResult, Exception]:
+        """
+        Like execute(), for rows already read from `source` (e.g. just
+        auto-filled in memory), so the workbook is not parsed again.
+        The streaming and incremental options do not apply and are ignored.
+        """
+        options = options or SeparateLedgerOptions()
+        try:
+            gateway = self._gateway_for(options.report_format)
+            if gateway is None:
                 return Result.failure(
-                    ValidationError("No valid ledger rows generated.")
+                    ValidationError(
+                        f"Unsupported report format: {options.report_format}"
+                    )
                 )
+            out_path = self._output_path(source, options.report_format)
 
-            # 4. Generate Output Report
-            # Generate path: same dir as source, different name
-            src_path = str(source.path) if source.path else "report.xlsx"
-            dir_name = os.path.dirname(src_path)
-            base_name = os.path.splitext(os.path.basename(src_path))[0]
-            # Suffix with timestamp or '_separate'
-            out_path = os.path.join(dir_name, f"{base_name}_separate_ledger.xlsx")
-
-            result_dto = SeparateLedgerResult(
-                rows=result_rows,
-                total_debit=total_debit,
-                total_credit=total_credit,
+            if self._split_engine:
+                split_res = self._split_engine.split_rows(rows)
+                if not split_res.is_success:
+                    return Result.failure(split_res.error)
+                split = split_res.value
+            else:
+                split = self._split_rows_result(rows)
+
+            return self._write_reports(split, out_path, options, gateway, progress)
+
+        except Exception as e:  # noqa: BLE001 - use cases return failures
+            return Result.failure(e)
+
+    def _write_reports(
+        self,
+        split: SeparateLedgerResult,
+        out_path: str,
+        options: SeparateLedgerOptions,
+        gateway: ReportGateway,
+        progress: ProgressGateway | None = None,
+    ) -> Result[SeparateLedgerResult, Exception]:
+        if not split.rows:
+            return Result.failure(ValidationError("No valid ledger rows generated."))
+        forget_res = self._forget_state(out_path)
+        if not forget_res.is_success:
+            return Result.failure(forget_res.error)
+        total = len(split.rows)
+        _report(progress, "writing", rows_total=total)
+
+        # 4. Generate Output Report
+        result_dto = SeparateLedgerResult(
+            rows=split.rows,
+            total_debit=split.total_debit,
+            total_credit=split.total_credit,
+            output_path=out_path,
+            summary=split.summary,
+            invalid_amounts=split.invalid_amounts,
+        )
+
+        report_res = gateway.generate_ledger_report(result_dto, out_path, progress)
+        if not report_res.is_success:
+            return Result.failure(report_res.error)
+
+        # 5. Optional per-lawyer fan-out (+ index) next to the combined report
+        if options.per_lawyer:
+            _report(progress, "writing", rows_total=total, written=total)
+            fan_out_res = self._generate_lawyer_reports(result_dto, options, gateway)
+            if not fan_out_res.is_success:
+                return Result.failure(fan_out_res.error)
+
+        _report(progress, "done", rows_total=total, written=total)
+        return Result.success(result_dto)
+
+    def _execute_streaming(
+        self,
+        source: FileSource,
+        out_path: str,
+        gateway: ReportGateway,
+        progress: ProgressGateway | None = None,
+    ) -> Result[SeparateLedgerResult, Exception]:
+        rows_res = self._excel_repo.iter_raw_rows(source)
+        if not rows_res.is_success:
+            return Result.failure(rows_res.error)
+
+        totals = LedgerTotals()
+        records = iter_split_records(rows_res.value, totals)
+        if progress:
+            records = _counting(records, progress)
+
+        # Peek so an empty ledger never produces a report file
+        first = next(records, None)
+        if first is None:
+            return Result.failure(ValidationError("No valid ledger rows generated."))
+        forget_res = self._forget_state(out_path)
+        if not forget_res.is_success:
+            return Result.failure(forget_res.error)
+
+        report_res = gateway.write_ledger_report_stream(
+            itertools.chain([first], records), totals, out_path
+        )
+        if not report_res.is_success:
+            return Result.failure(report_res.error)
+
+        _report(progress, "done", written=totals.row_count)
+        return Result.success(
+            SeparateLedgerResult(
+                rows=SeparateLedgerTable(),
+                total_debit=totals.total_debit,
+                total_credit=totals.total_credit,
                 output_path=out_path,
+                summary=totals.summary,
+                invalid_amounts=totals.invalid_amounts,
             )
+        )
 
-            report_res = self._report_gateway.generate_ledger_report(
-                result_dto, out_path
-            )
+    def _execute_incremental(
+        self,
+        source: FileSource,
+        options: SeparateLedgerOptions,
+        out_path: str,
+        gateway: ReportGateway,
+        progress: ProgressGateway | None = None,
+    ) -> Result[SeparateLedgerResult, Exception]:
+        state_res = self._state_repo.load(out_path)
+        if not state_res.is_success:
+            return Result.failure(state_res.error)
+
+        previous = state_res.value
+        split_res = self._split_engine.split_incremental(source, previous)
+        if not split_res.is_success:
+            return Result.failure(split_res.error)
+        result, state, diff = split_res.value
+        if not result.rows:
+            return Result.failure(ValidationError("No valid ledger rows generated."))
+        result.output_path = out_path
+        result.diff = diff
+        total = len(result.rows)
+        _report(progress, "writing", rows_total=total)
+
+        report_unchanged = self._is_unchanged(previous, diff, options, out_path)
+        lawyer_reports_unchanged = report_unchanged and self._lawyer_reports_exist(
+            previous
+        )
+        if not report_unchanged or (
+            options.per_lawyer and not lawyer_reports_unchanged
+        ):
+            # Until saved again, no state claims the files being rewritten
+            forget_res = self._forget_state(out_path)
+            if not forget_res.is_success:
+                return Result.failure(forget_res.error)
+        if not report_unchanged:
+            report_res = gateway.generate_ledger_report(result, out_path, progress)
             if not report_res.is_success:
                 return Result.failure(report_res.error)
+        if options.per_lawyer:
+            if lawyer_reports_unchanged:
+                result.index_path = previous.result.index_path
+                result.lawyer_reports = list(previous.result.lawyer_reports)
+            else:
+                fan_out_res = self._generate_lawyer_reports(result, options, gateway)
+                if not fan_out_res.is_success:
+                    return Result.failure(fan_out_res.error)
 
-            return Result.success(result_dto)
+        # Saved last, so a failed write is redone by the next run
+        state.report_format = options.report_format
+        state.per_lawyer = options.per_lawyer
+        save_res = self._state_repo.save(out_path, state)
+        if not save_res.is_success:
+            return Result.failure(save_res.error)
+        _report(progress, "done", rows_total=total, written=total)
+        return Result.success(result)
 
-        except Exception as e:
-            return Result.failure(e)
+    @staticmethod
+    def _is_unchanged(
+        previous: LedgerRunState | None,
+        diff: LedgerDiff,
+        options: SeparateLedgerOptions,
+        out_path: str,
+    ) -> bool:
+        """No row changed since the stored run, which wrote this report as is."""
+        return (
+            previous is not None
+            and diff.is_empty
+            and previous.report_format == options.report_format
+            and os.path.exists(out_path)
+        )
+
+    @staticmethod
+    def _lawyer_reports_exist(previous: LedgerRunState) -> bool:
+        """The stored run wrote per-lawyer reports, and they are all still there."""
+        result = previous.result
+        return (
+            previous.per_lawyer
+            and bool(result.index_path)
+            and os.path.exists(result.index_path)
+            and all(os.path.exists(report.path) for report in result.lawyer_reports)
+        )
+
+    def _forget_state(self, out_path: str) -> Result[None, Exception]:
+        if self._state_repo is None:
+            return Result.success(None)
+        return self._state_repo.delete(out_path)
+
+    def _generate_lawyer_reports(
+        self,
+        result: SeparateLedgerResult,
+        options: SeparateLedgerOptions,
+        gateway: ReportGateway,
+    ) -> Result[SeparateLedgerResult, Exception]:
+        # e.g. ledger_separate_ledger.xlsx -> ledger_separate_ledger/<code>.xlsx
+        output_dir = os.path.splitext(result.output_path)[0]
+        reports_res = gateway.generate_lawyer_reports(
+            result, output_dir, options.max_workers
+        )
+        if not reports_res.is_success:
+            return Result.failure(reports_res.error)
+
+        index_res = gateway.generate_report_index(
+            reports_res.value, os.path.join(output_dir, "index.xlsx")
+        )
+        if not index_res.is_success:
+            return Result.failure(index_res.error)
+
+        result.lawyer_reports = reports_res.value
+        result.index_path = index_res.value
+        return Result.success(result)
+
+    def _gateway_for(self, report_format: ReportFormat) -> ReportGateway | None:
+        if report_format == "xlsx":
+            return self._report_gateway
+        return self._report_gateways.get(report_format)
+
+    def _output_path(self, source: FileSource, report_format: ReportFormat) -> str:
+        # Generate path: same dir as source, different name
+        src_path = str(source.path) if source.path else "report.xlsx"
+        dir_name = os.path.dirname(src_path)
+        base_name = os.path.splitext(os.path.basename(src_path))[0]
+        # Suffix with timestamp or '_separate'
+        return os.path.join(dir_name, f"{base_name}_separate_ledger.{report_format}")
+
+    def _split_rows_result(self, rows: list[list]) -> SeparateLedgerResult:
+        table, totals = self._split_rows(rows)
+        return SeparateLedgerResult(
+            rows=table,
+            total_debit=totals.total_debit,
+            total_credit=totals.total_credit,
+            summary=totals.summary,
+            invalid_amounts=totals.invalid_amounts,
+        )
+
+    def _split_rows(self, rows: list[list]) -> tuple[SeparateLedgerTable, LedgerTotals]:
+        """Per-row reference implementation of the ledger split."""
+        builder = SeparateLedgerTableBuilder()
+        totals = LedgerTotals()
+        for record in iter_split_records(rows, totals):
+            builder.append(*record)
+        return builder.build(), totals
+
+
+def _report(progress: ProgressGateway | None, stage: str, **counts: int) -> None:
+    if progress:
+        progress.report(ProgressUpdate(stage, **counts))
+
+
+def _counting(
+    records: Iterator[LedgerRecord], progress: ProgressGateway
+) -> Iterator[LedgerRecord]:
+    """Passes records through, reporting every PROGRESS_EVERY written records."""
+    for written, record in enumerate(records, start=1):
+        if written % PROGRESS_EVERY == 0:
+            progress.report(ProgressUpdate("writing", written=written))
+        yield record
+
+
+def iter_split_records(
+    rows: Iterable[list[Any]], totals: LedgerTotals
+) -> Iterator[LedgerRecord]:
+    """
+    Splits raw ledger rows one at a time, yielding one record per lawyer and
+    accumulating `totals` (including the per-lawyer/department summary and
+    unparseable amount cells) as it goes. Rows up to and including the header
+    ('備註' in column 10) are skipped; raises ValidationError if none is found.
+    """
+    header_found = False
+
+    for row_number, raw_row in enumerate(rows, start=1):
+        # Locate Header
+        if not header_found:
+            if len(raw_row) >= 10 and "備註" in str(raw_row[9]):
+                header_found = True
+            continue
+
+        # Validation
+        if len(raw_row) < 10:
+            continue
+        # Date check
+        date_val = str(raw_row[0]).strip()
+        if not date_val or date_val.lower() == "nan":
+            continue
+
+        abstract = str(raw_row[1]).strip()
+        department = str(raw_row[8]).strip()  # Col 9 is Dept
+        if department.lower() == "nan":
+            department = ""
+
+        # Remark (Lawyer Codes)
+        remark = str(raw_row[9]).strip()
+        if not remark or remark.lower() == "nan":
+            # Skip or Error? Original logic raised error or skipped.
+            # We skip for now unless strict mode.
+            continue
+
+        codes = [c.strip() for c in remark.split(" ") if c.strip()]
+        if not codes:
+            continue
+
+        # Amounts (Cols 3 & 4 -> Index 2 & 3), exact integer cents
+        debit = parse_amount_cents(raw_row[2])
+        credit = parse_amount_cents(raw_row[3])
+        if debit is None or credit is None:
+            # Not split, but reported instead of silently dropped
+            for column, value, cents in (
+                ("借方", raw_row[2], debit),
+                ("貸方", raw_row[3], credit),
+            ):
+                if cents is None:
+                    totals.invalid_amounts.append(
+                        InvalidAmount(row_number, column, str(value))
+                    )
+            continue
+
+        # Split Logic (whole units, half to even)
+        count = len(codes)
+        split_debit = split_amount(debit, count)
+        split_credit = split_amount(credit, count)
+
+        for code in codes:
+            # Create Row per Lawyer
+            record = (date_val, abstract, department, split_debit, split_credit, code)
+            totals.add_record(record)
+            yield record
 
-    def _locate_header_index(self, rows: list[list]) -> int:
-        for idx, row in enumerate(rows):
-            if len(row) < 10:
-                continue
-            if "備註" in str(row[9]):
-                return idx
-        # Default fallback if not found? Or raise error.
-        # Original logic raised error.
+    if not header_found:
         raise ValidationError("Header row not found.")
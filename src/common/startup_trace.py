@@ -0,0 +1,157 @@
+"""
+Startup trace mode.
+
+With STARTUP_TRACE set, main.py installs an import timer before anything
+heavy is imported and marks milestones up to the first paint (the first
+client connection). The report lists the milestones, the slowest modules
+(self and cumulative import time, like `python -X importtime`) and whether
+time-to-first-paint stayed within STARTUP_BUDGET_MS (default 3000).
+
+STARTUP_TRACE=1 prints the report to stderr (the startup log in packaged
+builds); any other value is used as the path of a file to write it to.
+Works in packaged builds, where -X importtime is not available.
+"""
+
+import os
+import sys
+import threading
+import time
+from importlib.abc import MetaPathFinder
+
+DEFAULT_BUDGET_MS = 3000
+# Modules listed per ranking in the report
+TOP_MODULES = 15
+
+_t0 = time.perf_counter()
+_milestones: list[tuple[str, float]] = []
+# Module -> (self seconds, cumulative seconds)
+_imports: dict[str, tuple[float, float]] = {}
+_finder: "_ImportTimer | None" = None
+_reported = False
+
+
+def enabled() -> bool:
+    return bool(os.getenv("STARTUP_TRACE"))
+
+
+def install() -> None:
+    """Starts timing imports and milestones (call first thing in main)."""
+    global _finder, _t0
+    if _finder is not None:
+        return
+    _t0 = time.perf_counter()
+    _finder = _ImportTimer()
+    sys.meta_path.insert(0, _finder)
+    mark("trace installed")
+
+
+def mark(name: str) -> None:
+    """Records a milestone, in ms since install()."""
+    if _finder is not None:
+        _milestones.append((name, (time.perf_counter() - _t0) * 1000))
+
+
+def report() -> str | None:
+    """
+    Stops the import timer and writes the report (once). Returns it, or
+    None if tracing is off or already reported.
+    """
+    global _reported
+    if _finder is None or _reported:
+        return None
+    _reported = True
+    mark("first paint")
+    if _finder in sys.meta_path:
+        sys.meta_path.remove(_finder)
+
+    text = _format(_budget_ms())
+    target = os.getenv("STARTUP_TRACE", "1")
+    if target == "1":
+        print(text, file=sys.stderr)
+    else:
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return text
+
+
+def _budget_ms() -> float:
+    try:
+        return float(os.getenv("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS))
+    except ValueError:
+        return DEFAULT_BUDGET_MS
+
+
+def _format(budget_ms: float) -> str:
+    lines = ["Startup trace", "", "Milestones (ms since start):"]
+    lines += [f"  {ms:9.1f}  {name}" for name, ms in _milestones]
+
+    total_self = sum(s for s, _ in _imports.values()) * 1000
+    lines += ["", f"Imports: {len(_imports)} modules, {total_self:.1f} ms"]
+    for title, index in (("self", 0), ("cumulative", 1)):
+        lines.append(f"Slowest by {title} time (ms):")
+        ranked = sorted(_imports.items(), key=lambda kv: kv[1][index], reverse=True)
+        lines += [
+            f"  {times[index] * 1000:9.1f}  {module}"
+            for module, times in ranked[:TOP_MODULES]
+        ]
+
+    first_paint = _milestones[-1][1]
+    verdict = "OK" if first_paint <= budget_ms else "OVER BUDGET"
+    lines += [
+        "",
+        (
+            f"Time to first paint: {first_paint:.1f} ms "
+            f"(budget {budget_ms:.0f} ms) {verdict}"
+        ),
+    ]
+    return "\n".join(lines)
+
+
+class _ImportTimer(MetaPathFinder):
+    """
+    Times each module's execution by wrapping its loader's exec_module.
+    Child imports run inside their parent's exec_module, so self time is
+    the cumulative time minus that of the children (tracked per thread).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            spec = None
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+        finally:
+            self._local.finding = False
+
+        loader = spec.loader if spec else None
+        # Builtin/frozen importers are classes shared by all their modules
+        if loader is None or isinstance(loader, type):
+            return spec
+        if hasattr(loader, "exec_module"):
+            loader.exec_module = self._timed(fullname, loader.exec_module)
+        return spec
+
+    def _timed(self, name, exec_module):
+        def run(module):
+            stack = self._local.__dict__.setdefault("stack", [])
+            stack.append(0.0)  # Children's cumulative time
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                _imports[name] = (elapsed - children, elapsed)
+
+        return run
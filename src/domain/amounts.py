@@ -0,0 +1,66 @@
+import math
+import re
+import unicodedata
+from numbers import Integral, Real
+from typing import Any
+
+# Sign, integer digits, optional fraction (either part may be empty, not both)
+_AMOUNT = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?")
+
+
+def parse_amount_cents(value: Any) -> int | None:
+    """
+    Parses a ledger amount cell into exact integer cents.
+    Empty cells are 0. Text may use thousands separators, full-width digits
+    and punctuation, and accounting-style parentheses for negatives, e.g.
+    "（１，２３４．５）" -> -123450. More than two decimals round half to even.
+    Floats are scaled by 100 and rounded half to even.
+    Returns None when the cell is not an amount.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, Integral):
+        return int(value) * 100
+    if isinstance(value, Real):
+        number = float(value)
+        if math.isnan(number):
+            return 0
+        if math.isinf(number):
+            return None
+        return round(number * 100)
+
+    text = unicodedata.normalize("NFKC", str(value))
+    text = text.replace(",", "").replace(" ", "").replace("\u2212", "-")
+    if not text:
+        return 0
+
+    negative = text.startswith("(") and text.endswith(")")
+    if negative:
+        text = text[1:-1]
+    match = _AMOUNT.fullmatch(text)
+    if match is None:
+        return None
+    sign, whole, frac = match.group(1), match.group(2), match.group(3) or ""
+    if not whole and not frac:
+        return None
+    if negative and sign:
+        return None  # "(-5)" is ambiguous
+
+    cents = div_round_half_even(int(whole + frac or "0") * 100, 10 ** len(frac))
+    return -cents if negative or sign == "-" else cents
+
+
+def split_amount(cents: int, count: int) -> int:
+    """One of `count` equal shares of `cents`, in whole units (half to even)."""
+    return div_round_half_even(cents, 100 * count)
+
+
+def div_round_half_even(numerator: int, denominator: int) -> int:
+    """numerator / denominator rounded half to even, exactly (denominator > 0)."""
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2):
+        quotient += 1
+    return quotient
@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+from domain.dto.auto_fill import AutoFillResult
+from domain.dto.separate_ledger import SeparateLedgerResult
+
+
+@dataclass
+class FillAndSplitResult:
+    """Outcome of the fused Step 2 + Step 3 run."""
+
+    auto_fill: AutoFillResult
+    ledger: SeparateLedgerResult
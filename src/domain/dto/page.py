@@ -0,0 +1,29 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PageQuery:
+    """
+    Server-side paging request (mirrors the Quasar table pagination object).
+    rows_per_page <= 0 means "all rows".
+    """
+
+    page: int = 1
+    rows_per_page: int = 10
+    sort_by: str | None = None
+    descending: bool = False
+    search: str = ""
+
+    @property
+    def offset(self) -> int:
+        if self.rows_per_page <= 0:
+            return 0
+        return (max(self.page, 1) - 1) * self.rows_per_page
+
+
+@dataclass
+class PageResult[T]:
+    """One page of items plus the total number of matching rows."""
+
+    items: list[T] = field(default_factory=list)
+    total: int = 0
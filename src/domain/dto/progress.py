@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ProgressUpdate:
+    """Snapshot of a running workflow step (counts are cumulative)."""
+
+    # reading, filling, splitting, writing, done
+    stage: str
+    rows_scanned: int = 0
+    # None while unknown (e.g. streaming)
+    rows_total: int | None = None
+    matched: int = 0
+    prompted: int = 0
+    written: int = 0
@@ -1,5 +1,13 @@
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
 from dataclasses import dataclass, field
-from datetime import datetime
+from typing import Literal, overload
+
+# (date, abstract, department, debit, credit, lawyer_code)
+LedgerRecord = tuple[str, str, str, int, int, str]
+
+# Output file format of the separate ledger report (also its file extension)
+ReportFormat = Literal["xlsx", "csv", "parquet"]
 
 
 @dataclass
@@ -12,9 +20,298 @@ class SeparateLedgerRow:
     lawyer_code: str
 
 
+@dataclass(eq=False)
+class SeparateLedgerTable(Sequence[SeparateLedgerRow]):
+    """
+    Compact columnar storage for split ledger rows.
+    String columns are dictionary-encoded: each distinct value is stored once
+    and rows hold int32 keys into it. Amounts are int64 arrays.
+    Indexing or iterating yields SeparateLedgerRow views built on demand.
+    """
+
+    dates: list[str] = field(default_factory=list)
+    abstracts: list[str] = field(default_factory=list)
+    departments: list[str] = field(default_factory=list)
+    lawyer_codes: list[str] = field(default_factory=list)
+    date_keys: array = field(default_factory=lambda: array("i"))
+    abstract_keys: array = field(default_factory=lambda: array("i"))
+    department_keys: array = field(default_factory=lambda: array("i"))
+    lawyer_keys: array = field(default_factory=lambda: array("i"))
+    debits: array = field(default_factory=lambda: array("q"))
+    credits: array = field(default_factory=lambda: array("q"))
+
+    def __len__(self) -> int:
+        return len(self.debits)
+
+    @overload
+    def __getitem__(self, index: int) -> SeparateLedgerRow: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[SeparateLedgerRow]: ...
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return SeparateLedgerRow(
+            date=self.dates[self.date_keys[index]],
+            abstract=self.abstracts[self.abstract_keys[index]],
+            department=self.departments[self.department_keys[index]],
+            debit=self.debits[index],
+            credit=self.credits[index],
+            lawyer_code=self.lawyer_codes[self.lawyer_keys[index]],
+        )
+
+    def __iter__(self) -> Iterator[SeparateLedgerRow]:
+        for record in self.iter_records():
+            yield SeparateLedgerRow(*record)
+
+    def iter_records(
+        self, positions: Iterable[int] | None = None
+    ) -> Iterator[LedgerRecord]:
+        """
+        Iterates rows as plain tuples (no per-row objects kept alive),
+        optionally only the rows at `positions`.
+        """
+        dates, abstracts = self.dates, self.abstracts
+        departments, lawyer_codes = self.departments, self.lawyer_codes
+        if positions is not None:
+            for i in positions:
+                yield (
+                    dates[self.date_keys[i]],
+                    abstracts[self.abstract_keys[i]],
+                    departments[self.department_keys[i]],
+                    self.debits[i],
+                    self.credits[i],
+                    lawyer_codes[self.lawyer_keys[i]],
+                )
+            return
+        for dk, ak, pk, debit, credit, lk in zip(
+            self.date_keys,
+            self.abstract_keys,
+            self.department_keys,
+            self.debits,
+            self.credits,
+            self.lawyer_keys,
+        ):
+            yield (
+                dates[dk],
+                abstracts[ak],
+                departments[pk],
+                debit,
+                credit,
+                lawyer_codes[lk],
+            )
+
+    def partition_by_lawyer(self) -> dict[str, array]:
+        """Row positions per lawyer code, each in row order (empty codes omitted)."""
+        parts = [array("i") for _ in self.lawyer_codes]
+        for i, key in enumerate(self.lawyer_keys):
+            parts[key].append(i)
+        return {code: part for code, part in zip(self.lawyer_codes, parts) if part}
+
+
+class SeparateLedgerTableBuilder:
+    """Row-at-a-time builder for SeparateLedgerTable (interns strings as it goes)."""
+
+    def __init__(self):
+        self._table = SeparateLedgerTable()
+        self._date_index: dict[str, int] = {}
+        self._abstract_index: dict[str, int] = {}
+        self._department_index: dict[str, int] = {}
+        self._lawyer_index: dict[str, int] = {}
+
+    def append(
+        self,
+        date: str,
+        abstract: str,
+        department: str,
+        debit: int,
+        credit: int,
+        lawyer_code: str,
+    ) -> None:
+        t = self._table
+        t.date_keys.append(_intern(self._date_index, t.dates, date))
+        t.abstract_keys.append(_intern(self._abstract_index, t.abstracts, abstract))
+        t.department_keys.append(
+            _intern(self._department_index, t.departments, department)
+        )
+        t.lawyer_keys.append(_intern(self._lawyer_index, t.lawyer_codes, lawyer_code))
+        t.debits.append(debit)
+        t.credits.append(credit)
+
+    def build(self) -> SeparateLedgerTable:
+        return self._table
+
+
+def _intern(index: dict[str, int], values: list[str], value: str) -> int:
+    key = index.get(value)
+    if key is None:
+        key = index[value] = len(values)
+        values.append(value)
+    return key
+
+
+@dataclass
+class LedgerSummary:
+    """
+    Hash-aggregated subtotals per (lawyer_code, department), in first-seen
+    order. Per-lawyer and per-department roll-ups are derived from these
+    cells, so building the pivot needs no extra pass over the rows.
+    """
+
+    # (lawyer_code, department) -> [row_count, debit, credit]
+    cells: dict[tuple[str, str], list[int]] = field(default_factory=dict)
+
+    def add(self, lawyer_code: str, department: str, debit: int, credit: int) -> None:
+        cell = self.cells.get((lawyer_code, department))
+        if cell is None:
+            self.cells[(lawyer_code, department)] = [1, debit, credit]
+        else:
+            cell[0] += 1
+            cell[1] += debit
+            cell[2] += credit
+
+    def merge(self, other: "LedgerSummary", sign: int = 1) -> None:
+        """Adds (sign=1) or subtracts (sign=-1) another summary's cells."""
+        for key, (count, debit, credit) in other.cells.items():
+            cell = self.cells.setdefault(key, [0, 0, 0])
+            cell[0] += sign * count
+            cell[1] += sign * debit
+            cell[2] += sign * credit
+            if cell[0] == 0:
+                del self.cells[key]
+
+    def by_lawyer(self) -> dict[str, list[int]]:
+        return self._roll_up(0)
+
+    def by_department(self) -> dict[str, list[int]]:
+        return self._roll_up(1)
+
+    def _roll_up(self, key_index: int) -> dict[str, list[int]]:
+        out: dict[str, list[int]] = {}
+        for key, (count, debit, credit) in self.cells.items():
+            total = out.setdefault(key[key_index], [0, 0, 0])
+            total[0] += count
+            total[1] += debit
+            total[2] += credit
+        return out
+
+
+@dataclass(frozen=True)
+class InvalidAmount:
+    """An amount cell that could not be parsed; its row was not split."""
+
+    row_number: int  # 1-based sheet row
+    column: str  # "借方" / "貸方"
+    text: str
+
+
+@dataclass
+class LedgerTotals:
+    """Running totals, accumulated while rows stream through the pipeline."""
+
+    row_count: int = 0
+    total_debit: int = 0
+    total_credit: int = 0
+    summary: LedgerSummary = field(default_factory=LedgerSummary)
+    invalid_amounts: list[InvalidAmount] = field(default_factory=list)
+
+    def add(self, debit: int, credit: int) -> None:
+        self.row_count += 1
+        self.total_debit += debit
+        self.total_credit += credit
+
+    def add_record(self, record: LedgerRecord) -> None:
+        """Adds a split row to the totals and to the per-lawyer summary."""
+        _, _, department, debit, credit, lawyer_code = record
+        self.add(debit, credit)
+        self.summary.add(lawyer_code, department, debit, credit)
+
+
+@dataclass
+class SeparateLedgerOptions:
+    """Per-run options for the separate ledger workflow."""
+
+    # Output format; csv/parquet are data-only and much faster than xlsx
+    report_format: ReportFormat = "xlsx"
+    # Stream reader -> splitter -> writer without materializing any rows
+    streaming: bool = False
+    # Re-split only rows changed since the last run of the same output
+    incremental: bool = False
+    # Also write one workbook per lawyer code plus an index workbook
+    per_lawyer: bool = False
+    # Worker processes for per-lawyer reports (None = one per CPU)
+    max_workers: int | None = None
+
+
+@dataclass
+class LawyerReport:
+    """One per-lawyer workbook produced by the fan-out."""
+
+    lawyer_code: str
+    path: str
+    row_count: int
+    total_debit: int
+    total_credit: int
+
+
 @dataclass
 class SeparateLedgerResult:
-    rows: list[SeparateLedgerRow]
+    rows: Sequence[SeparateLedgerRow]
     total_debit: int
     total_credit: int
     output_path: str = ""
+    lawyer_reports: list[LawyerReport] = field(default_factory=list)
+    index_path: str = ""
+    # Filled during the split; None when the producer did not aggregate
+    summary: LedgerSummary | None = None
+    # Rows left out of the split because an amount could not be parsed
+    invalid_amounts: list[InvalidAmount] = field(default_factory=list)
+    # Set by incremental runs: what changed since the previous run
+    diff: "LedgerDiff | None" = None
+
+    def iter_records(self) -> Iterator[LedgerRecord]:
+        """Iterates rows as tuples, using the columnar fast path when available."""
+        if isinstance(self.rows, SeparateLedgerTable):
+            yield from self.rows.iter_records()
+            return
+        for row in self.rows:
+            yield (
+                row.date,
+                row.abstract,
+                row.department,
+                row.debit,
+                row.credit,
+                row.lawyer_code,
+            )
+
+
+@dataclass
+class LedgerDiff:
+    """Source rows reused from, added since and removed since the last run."""
+
+    reused_rows: int = 0
+    added_rows: int = 0
+    removed_rows: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.added_rows and not self.removed_rows
+
+
+@dataclass
+class LedgerRunState:
+    """
+    What an incremental re-run needs from the previous run: for every split
+    source row, in sheet order, a 128-bit content hash (two 'Q' entries) and
+    how many output records it produced; plus the previous result itself
+    and what was written from it.
+    """
+
+    row_hashes: array = field(default_factory=lambda: array("Q"))
+    record_counts: array = field(default_factory=lambda: array("i"))
+    result: SeparateLedgerResult | None = None
+    # Format of the report, and whether the per-lawyer reports listed in
+    # result.lawyer_reports were written too
+    report_format: ReportFormat | None = None
+    per_lawyer: bool = False
+    # Bumped whenever hashing or splitting rules or these fields change
+    version: int = 2
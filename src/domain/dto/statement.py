@@ -1,5 +1,7 @@
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Protocol
+
+from domain.dto.page import PageQuery, PageResult
 
 
 @dataclass
@@ -14,6 +16,23 @@ class StatementLineItem:
     remarks: str | None = None
 
 
+class StatementRows(Protocol):
+    """
+    Server-side row model over the parsed sheet, for previews.
+    The UI asks for one window of rows at a time; sorting and filtering
+    happen here. Rows are dicts keyed "c0", "c1", ... by column position
+    (labels in `columns`), plus "row" = the Excel row number.
+    """
+
+    columns: list[str]
+
+    def __len__(self) -> int: ...
+
+    def page(self, query: PageQuery) -> PageResult[dict[str, Any]]:
+        """Rows matching query.search (any cell, case-insensitive), sorted and sliced."""
+        ...
+
+
 @dataclass
 class Statement:
     """
@@ -23,6 +42,8 @@ class Statement:
 
     items: list[StatementLineItem] = field(default_factory=list)
     metadata: dict[str, Any] = field(default_factory=dict)
+    # Every cell of the sheet, for the preview grid (None if not available)
+    rows: StatementRows | None = field(default=None, compare=False, repr=False)
 
     @property
     def total_amount(self) -> float:
@@ -0,0 +1,86 @@
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from domain.dto.code_replacement import CodeReplacement
+
+# Above this many codes, find_matches() looks up substrings instead of
+# scanning for each code (measured crossover at ~150 codes)
+LOOKUP_THRESHOLD = 150
+
+
+def parse_target_codes(target_codes: str) -> tuple[str, ...]:
+    """'KW, HL，JH' -> ('KW', 'HL', 'JH') (full-width commas allowed)."""
+    return tuple(
+        t.strip() for t in target_codes.replace("，", ",").split(",") if t.strip()
+    )
+
+
+@dataclass(frozen=True)
+class KnowledgeBase:
+    """
+    Read-only snapshot of the known lawyer codes and replacement rules,
+    with the code matcher compiled once. Safe to share between concurrent
+    runs: a change to the data produces a new snapshot instead.
+    """
+
+    codes: frozenset[str] = frozenset()
+    # Source code -> target codes
+    replacements: Mapping[str, tuple[str, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    version: int = 0
+    # Matcher state, see find_matches()
+    _sorted_codes: tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _lengths: tuple[int, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        codes = tuple(sorted(code for code in self.codes if code))
+        object.__setattr__(self, "_sorted_codes", codes)
+        object.__setattr__(self, "_lengths", tuple(sorted({len(c) for c in codes})))
+
+    @classmethod
+    def build(
+        cls,
+        codes: Iterable[str],
+        replacements: Iterable[CodeReplacement],
+        version: int = 0,
+    ) -> "KnowledgeBase":
+        return cls(
+            codes=frozenset(codes),
+            replacements=MappingProxyType(
+                {
+                    r.source_code: parse_target_codes(r.target_codes)
+                    for r in replacements
+                }
+            ),
+            version=version,
+        )
+
+    def find_matches(self, summary: str) -> list[str]:
+        """
+        Known codes occurring anywhere in `summary`, in order of first
+        occurrence (shorter first at the same position). With many codes,
+        each substring of a known code length is looked up in the set
+        instead of searching the summary once per code.
+        """
+        if len(self._sorted_codes) <= LOOKUP_THRESHOLD:
+            hits = [code for code in self._sorted_codes if code in summary]
+            return sorted(hits, key=lambda code: (summary.find(code), len(code)))
+
+        found: dict[str, None] = {}
+        for start in range(len(summary)):
+            for length in self._lengths:
+                if start + length > len(summary):
+                    break
+                code = summary[start : start + length]
+                if code in self.codes:
+                    found.setdefault(code)
+        return list(found)
+
+    def resolve_replacements(self, codes: Iterable[str]) -> list[str]:
+        """Expands codes that have a replacement rule (e.g. KW -> KW, HL)."""
+        final: list[str] = []
+        for code in codes:
+            final.extend(self.replacements.get(code, (code,)))
+        return final
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy.orm import InstrumentedAttribute, Query
+
+from domain.dto.page import PageQuery
+
+# Highest code point; `col < prefix + _PREFIX_END` bounds a prefix range.
+_PREFIX_END = "\U0010ffff"
+
+
+def paginate(
+    query: Query,
+    page_query: PageQuery,
+    search_column: InstrumentedAttribute[Any],
+    sortable: dict[str, InstrumentedAttribute[Any]],
+    default_sort: str,
+) -> tuple[list[Any], int]:
+    """
+    Applies prefix search, sorting and LIMIT/OFFSET to `query`.
+    Prefix search is expressed as a range (`col >= p AND col < p + U+10FFFF`)
+    instead of LIKE so SQLite can serve it from the column's index.
+    Returns (rows, total matching rows).
+    """
+    prefix = page_query.search.strip()
+    if prefix:
+        query = query.filter(
+            search_column >= prefix, search_column < prefix + _PREFIX_END
+        )
+
+    total = query.order_by(None).count()
+
+    sort_column = sortable.get(page_query.sort_by or "", sortable[default_sort])
+    query = query.order_by(
+        sort_column.desc() if page_query.descending else sort_column.asc()
+    )
+    if page_query.rows_per_page > 0:
+        query = query.offset(page_query.offset).limit(page_query.rows_per_page)
+
+    return query.all(), total
@@ -1,23 +1,39 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import importlib
 import logging
 import os
 import sys
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterator
+from typing import Any
 
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, sessionmaker
 
+from common.errors import InfrastructureError
 from infrastructure.db.base import Base
-from infrastructure.db.code_replacement import DbCodeReplacement
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Imported before create_all() so that every table is registered on Base
+_MODEL_MODULES = (
+    "infrastructure.db.alias",
+    "infrastructure.db.code_replacement",
+    "infrastructure.db.lawyer",
+)
+
 _engine = None
 _Session = None
+_db_executor: ThreadPoolExecutor | None = None
 
 
 def _resolve_database_path() -> Path:
@@ -34,7 +50,7 @@ def _resolve_database_path() -> Path:
     db_path = base_dir / db_filename
 
     if not db_path.parent.exists():
-        logging.info(f"Creating database directory: {db_path.parent}")
+        logger.info(f"Creating database directory: {db_path.parent}")
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
     return db_path
@@ -45,6 +61,8 @@ def _get_engine():
     if _engine is None:
         db_file_path = _resolve_database_path()
         _engine = create_engine(f"sqlite:///{db_file_path}")
+        for name in _MODEL_MODULES:
+            importlib.import_module(name)
         Base.metadata.create_all(_engine)
         _Session = sessionmaker(bind=_engine)
     return _engine, _Session
@@ -62,3 +80,26 @@ def session_scope() -> Iterator[Session]:
         raise
     finally:
         session.close()
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+    if _db_executor is None:
+        # SQLite serializes writers anyway; one dedicated thread keeps DB I/O
+        # off the event loop without adding lock contention.
+        _db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-db")
+    return _db_executor
+
+
+async def run_in_db_thread[T](fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a blocking repository call on the dedicated DB thread.
+    Database errors are raised as InfrastructureError.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _get_db_executor(), functools.partial(fn, *args, **kwargs)
+        )
+    except SQLAlchemyError as e:
+        raise InfrastructureError(str(e)) from e
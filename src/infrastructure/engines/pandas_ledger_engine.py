@@ -0,0 +1,628 @@
+from array import array
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from application.ports.engines import LedgerSplitEngine
+from common.errors import InfrastructureError, ValidationError
+from common.types import Result
+from domain.amounts import parse_amount_cents
+from domain.dto.file_source import FileSource
+from domain.dto.separate_ledger import (
+    InvalidAmount,
+    LedgerDiff,
+    LedgerRunState,
+    LedgerSummary,
+    SeparateLedgerResult,
+    SeparateLedgerTable,
+    SeparateLedgerTableBuilder,
+)
+from infrastructure.repositories.excel_pandas_repo import (
+    AMOUNT_COLUMNS,
+    MISSING_TEXT,
+    WORKBOOK_ERRORS,
+)
+
+# 0-based column positions in the ledger sheet
+COL_DATE = 0
+COL_ABSTRACT = 1
+COL_DEBIT = 2
+COL_CREDIT = 3
+COL_DEPARTMENT = 8
+COL_REMARK = 9
+LEDGER_COLUMNS = [
+    COL_DATE,
+    COL_ABSTRACT,
+    COL_DEBIT,
+    COL_CREDIT,
+    COL_DEPARTMENT,
+    COL_REMARK,
+]
+
+
+class PandasLedgerSplitEngine(LedgerSplitEngine):
+    """
+    Vectorized implementation of LedgerSplitEngine using pandas/numpy.
+    Produces exactly the rows and totals of the per-row loop in
+    SeparateLedgerUseCase, without a Python-level loop over input rows.
+    """
+
+    def split(self, source: FileSource) -> Result[SeparateLedgerResult, Exception]:
+        frame_res = _read_frame(source)
+        if not frame_res.is_success:
+            return Result.failure(frame_res.error)
+
+        try:
+            return Result.success(self.split_frame(frame_res.value))
+        except Exception as e:  # noqa: BLE001 - the port returns every failure
+            return Result.failure(e)
+
+    def split_rows(
+        self, rows: list[list[Any]]
+    ) -> Result[SeparateLedgerResult, Exception]:
+        try:
+            if not rows or len(rows[0]) <= COL_REMARK:
+                return Result.failure(ValidationError("Header row not found."))
+            # Only the ledger columns; rows are padded to the same width
+            frame = pd.DataFrame(
+                {col: [row[col] for row in rows] for col in LEDGER_COLUMNS}
+            )
+            return Result.success(self.split_frame(frame))
+        except Exception as e:  # noqa: BLE001 - the port returns every failure
+            return Result.failure(e)
+
+    def split_incremental(
+        self, source: FileSource, previous: LedgerRunState | None
+    ) -> Result[tuple[SeparateLedgerResult, LedgerRunState, LedgerDiff], Exception]:
+        frame_res = _read_frame(source)
+        if not frame_res.is_success:
+            return Result.failure(frame_res.error)
+
+        try:
+            return Result.success(
+                self.split_frame_incremental(frame_res.value, previous)
+            )
+        except Exception as e:  # noqa: BLE001 - the port returns every failure
+            return Result.failure(e)
+
+    def split_frame(self, df: pd.DataFrame) -> SeparateLedgerResult:
+        """
+        Splits a header-less ledger frame whose columns are the sheet's
+        0-based column positions (at least LEDGER_COLUMNS).
+        Text columns are factorized so str()/strip()/split() run once per
+        distinct value; everything per-row is numpy indexing.
+        """
+        remark = _factorize_text(df[COL_REMARK])
+        return _split_body(df, _body_start(*remark), remark)[0]
+
+    def split_frame_incremental(
+        self, df: pd.DataFrame, previous: LedgerRunState | None
+    ) -> tuple[SeparateLedgerResult, LedgerRunState, LedgerDiff]:
+        """
+        split_frame() that reuses `previous`: body rows are matched to the
+        previous run's split rows by 128-bit content hash (as a multiset, so
+        duplicates and moved rows are fine); only unmatched rows are split.
+        Reused records are copied column-wise and the totals and summary are
+        patched with the removed and added rows only.
+        """
+        remark = _factorize_text(df[COL_REMARK])
+        start = _body_start(*remark)
+        hashes = _row_hashes(df.iloc[start:])
+
+        if previous is None or previous.result is None:
+            result, pos, counts = _split_body(df, start, remark)
+            state = LedgerRunState(
+                row_hashes=_to_array("Q", hashes[pos - start].ravel()),
+                record_counts=_to_array("i", counts),
+                result=result,
+            )
+            return result, state, LedgerDiff(added_rows=len(pos))
+
+        prev = previous.result
+        prev_hashes = np.frombuffer(previous.row_hashes, dtype=np.uint64).reshape(-1, 2)
+        prev_counts = np.frombuffer(previous.record_counts, dtype=np.int32).astype(
+            np.int64
+        )
+        prev_offsets = np.cumsum(prev_counts) - prev_counts
+        match = _match_rows(hashes, prev_hashes)
+
+        # Split only body rows without a previous twin (keeps sheet row numbers)
+        unmatched = np.flatnonzero(match < 0)
+        added, new_pos, new_counts = _split_body(df.iloc[start + unmatched], 0)
+        new_rows = unmatched[new_pos]  # body positions that produced records
+
+        # Output order = sheet order over reused and newly split rows
+        reused_rows = np.flatnonzero(match >= 0)
+        reused_prev = match[reused_rows]
+        prev_len = len(prev.rows)
+        body_rows = np.concatenate([reused_rows, new_rows])
+        starts = np.concatenate(
+            [prev_offsets[reused_prev], prev_len + np.cumsum(new_counts) - new_counts]
+        )
+        lens = np.concatenate([prev_counts[reused_prev], new_counts])
+        order = np.argsort(body_rows, kind="stable")
+        body_rows, starts, lens = body_rows[order], starts[order], lens[order]
+        prev_table = _as_table(prev.rows)
+        rows = _concat_take(prev_table, _as_table(added.rows), _ranges(starts, lens))
+
+        # Patch totals and summary: minus removed previous rows, plus new ones
+        kept = np.zeros(len(prev_counts), dtype=bool)
+        kept[reused_prev] = True
+        removed = np.flatnonzero(~kept)
+        removed_table = _concat_take(
+            prev_table,
+            SeparateLedgerTable(),
+            _ranges(prev_offsets[removed], prev_counts[removed]),
+        )
+        removed_debit = int(np.frombuffer(removed_table.debits, np.int64).sum())
+        removed_credit = int(np.frombuffer(removed_table.credits, np.int64).sum())
+
+        summary = LedgerSummary()
+        summary.merge(prev.summary or LedgerSummary())
+        summary.merge(_table_summary(removed_table), sign=-1)
+        summary.merge(added.summary or LedgerSummary())
+
+        result = SeparateLedgerResult(
+            rows=rows,
+            total_debit=prev.total_debit - removed_debit + added.total_debit,
+            total_credit=prev.total_credit - removed_credit + added.total_credit,
+            summary=summary,
+            invalid_amounts=added.invalid_amounts,
+        )
+        state = LedgerRunState(
+            row_hashes=_to_array("Q", hashes[body_rows].ravel()),
+            record_counts=_to_array("i", lens),
+            result=result,
+        )
+        diff = LedgerDiff(
+            reused_rows=len(reused_rows),
+            added_rows=len(new_rows),
+            removed_rows=len(removed),
+        )
+        return result, state, diff
+
+
+def _read_frame(source: FileSource) -> Result[pd.DataFrame, Exception]:
+    file_path = str(source.path) if source.path else None
+    if not file_path:
+        return Result.failure(ValidationError("Invalid file source."))
+
+    try:
+        return Result.success(
+            pd.read_excel(
+                file_path,
+                header=None,
+                usecols=LEDGER_COLUMNS,
+                # Placeholder text ("N/A", "NULL"...) is missing, except in
+                # the amounts, where it is reported as invalid (AMOUNT_COLUMNS)
+                keep_default_na=False,
+                na_values={
+                    col: [""] if col in AMOUNT_COLUMNS else list(MISSING_TEXT)
+                    for col in LEDGER_COLUMNS
+                },
+            )
+        )
+    except pd.errors.ParserError:
+        # Fewer than 10 columns: the per-row path would never find a header
+        return Result.failure(ValidationError("Header row not found."))
+    except WORKBOOK_ERRORS as e:
+        return Result.failure(
+            InfrastructureError(f"Failed to read ledger columns: {e}")
+        )
+
+
+def _body_start(remark_keys: np.ndarray, remarks: np.ndarray) -> int:
+    """Position of the first row after the header ('備註' in the remark column)."""
+    is_header = np.array(["備註" in r for r in remarks], dtype=bool)[remark_keys]
+    if not is_header.any():
+        raise ValidationError("Header row not found.")
+    return int(is_header.argmax()) + 1
+
+
+def _split_body(
+    df: pd.DataFrame,
+    start: int,
+    remark: tuple[np.ndarray, np.ndarray] | None = None,
+) -> tuple[SeparateLedgerResult, np.ndarray, np.ndarray]:
+    """
+    Splits the rows of `df` from position `start` on. Also returns the
+    positions of the rows that produced records and how many each produced.
+    """
+    remark_keys, remarks = remark or _factorize_text(df[COL_REMARK])
+    date_keys, dates = _factorize_text(df[COL_DATE])
+    abstract_keys, abstracts = _factorize_text(df[COL_ABSTRACT])
+    dept_keys, depts = _factorize_text(df[COL_DEPARTMENT])
+    depts[np.array([d.lower() == "nan" for d in depts], dtype=bool)] = ""
+    debit, debit_ok = _parse_amounts(df[COL_DEBIT])
+    credit, credit_ok = _parse_amounts(df[COL_CREDIT])
+
+    # Per distinct remark: its lawyer codes (remark text is already stripped)
+    remark_codes = [
+        [c.strip() for c in r.split(" ") if c.strip()]
+        if r and r.lower() != "nan"
+        else []
+        for r in remarks
+    ]
+    codes_per_remark = np.array([len(c) for c in remark_codes], dtype=np.int64)
+    date_ok = np.array([bool(d) and d.lower() != "nan" for d in dates], dtype=bool)
+
+    eligible = date_ok[date_keys] & (codes_per_remark[remark_keys] > 0)
+    eligible[:start] = False
+    invalid_amounts = _invalid_amounts(df, eligible, debit_ok, credit_ok)
+    pos = np.flatnonzero(eligible & debit_ok & credit_ok)
+    if pos.size == 0:
+        empty = SeparateLedgerResult(
+            rows=[],
+            total_debit=0,
+            total_credit=0,
+            summary=LedgerSummary(),
+            invalid_amounts=invalid_amounts,
+        )
+        return empty, pos, np.zeros(0, dtype=np.int64)
+
+    # Explode: one entry per (row, lawyer code), row order then remark order
+    row_remark = remark_keys[pos]
+    row_counts = codes_per_remark[row_remark]
+    counts = row_counts
+    row_pos = np.repeat(pos, counts)
+    lawyer_index: dict[str, int] = {}
+    flat_code_keys = np.array(
+        [
+            lawyer_index.setdefault(c, len(lawyer_index))
+            for codes in remark_codes
+            for c in codes
+        ],
+        dtype=np.int32,
+    )
+    remark_start = np.cumsum(codes_per_remark) - codes_per_remark
+    within_row = np.arange(row_pos.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    lawyer_keys = flat_code_keys[
+        np.repeat(remark_start[row_remark], counts) + within_row
+    ]
+    counts = np.repeat(counts, counts)
+
+    # Exact cents -> whole-unit shares, half to even (domain split_amount)
+    split_debit = _div_round_half_even(debit[row_pos], counts * 100)
+    split_credit = _div_round_half_even(credit[row_pos], counts * 100)
+
+    row_depts = dept_keys[row_pos]
+    lawyer_codes = list(lawyer_index)
+    rows = SeparateLedgerTable(
+        dates=dates.tolist(),
+        abstracts=abstracts.tolist(),
+        departments=depts.tolist(),
+        lawyer_codes=lawyer_codes,
+        date_keys=_to_array("i", date_keys[row_pos]),
+        abstract_keys=_to_array("i", abstract_keys[row_pos]),
+        department_keys=_to_array("i", row_depts),
+        lawyer_keys=_to_array("i", lawyer_keys),
+        debits=_to_array("q", split_debit),
+        credits=_to_array("q", split_credit),
+    )
+    result = SeparateLedgerResult(
+        rows=rows,
+        total_debit=int(split_debit.sum()),
+        total_credit=int(split_credit.sum()),
+        summary=_summarize(
+            lawyer_keys,
+            lawyer_codes,
+            row_depts,
+            depts,
+            split_debit,
+            split_credit,
+        ),
+        invalid_amounts=invalid_amounts,
+    )
+    return result, pos, row_counts
+
+
+def _row_hashes(frame: pd.DataFrame) -> np.ndarray:
+    """
+    128-bit content hash per row of the ledger columns, as (n, 2) uint64.
+    Each column is factorized once and only its distinct values are hashed
+    (SipHash via pandas); rows then combine their values' hashes in numpy.
+    """
+    out = np.zeros((len(frame), 2), dtype=np.uint64)
+    for col in LEDGER_COLUMNS:
+        codes, uniques = pd.factorize(frame[col])
+        values = np.asarray(uniques, dtype=object)
+        for half, key in enumerate(_HASH_KEYS):
+            # Trailing slot for missing cells (code -1)
+            hashed = np.append(
+                pd.util.hash_array(values, hash_key=key, categorize=False),
+                np.uint64(0x9E3779B97F4A7C15),
+            )
+            out[:, half] = out[:, half] * _HASH_MULTIPLIER ^ hashed[codes]
+    return out
+
+
+def _match_rows(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """
+    For each current row hash, the index of a previous row with the same
+    hash or -1. Equal hashes pair up in order (k-th duplicate with k-th
+    duplicate). Rows are paired on the first half and confirmed on the
+    second, so a collision only causes a needless re-split.
+    """
+    if len(previous) == 0:
+        return np.full(len(current), -1, dtype=np.int64)
+    m = len(previous)
+    _, group = np.unique(
+        np.concatenate([previous[:, 0], current[:, 0]]), return_inverse=True
+    )
+    rank = np.concatenate([_occurrence(group[:m]), _occurrence(group[m:])])
+    pair = group.astype(np.int64) * (m + len(current)) + rank
+    prev_pair, cur_pair = pair[:m], pair[m:]
+
+    prev_order = np.argsort(prev_pair)
+    idx = np.minimum(np.searchsorted(prev_pair[prev_order], cur_pair), m - 1)
+    match = prev_order[idx]
+    found = (prev_pair[match] == cur_pair) & (previous[match, 1] == current[:, 1])
+    return np.where(found, match, -1)
+
+
+def _occurrence(group: np.ndarray) -> np.ndarray:
+    """How many earlier elements share each element's group (0 for the first)."""
+    order = np.argsort(group, kind="stable")
+    sorted_group = group[order]
+    run_start = np.flatnonzero(np.r_[True, sorted_group[1:] != sorted_group[:-1]])
+    run_len = np.diff(np.r_[run_start, len(group)])
+    rank = np.empty(len(group), dtype=np.int64)
+    rank[order] = np.arange(len(group)) - np.repeat(run_start, run_len)
+    return rank
+
+
+def _ranges(starts: np.ndarray, lens: np.ndarray) -> np.ndarray:
+    """Concatenation of range(start, start + len) for each pair."""
+    return np.repeat(starts - (np.cumsum(lens) - lens), lens) + np.arange(lens.sum())
+
+
+def _as_table(rows) -> SeparateLedgerTable:
+    if isinstance(rows, SeparateLedgerTable):
+        return rows
+    builder = SeparateLedgerTableBuilder()
+    for row in rows:
+        builder.append(
+            row.date,
+            row.abstract,
+            row.department,
+            row.debit,
+            row.credit,
+            row.lawyer_code,
+        )
+    return builder.build()
+
+
+def _concat_take(
+    a: SeparateLedgerTable, b: SeparateLedgerTable, take: np.ndarray
+) -> SeparateLedgerTable:
+    """Rows `take` of `a` followed by `b`, with b's dictionaries merged into a's."""
+
+    def text(a_values, a_keys, b_values, b_keys) -> tuple[list[str], array]:
+        values, remap = _merge_dictionary(a_values, b_values)
+        keys = np.concatenate(
+            [
+                np.frombuffer(a_keys, dtype=np.int32),
+                remap[np.frombuffer(b_keys, dtype=np.int32)],
+            ]
+        )[take]
+        return _compact(values, keys)
+
+    def amounts(a_values, b_values) -> array:
+        return _to_array(
+            "q",
+            np.concatenate(
+                [
+                    np.frombuffer(a_values, dtype=np.int64),
+                    np.frombuffer(b_values, dtype=np.int64),
+                ]
+            )[take],
+        )
+
+    dates, date_keys = text(a.dates, a.date_keys, b.dates, b.date_keys)
+    abstracts, abstract_keys = text(
+        a.abstracts, a.abstract_keys, b.abstracts, b.abstract_keys
+    )
+    departments, department_keys = text(
+        a.departments, a.department_keys, b.departments, b.department_keys
+    )
+    lawyer_codes, lawyer_keys = text(
+        a.lawyer_codes, a.lawyer_keys, b.lawyer_codes, b.lawyer_keys
+    )
+    return SeparateLedgerTable(
+        dates=dates,
+        abstracts=abstracts,
+        departments=departments,
+        lawyer_codes=lawyer_codes,
+        date_keys=date_keys,
+        abstract_keys=abstract_keys,
+        department_keys=department_keys,
+        lawyer_keys=lawyer_keys,
+        debits=amounts(a.debits, b.debits),
+        credits=amounts(a.credits, b.credits),
+    )
+
+
+def _merge_dictionary(
+    values: list[str], extra: list[str]
+) -> tuple[list[str], np.ndarray]:
+    """values + unseen entries of `extra`, and extra's keys into the result."""
+    merged = list(values)
+    index: dict[str, int] = {}
+    for i, v in enumerate(values):
+        index.setdefault(v, i)
+    remap = np.empty(len(extra), dtype=np.int32)
+    for i, v in enumerate(extra):
+        key = index.get(v)
+        if key is None:
+            key = index[v] = len(merged)
+            merged.append(v)
+        remap[i] = key
+    return merged, remap
+
+
+def _compact(values: list[str], keys: np.ndarray) -> tuple[list[str], array]:
+    """Drops dictionary entries no row uses (remaining order unchanged)."""
+    used, new_keys = np.unique(keys, return_inverse=True)
+    if len(used) == len(values):
+        return values, _to_array("i", keys)
+    return [values[k] for k in used], _to_array("i", new_keys)
+
+
+def _table_summary(table: SeparateLedgerTable) -> LedgerSummary:
+    return _summarize(
+        np.frombuffer(table.lawyer_keys, dtype=np.int32),
+        table.lawyer_codes,
+        np.frombuffer(table.department_keys, dtype=np.int32),
+        np.array(table.departments, dtype=object),
+        np.frombuffer(table.debits, dtype=np.int64),
+        np.frombuffer(table.credits, dtype=np.int64),
+    )
+
+
+def _summarize(
+    lawyer_keys: np.ndarray,
+    lawyer_codes: list[str],
+    dept_keys: np.ndarray,
+    depts: np.ndarray,
+    debit: np.ndarray,
+    credit: np.ndarray,
+) -> LedgerSummary:
+    """
+    Group-by (lawyer, department) over the split arrays: one hash of the
+    combined key, exact int64 sums, groups in first-seen order.
+    """
+    combined = lawyer_keys.astype(np.int64) * max(len(depts), 1) + dept_keys
+    groups, first, inverse = np.unique(combined, return_index=True, return_inverse=True)
+    counts = np.bincount(inverse, minlength=groups.size)
+    debit_sums = np.zeros(groups.size, dtype=np.int64)
+    credit_sums = np.zeros(groups.size, dtype=np.int64)
+    np.add.at(debit_sums, inverse, debit)
+    np.add.at(credit_sums, inverse, credit)
+
+    summary = LedgerSummary()
+    for g in np.argsort(first, kind="stable"):
+        lawyer, dept = divmod(int(groups[g]), max(len(depts), 1))
+        # Distinct dept keys can share a label ("nan" -> ""), so merge cells
+        cell = summary.cells.setdefault((lawyer_codes[lawyer], depts[dept]), [0, 0, 0])
+        cell[0] += int(counts[g])
+        cell[1] += int(debit_sums[g])
+        cell[2] += int(credit_sums[g])
+    return summary
+
+
+def _factorize_text(col: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (keys, values) with values[keys] == [str(x).strip() for x in col],
+    empty cells as "" (matches fillna("") + str()).
+    """
+    keys, uniques = pd.factorize(col.fillna("").astype(str))
+    # Re-factorize after strip() so " x" and "x" share one category
+    stripped_keys, values = pd.factorize(
+        np.array([u.strip() for u in uniques], dtype=object)
+    )
+    return stripped_keys[keys], np.asarray(values, dtype=object)
+
+
+def _to_array(typecode: str, values: np.ndarray) -> array:
+    """Copies a numpy integer array into a stdlib array (domain DTO storage)."""
+    out = array(typecode)
+    out.frombytes(values.astype(np.dtype(typecode), copy=False).tobytes())
+    return out
+
+
+# Two independent 16-byte keys -> 128-bit row hashes for incremental runs
+_HASH_KEYS = ("ledger-row-hash1", "ledger-row-hash2")
+_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+# Amounts _parse_amount_texts converts in bulk (after NFKC and separators)
+_PLAIN_AMOUNT = r"[+-]?\d{1,13}(?:\.\d{0,2})?"
+_PAREN_AMOUNT = r"\(\d{1,13}(?:\.\d{0,2})?\)"
+
+
+def _parse_amounts(col: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized `parse_amount_cents`: returns (int64 cents, ok) where ok is
+    the bitmap of parseable cells. Numeric columns are scaled in numpy;
+    otherwise each distinct value is parsed once, text with pandas string
+    ops (see _parse_amount_texts).
+    """
+    if pd.api.types.is_integer_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        return col.to_numpy(dtype=np.int64) * 100, np.ones(len(col), dtype=bool)
+    if pd.api.types.is_float_dtype(col):
+        values = col.to_numpy(dtype=np.float64, na_value=0.0)
+        ok = np.isfinite(values)
+        # np.rint rounds half to even, same as Python's round()
+        cents = np.rint(np.where(ok, values, 0.0) * 100).astype(np.int64)
+        return cents, ok
+
+    keys, uniques = pd.factorize(col.to_numpy(dtype=object))
+    # Extra trailing slot for missing cells (key -1): 0 cents, parseable
+    cents = np.zeros(len(uniques) + 1, dtype=np.int64)
+    ok = np.ones(len(uniques) + 1, dtype=bool)
+    is_text = np.fromiter(
+        (type(u) is str for u in uniques), dtype=bool, count=len(uniques)
+    )
+    text_pos = np.flatnonzero(is_text)
+    cents[text_pos], ok[text_pos] = _parse_amount_texts(uniques[text_pos])
+    for i in np.flatnonzero(~is_text):
+        parsed = parse_amount_cents(uniques[i])
+        cents[i], ok[i] = (0, False) if parsed is None else (parsed, True)
+    return cents[keys], ok[keys]
+
+
+def _parse_amount_texts(texts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    `parse_amount_cents` over distinct strings using pandas string ops.
+    Plain amounts (up to 13 integer digits and 2 decimals, optionally signed
+    or in parentheses) are converted in bulk: through float64 they stay
+    below 2**53 cents, so rint() recovers the exact value. Anything else
+    goes through the scalar parser.
+    """
+    cleaned = (
+        pd.Series(texts, dtype="str")
+        .str.normalize("NFKC")
+        .str.replace(r"[, ]", "", regex=True)
+        .str.replace("\u2212", "-", regex=False)
+    )
+    signed = cleaned.str.fullmatch(_PLAIN_AMOUNT).to_numpy(dtype=bool)
+    paren = cleaned.str.fullmatch(_PAREN_AMOUNT).to_numpy(dtype=bool)
+    empty = (cleaned == "").to_numpy(dtype=bool)
+
+    core = cleaned.where(~paren, cleaned.str.slice(1, -1))
+    core = core.where(signed | paren, "0")
+    values = pd.to_numeric(core).to_numpy(dtype=np.float64)
+    cents = np.rint(values * 100).astype(np.int64)
+    cents[paren] = -cents[paren]
+
+    ok = signed | paren | empty
+    for i in np.flatnonzero(~ok):
+        parsed = parse_amount_cents(texts[i])
+        cents[i], ok[i] = (0, False) if parsed is None else (parsed, True)
+    cents[~ok] = 0
+    return cents, ok
+
+
+def _div_round_half_even(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise exact numerator / denominator, half to even (denominator > 0)."""
+    quotient = numerator // denominator
+    twice = 2 * (numerator - quotient * denominator)
+    up = (twice > denominator) | ((twice == denominator) & (quotient % 2 == 1))
+    return quotient + up
+
+
+def _invalid_amounts(
+    df: pd.DataFrame, eligible: np.ndarray, debit_ok: np.ndarray, credit_ok: np.ndarray
+) -> list[InvalidAmount]:
+    """Unparseable amount cells of rows that would otherwise be split."""
+    out: list[InvalidAmount] = []
+    for i in np.flatnonzero(eligible & ~(debit_ok & credit_ok)):
+        for column, col, ok in (
+            ("借方", COL_DEBIT, debit_ok),
+            ("貸方", COL_CREDIT, credit_ok),
+        ):
+            if not ok[i]:
+                # Index is the sheet position, also for row subsets
+                row_number = int(df.index[i]) + 1
+                out.append(InvalidAmount(row_number, column, str(df[col].iat[i])))
+    return out
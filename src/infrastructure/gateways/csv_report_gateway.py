@@ -0,0 +1,34 @@
+import csv
+from collections.abc import Iterable
+from itertools import islice
+
+from domain.dto.separate_ledger import LedgerRecord, LedgerTotals
+from infrastructure.gateways.file_report_gateway import HEADERS, FileReportGateway
+
+# Rows handed to csv.writer.writerows per call
+_CHUNK_ROWS = 10_000
+
+
+def write_csv_ledger(
+    records: Iterable[LedgerRecord], totals: LedgerTotals, output_path: str
+) -> None:
+    # utf-8-sig writes a BOM so Excel detects UTF-8 and shows CJK text correctly
+    with open(
+        output_path, "w", encoding="utf-8-sig", newline="", buffering=1 << 20
+    ) as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        # Data rows only (no totals row) so BI tools can load the file as-is
+        it = iter(records)
+        while chunk := list(islice(it, _CHUNK_ROWS)):
+            writer.writerows(chunk)
+
+
+class CsvReportGateway(FileReportGateway):
+    """
+    ReportGateway writing UTF-8 (with BOM) CSV, streamed in chunks.
+    Many times faster than xlsx for large ledgers.
+    """
+
+    extension = ".csv"
+    writer = write_csv_ledger
@@ -1,59 +1,110 @@
+from collections.abc import Iterable
+
 import openpyxl
-from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.styles import Font
+
+from domain.dto.separate_ledger import LedgerRecord, LedgerSummary, LedgerTotals
+from infrastructure.gateways.file_report_gateway import (
+    HEADERS,
+    FileReportGateway,
+    bold_cell,
+)
+
+# Label for rows without a department in the summary sheet
+NO_DEPARTMENT = "(無部門)"
+
+
+def write_xlsx_ledger(
+    records: Iterable[LedgerRecord], totals: LedgerTotals, output_path: str
+) -> None:
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("律師分帳報表")
+    header_font = Font(bold=True)
+
+    # Headers
+    ws.append([bold_cell(ws, h, header_font) for h in HEADERS])
+
+    # Data Rows
+    for record in records:
+        ws.append(record)
+
+    # Totals Row (directly below the last data row)
+    ws.append(
+        [
+            bold_cell(ws, "總計", header_font),
+            None,
+            None,
+            bold_cell(ws, totals.total_debit, header_font),
+            bold_cell(ws, totals.total_credit, header_font),
+        ]
+    )
+
+    # Summary sheet (totals are complete once the records are exhausted)
+    if totals.summary.cells:
+        _write_summary_sheet(wb, totals.summary, header_font)
+
+    # Cells whose rows were not split because the amount is unreadable
+    if totals.invalid_amounts:
+        ws = wb.create_sheet("金額錯誤")
+        ws.append([bold_cell(ws, h, header_font) for h in ["列號", "欄位", "內容"]])
+        for issue in totals.invalid_amounts:
+            ws.append([issue.row_number, issue.column, issue.text])
+
+    # Save
+    wb.save(output_path)
+
+
+def _write_summary_sheet(wb, summary: LedgerSummary, header_font: Font) -> None:
+    """Pivot of per-lawyer (by department) and per-department subtotals."""
+    ws = wb.create_sheet("彙總")
+
+    # Per lawyer, broken down by department, with a subtotal row per lawyer
+    ws.append(
+        [
+            bold_cell(ws, h, header_font)
+            for h in ["律師代碼", "部門", "筆數", "借方金額", "貸方金額"]
+        ]
+    )
+    by_lawyer_dept: dict[str, list[tuple[str, list[int]]]] = {}
+    for (code, dept), cell in summary.cells.items():
+        by_lawyer_dept.setdefault(code, []).append((dept, cell))
+    lawyer_totals = summary.by_lawyer()
+    for code, depts in by_lawyer_dept.items():
+        for dept, (count, debit, credit) in depts:
+            ws.append([code, dept or NO_DEPARTMENT, count, debit, credit])
+        count, debit, credit = lawyer_totals[code]
+        ws.append(
+            [
+                bold_cell(ws, v, header_font)
+                for v in (code, "小計", count, debit, credit)
+            ]
+        )
+
+    # Per department
+    ws.append([])
+    ws.append(
+        [
+            bold_cell(ws, h, header_font)
+            for h in ["部門", "筆數", "借方金額", "貸方金額"]
+        ]
+    )
+    for dept, (count, debit, credit) in summary.by_department().items():
+        ws.append([dept or NO_DEPARTMENT, count, debit, credit])
 
-from application.ports.gateways import ReportGateway
-from common.errors import InfrastructureError
-from common.types import Result
-from domain.dto.separate_ledger import SeparateLedgerResult
+    # Grand total
+    ws.append([])
+    count = sum(c[0] for c in lawyer_totals.values())
+    debit = sum(c[1] for c in lawyer_totals.values())
+    credit = sum(c[2] for c in lawyer_totals.values())
+    ws.append([bold_cell(ws, v, header_font) for v in ("總計", count, debit, credit)])
 
 
-class ExcelReportGateway(ReportGateway):
+class ExcelReportGateway(FileReportGateway):
     """
     Implementation of ReportGateway using openpyxl.
+    Uses write-only workbooks so rows are flushed to disk as they are appended.
+    Adds a 彙總 (summary) sheet from the subtotals aggregated during the split.
     """
 
-    def generate_ledger_report(
-        self, data: SeparateLedgerResult, output_path: str
-    ) -> Result[str, Exception]:
-        try:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "律師分帳報表"
-
-            # Headers
-            headers = ["日期", "摘要", "部門", "借方金額", "貸方金額", "律師代碼"]
-            ws.append(headers)
-
-            # Style Headers
-            header_font = Font(bold=True)
-            for cell in ws[1]:
-                cell.font = header_font
-
-            # Data Rows
-            for row in data.rows:
-                ws.append(
-                    [
-                        row.date,
-                        row.abstract,
-                        row.department,
-                        row.debit,
-                        row.credit,
-                        row.lawyer_code,
-                    ]
-                )
-
-            # Totals Row
-            # Assuming data rows are 2 to N+1
-            last_row = len(data.rows) + 2
-            ws.cell(row=last_row, column=1, value="總計").font = header_font
-            ws.cell(row=last_row, column=4, value=data.total_debit).font = header_font
-            ws.cell(row=last_row, column=5, value=data.total_credit).font = header_font
-
-            # Save
-            wb.save(output_path)
-            return Result.success(output_path)
-
-        except Exception as e:
-            return Result.failure(
-                InfrastructureError(f"Failed to generate report: {e}")
-            )
+    extension = ".xlsx"
+    writer = write_xlsx_ledger
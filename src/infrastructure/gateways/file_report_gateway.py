@@ -0,0 +1,256 @@
+import multiprocessing
+import os
+import re
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+from application.ports.gateways import ProgressGateway, ReportGateway
+from common.errors import InfrastructureError
+from common.types import Result
+from domain.dto.progress import ProgressUpdate
+from domain.dto.separate_ledger import (
+    LawyerReport,
+    LedgerRecord,
+    LedgerTotals,
+    SeparateLedgerResult,
+    SeparateLedgerTable,
+    SeparateLedgerTableBuilder,
+)
+
+HEADERS = ["日期", "摘要", "部門", "借方金額", "貸方金額", "律師代碼"]
+INDEX_HEADERS = ["律師代碼", "筆數", "借方金額", "貸方金額", "檔案"]
+
+# Characters not allowed in file names on Windows/macOS
+_UNSAFE_FILENAME = re.compile(r'[\\/:*?"<>|\s]+')
+
+# Records between two progress reports while writing
+PROGRESS_EVERY = 1000
+
+# (records, totals, output_path) -> None; must be a picklable module-level function
+LedgerWriter = Callable[[Iterable[LedgerRecord], LedgerTotals, str], None]
+
+
+class FileReportGateway(ReportGateway):
+    """
+    Format-independent part of the file based ReportGateways.
+    Subclasses set `extension` and `writer` (writes one ledger file, raising
+    on failure). Per-lawyer reports are written by worker processes that each
+    receive the columnar result once and then only row positions per lawyer;
+    the index is always an xlsx workbook.
+    """
+
+    extension: str = ""
+    writer: LedgerWriter
+
+    def generate_ledger_report(
+        self,
+        data: SeparateLedgerResult,
+        output_path: str,
+        progress: ProgressGateway | None = None,
+    ) -> Result[str, Exception]:
+        if data.summary is None:
+            # Producer did not aggregate: build the summary while writing
+            totals = LedgerTotals()
+            records = _accumulate(data.iter_records(), totals)
+        else:
+            totals = LedgerTotals(
+                row_count=len(data.rows),
+                total_debit=data.total_debit,
+                total_credit=data.total_credit,
+                summary=data.summary,
+            )
+            records = data.iter_records()
+        totals.invalid_amounts = data.invalid_amounts
+        if progress:
+            records = _counting(records, progress, len(data.rows))
+        return self.write_ledger_report_stream(records, totals, output_path)
+
+    def write_ledger_report_stream(
+        self,
+        records: Iterable[LedgerRecord],
+        totals: LedgerTotals,
+        output_path: str,
+    ) -> Result[str, Exception]:
+        try:
+            type(self).writer(records, totals, output_path)
+            return Result.success(output_path)
+
+        except Exception as e:  # noqa: BLE001 - the writer is a pluggable format
+            return Result.failure(
+                InfrastructureError(f"Failed to generate report: {e}")
+            )
+
+    def generate_lawyer_reports(
+        self,
+        data: SeparateLedgerResult,
+        output_dir: str,
+        max_workers: int | None = None,
+    ) -> Result[list[LawyerReport], Exception]:
+        try:
+            writer = type(self).writer
+            table = _as_table(data)
+            partitions = table.partition_by_lawyer()
+            os.makedirs(output_dir, exist_ok=True)
+            paths = _lawyer_file_paths(list(partitions), output_dir, self.extension)
+
+            workers = min(max_workers or os.cpu_count() or 1, len(partitions))
+            if workers <= 1:
+                # Not worth a process pool: write in this process
+                _init_worker(table)
+                reports = [
+                    _write_lawyer_report(writer, code, positions, paths[code])
+                    for code, positions in partitions.items()
+                ]
+            else:
+                # Spawned, not forked: the caller runs inside the UI's event
+                # loop and thread pool, whose state a fork would copy
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(table,),
+                ) as pool:
+                    futures = [
+                        pool.submit(
+                            _write_lawyer_report,
+                            writer,
+                            code,
+                            positions,
+                            paths[code],
+                        )
+                        for code, positions in partitions.items()
+                    ]
+                    reports = [f.result() for f in futures]
+            return Result.success(reports)
+
+        except Exception as e:  # noqa: BLE001 - any writer, and the process pool
+            return Result.failure(
+                InfrastructureError(f"Failed to generate lawyer reports: {e}")
+            )
+        finally:
+            _init_worker(None)
+
+    def generate_report_index(
+        self, reports: list[LawyerReport], output_path: str
+    ) -> Result[str, Exception]:
+        try:
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet("索引")
+            header_font = Font(bold=True)
+            index_dir = os.path.dirname(output_path)
+
+            ws.append([bold_cell(ws, h, header_font) for h in INDEX_HEADERS])
+
+            for report in reports:
+                file_name = os.path.relpath(report.path, index_dir)
+                link = WriteOnlyCell(ws, value=file_name)
+                link.hyperlink = file_name
+                link.style = "Hyperlink"
+                ws.append(
+                    [
+                        report.lawyer_code,
+                        report.row_count,
+                        report.total_debit,
+                        report.total_credit,
+                        link,
+                    ]
+                )
+
+            ws.append(
+                [
+                    bold_cell(ws, "總計", header_font),
+                    bold_cell(ws, sum(r.row_count for r in reports), header_font),
+                    bold_cell(ws, sum(r.total_debit for r in reports), header_font),
+                    bold_cell(ws, sum(r.total_credit for r in reports), header_font),
+                ]
+            )
+
+            wb.save(output_path)
+            return Result.success(output_path)
+
+        except (OSError, ValueError, IllegalCharacterError) as e:
+            return Result.failure(
+                InfrastructureError(f"Failed to generate report index: {e}")
+            )
+
+
+def bold_cell(ws, value, font: Font) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value)
+    cell.font = font
+    return cell
+
+
+def _as_table(data: SeparateLedgerResult) -> SeparateLedgerTable:
+    if isinstance(data.rows, SeparateLedgerTable):
+        return data.rows
+    builder = SeparateLedgerTableBuilder()
+    for record in data.iter_records():
+        builder.append(*record)
+    return builder.build()
+
+
+def _lawyer_file_paths(
+    codes: list[str], output_dir: str, extension: str
+) -> dict[str, str]:
+    """Maps each code to a unique, file-system safe report path."""
+    paths: dict[str, str] = {}
+    used: set[str] = set()
+    for code in codes:
+        stem = _UNSAFE_FILENAME.sub("_", code).strip("._") or "lawyer"
+        name, n = stem, 1
+        while name.lower() in used:
+            n += 1
+            name = f"{stem}_{n}"
+        used.add(name.lower())
+        paths[code] = os.path.join(output_dir, f"{name}{extension}")
+    return paths
+
+
+# Set once per worker process by the pool initializer
+_worker_table: SeparateLedgerTable | None = None
+
+
+def _init_worker(table: SeparateLedgerTable | None) -> None:
+    global _worker_table
+    _worker_table = table
+
+
+def _accumulate(
+    records: Iterable[LedgerRecord], totals: LedgerTotals
+) -> Iterator[LedgerRecord]:
+    for record in records:
+        totals.add_record(record)
+        yield record
+
+
+def _counting(
+    records: Iterable[LedgerRecord], progress: ProgressGateway, rows_total: int
+) -> Iterator[LedgerRecord]:
+    """Passes records through, reporting every PROGRESS_EVERY written records."""
+    for written, record in enumerate(records, start=1):
+        if written % PROGRESS_EVERY == 0:
+            progress.report(
+                ProgressUpdate("writing", rows_total=rows_total, written=written)
+            )
+        yield record
+
+
+def _write_lawyer_report(
+    writer: LedgerWriter, code: str, positions: array, path: str
+) -> LawyerReport:
+    totals = LedgerTotals()
+    records = _worker_table.iter_records(positions)
+    writer(_accumulate(records, totals), totals, path)
+    return LawyerReport(
+        lawyer_code=code,
+        path=path,
+        row_count=totals.row_count,
+        total_debit=totals.total_debit,
+        total_credit=totals.total_credit,
+    )
@@ -1,6 +1,7 @@
 import asyncio
+from contextlib import nullcontext
 
-from nicegui import ui
+from nicegui import Client, ui
 
 from application.ports.gateways import UserInteractionGateway
 from domain.dto.auto_fill import AutoFillPrompt, AutoFillResponse
@@ -18,12 +19,18 @@ from ui.components.dialogs.lawyer_selection_dialog import LawyerSelectionDialog
 class NiceGUIInteractionGateway(UserInteractionGateway):
     """
     Implementation of UserInteractionGateway using NiceGUI Dialogs.
+    With a `client`, dialogs open in that client's page even when asked
+    from a background job (which has no UI slot of its own).
     """
 
+    def __init__(self, client: Client | None = None):
+        self._client = client
+
     async def select_lawyers(self, prompt: AutoFillPrompt) -> AutoFillResponse:
-        dialog = LawyerSelectionDialog(
-            row_number=prompt.row_number,
-            summary=prompt.summary,
-            available_codes=prompt.available_codes,
-        )
+        with self._client.layout if self._client else nullcontext():
+            dialog = LawyerSelectionDialog(
+                row_number=prompt.row_number,
+                summary=prompt.summary,
+                available_codes=prompt.available_codes,
+            )
         return await dialog.await_result()
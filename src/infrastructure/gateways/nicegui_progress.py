@@ -0,0 +1,49 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+
+from nicegui import core
+
+from application.ports.gateways import ProgressGateway
+from domain.dto.progress import ProgressUpdate
+
+
+class NiceGUIProgressGateway(ProgressGateway):
+    """
+    Implementation of ProgressGateway that forwards updates to a UI callback
+    on NiceGUI's event loop, at most once per `interval` seconds.
+    Updates in between are coalesced (only the latest is kept) and the last
+    one is always delivered, by a trailing call at the end of the interval.
+    report() may be called from worker threads; `sink` always runs on the loop.
+    """
+
+    def __init__(self, sink: Callable[[ProgressUpdate], None], interval: float = 0.25):
+        self._sink = sink
+        self._interval = interval
+        # The loop NiceGUI serves on (falls back to the current one, e.g. in scripts)
+        self._loop = core.loop or asyncio.get_running_loop()
+        self._lock = threading.Lock()
+        self._latest: ProgressUpdate | None = None
+        self._last_sent = 0.0
+        self._scheduled = False
+
+    def report(self, update: ProgressUpdate) -> None:
+        with self._lock:
+            self._latest = update
+            if self._scheduled:
+                return  # The pending delivery will pick this one up
+            self._scheduled = True
+            delay = max(0.0, self._last_sent + self._interval - time.monotonic())
+        try:
+            self._loop.call_soon_threadsafe(self._loop.call_later, delay, self._deliver)
+        except RuntimeError:
+            pass  # Loop closed (app shutting down)
+
+    def _deliver(self) -> None:
+        with self._lock:
+            update, self._latest = self._latest, None
+            self._scheduled = False
+            self._last_sent = time.monotonic()
+        if update is not None:
+            self._sink(update)
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import BinaryIO
+
+from application.ports.repositories import UploadStore
+from common.errors import InfrastructureError
+from common.types import PathLike, Result
+from domain.dto.file_source import FileSource
+
+DEFAULT_MAX_BYTES = 1024**3  # 1 GiB
+DEFAULT_MAX_AGE = 24 * 3600  # seconds
+# Entries used this recently are never evicted for size
+DEFAULT_GRACE = 30 * 60
+
+
+class ContentAddressedUploadStore(UploadStore):
+    """
+    Implementation of UploadStore on the local disk:
+    - <root>/blobs/<sha256><ext>: one copy per distinct content, hashed
+      while the upload streams to disk.
+    - <root>/work/<id>/<filename>: a working copy per upload (hard-linked
+      to its blob when the filesystem allows). Writers replace files
+      atomically, which gives the working copy its own data instead of
+      changing the blob. Reports are written next to it.
+    Entries are evicted least recently used first once older than
+    `max_age` seconds, or while the store is over `max_bytes` (except
+    entries used within the last `grace` seconds).
+    """
+
+    def __init__(
+        self,
+        root: PathLike | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+        grace: float = DEFAULT_GRACE,
+    ):
+        self._root = Path(
+            root or Path(tempfile.gettempdir()) / "IncomeStatement_Uploads"
+        )
+        self._blobs = self._root / "blobs"
+        self._work = self._root / "work"
+        self._incoming = self._root / "incoming"
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._grace = grace
+        # Committing a blob and evicting must not interleave
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ContentAddressedUploadStore":
+        """
+        Configured by UPLOAD_STORE_DIR, UPLOAD_STORE_MAX_MB and
+        UPLOAD_STORE_MAX_AGE_HOURS (defaults: temp dir, 1024 MB, 24 h).
+        """
+        return cls(
+            root=os.getenv("UPLOAD_STORE_DIR") or None,
+            max_bytes=int(
+                float(os.getenv("UPLOAD_STORE_MAX_MB", DEFAULT_MAX_BYTES / 1024**2))
+                * 1024**2
+            ),
+            max_age=float(
+                os.getenv("UPLOAD_STORE_MAX_AGE_HOURS", DEFAULT_MAX_AGE / 3600)
+            )
+            * 3600,
+        )
+
+    async def put(
+        self, chunks: AsyncIterator[bytes], filename: str
+    ) -> Result[FileSource, Exception]:
+        tmp_path = None
+        try:
+            ext = os.path.splitext(filename)[1].lower() or ".xlsx"
+            self._incoming.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self._incoming, suffix=ext)
+            digest = hashlib.sha256()
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    await asyncio.to_thread(_write_chunk, f, digest, chunk)
+
+            source = await asyncio.to_thread(
+                self._commit, tmp_path, digest.hexdigest(), ext, filename
+            )
+            tmp_path = None
+            await asyncio.to_thread(self.evict)
+            return Result.success(source)
+        except Exception as e:  # noqa: BLE001 - includes the upload stream's errors
+            return Result.failure(InfrastructureError(f"Failed to store upload: {e}"))
+        finally:
+            if tmp_path:
+                Path(tmp_path).unlink(missing_ok=True)
+
+    def evict(self) -> int:
+        with self._lock:
+            now = time.time()
+            entries = []
+            for folder in (self._blobs, self._work, self._incoming):
+                if folder.is_dir():
+                    entries += [_entry_usage(path) for path in folder.iterdir()]
+            total = sum(size for _, size, _ in entries)
+
+            freed = 0
+            # Least recently used first
+            for last_used, size, path in sorted(entries, key=lambda e: e[0]):
+                idle = now - last_used
+                expired = idle > self._max_age
+                over_budget = total > self._max_bytes and idle > self._grace
+                if (expired or over_budget) and _remove(path):
+                    total -= size
+                    freed += size
+            return int(freed)
+
+    def _commit(
+        self, tmp_path: str, upload_id: str, ext: str, filename: str
+    ) -> FileSource:
+        blob = self._blobs / f"{upload_id}{ext}"
+        with self._lock:
+            self._blobs.mkdir(parents=True, exist_ok=True)
+            if blob.exists():
+                # Seen before: keep the stored copy, mark it as recently used
+                os.unlink(tmp_path)
+                os.utime(blob)
+            else:
+                os.replace(tmp_path, blob)
+
+            work_dir = self._work / uuid.uuid4().hex
+            work_dir.mkdir(parents=True)
+            name = os.path.basename(filename.replace("\\", "/")) or f"upload{ext}"
+            work_file = work_dir / name
+            try:
+                os.link(blob, work_file)
+            except OSError:
+                shutil.copyfile(blob, work_file)
+        return FileSource(path=str(work_file), upload_id=upload_id, filename=filename)
+
+
+def _write_chunk(f: BinaryIO, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    f.write(chunk)
+
+
+def _entry_usage(path: Path) -> tuple[float, float, Path]:
+    """(last used, bytes, path) of a blob or a work directory."""
+    try:
+        files = [path] if path.is_file() else [p for p in path.rglob("*")]
+        last_used = path.stat().st_mtime
+        size = 0.0
+        for file in files:
+            st = file.stat()
+            last_used = max(last_used, st.st_mtime)
+            if file.is_file():
+                # Hard-linked data is shared by its links
+                size += st.st_size / max(st.st_nlink, 1)
+        return last_used, size, path
+    except OSError:
+        return time.time(), 0.0, path  # Vanished or unreadable: leave it
+
+
+def _remove(path: Path) -> bool:
+    try:
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+        return True
+    except OSError:
+        return False  # e.g. still open on Windows; retried next time
@@ -1,14 +1,56 @@
+import os
+import zipfile
+from collections.abc import Iterator
 from typing import Any
 
-
+import numpy as np
 import openpyxl
 import pandas as pd
+from openpyxl.utils.exceptions import IllegalCharacterError, InvalidFileException
+from pandas._libs.parsers import STR_NA_VALUES
 
-from application.ports.repositories import ExcelRepository
+from application.ports.repositories import EditableSheet, ExcelRepository
 from common.errors import InfrastructureError, ValidationError
 from common.types import Result
 from domain.dto.file_source import FileSource
-from domain.dto.statement import Statement, StatementLineItem
+from domain.dto.page import PageQuery, PageResult
+from domain.dto.statement import Statement, StatementLineItem, StatementRows
+
+# What reading or saving a workbook raises: missing or locked file (OSError),
+# not an Excel file (ValueError, BadZipFile, InvalidFileException), broken
+# sheet XML (SyntaxError: ParseError), missing parts (KeyError), and
+# control characters in a written cell (IllegalCharacterError)
+WORKBOOK_ERRORS = (
+    OSError,
+    ValueError,
+    KeyError,
+    SyntaxError,
+    zipfile.BadZipFile,
+    InvalidFileException,
+    IllegalCharacterError,
+)
+
+# Text pandas reads as missing by default ("N/A", "NULL", "nan", ""...)
+MISSING_TEXT = frozenset(STR_NA_VALUES)
+# 0-based debit and credit columns of a ledger sheet. Only blank cells are
+# missing there: placeholder text is kept, to be reported as an invalid
+# amount instead of read as 0. Other columns (e.g. the remark) keep
+# pandas' default missing values.
+AMOUNT_COLUMNS = (2, 3)
+
+
+def _raw_row(values: tuple[Any, ...], width: int) -> list[Any]:
+    """
+    An openpyxl row as read_raw_rows gives it: missing cells (empty, or
+    MISSING_TEXT outside AMOUNT_COLUMNS) as "", padded to `width`.
+    """
+    row = ["" if v is None or v in MISSING_TEXT else v for v in values]
+    for col in AMOUNT_COLUMNS:
+        if col < len(values) and values[col] is not None:
+            row[col] = values[col]
+    if len(row) < width:
+        row.extend([""] * (width - len(row)))
+    return row
 
 
 class ExcelPandasRepository(ExcelRepository):
@@ -26,28 +68,35 @@ class ExcelPandasRepository(ExcelRepository):
 
             try:
                 df = pd.read_excel(file_path)
-            except Exception as e:
+            except WORKBOOK_ERRORS as e:
                 return Result.failure(
                     InfrastructureError(f"Failed to read Excel file: {str(e)}")
                 )
 
-            # Convert DataFrame to Statement DTO
-            statement = Statement()
-
-            for _, row in df.iterrows():
-                row_dict = row.fillna("").to_dict()
+            # Convert DataFrame to Statement DTO (column-wise, not per row)
+            n = len(df)
+            descriptions = (
+                df["摘要"].fillna("").astype(str)
+                if "摘要" in df.columns
+                else ["Unknown"] * n
+            )
+            categories = (
+                df["科目"].fillna("").astype(str) if "科目" in df.columns else [""] * n
+            )
+            statement = Statement(rows=PandasStatementRows(df))
+            for description, category in zip(descriptions, categories):
                 item = StatementLineItem(
                     year=2024,  # Mock
                     month=1,  # Mock
-                    description=str(row_dict.get("摘要", "Unknown")),
+                    description=description,
                     amount=0.0,
-                    category=str(row_dict.get("科目", "")),
+                    category=category,
                 )
                 statement.add_item(item)
 
             return Result.success(statement)
 
-        except Exception as e:
+        except Exception as e:  # noqa: BLE001 - the port returns every failure
             return Result.failure(e)
 
     def read_raw_rows(self, source: FileSource) -> Result[list[list[Any]], Exception]:
@@ -57,13 +106,45 @@ class ExcelPandasRepository(ExcelRepository):
                 return Result.failure(ValidationError("Invalid file source."))
 
             # Read without header to get absolute row indices consistent with openpyxl
-            df = pd.read_excel(file_path, header=None)
+            df = pd.read_excel(
+                file_path, header=None, keep_default_na=False, na_values=[""]
+            )
+            # Missing text outside AMOUNT_COLUMNS, as iter_raw_rows reads it
+            text = df.columns.difference(AMOUNT_COLUMNS)
+            df[text] = df[text].mask(df[text].isin(list(MISSING_TEXT))).infer_objects()
             # Convert to list of lists, handle NaN
             rows = df.fillna("").values.tolist()
             return Result.success(rows)
-        except Exception as e:
+        except WORKBOOK_ERRORS as e:
             return Result.failure(InfrastructureError(f"Failed to read raw rows: {e}"))
 
+    def iter_raw_rows(
+        self, source: FileSource
+    ) -> Result[Iterator[list[Any]], Exception]:
+        try:
+            file_path = self._resolve_source(source)
+            if not file_path:
+                return Result.failure(ValidationError("Invalid file source."))
+
+            # read_only streams the sheet XML instead of building the whole tree
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except WORKBOOK_ERRORS as e:
+            return Result.failure(InfrastructureError(f"Failed to open rows: {e}"))
+        if wb.active is None:
+            wb.close()
+            return Result.failure(ValidationError("Workbook has no worksheet."))
+
+        def rows() -> Iterator[list[Any]]:
+            try:
+                ws = wb.active
+                width = ws.max_column or 0
+                for values in ws.iter_rows(values_only=True):
+                    yield _raw_row(values, width)
+            finally:
+                wb.close()
+
+        return Result.success(rows())
+
     def update_cells(
         self, source: FileSource, updates: list[tuple[int, int, Any]]
     ) -> Result[int, Exception]:
@@ -78,6 +159,8 @@ class ExcelPandasRepository(ExcelRepository):
 
             wb = openpyxl.load_workbook(file_path)
             ws = wb.active
+            if ws is None:
+                return Result.failure(ValidationError("Workbook has no worksheet."))
 
             count = 0
             for row_idx, col_idx, value in updates:
@@ -85,16 +168,191 @@ class ExcelPandasRepository(ExcelRepository):
                 ws.cell(row=row_idx, column=col_idx).value = value
                 count += 1
 
-            wb.save(file_path)
+            _save_atomically(wb, file_path)
             wb.close()
             return Result.success(count)
 
-        except Exception as e:
+        except WORKBOOK_ERRORS as e:
             return Result.failure(InfrastructureError(f"Failed to update cells: {e}"))
 
+    def open_for_update(self, source: FileSource) -> Result[EditableSheet, Exception]:
+        try:
+            file_path = self._resolve_source(source)
+            if not file_path:
+                return Result.failure(ValidationError("Invalid file source."))
+
+            # Full (not read_only) load: the same workbook is patched and saved
+            wb = openpyxl.load_workbook(file_path)
+            if wb.active is None:
+                return Result.failure(ValidationError("Workbook has no worksheet."))
+            return Result.success(OpenpyxlEditableSheet(wb, file_path))
+        except WORKBOOK_ERRORS as e:
+            return Result.failure(InfrastructureError(f"Failed to open workbook: {e}"))
+
     def _resolve_source(self, source: FileSource) -> str | None:
         if source.is_local:
             return str(source.path)
         if source.path:
             return str(source.path)
         return None
+
+
+class OpenpyxlEditableSheet(EditableSheet):
+    """
+    EditableSheet over a loaded openpyxl workbook (active sheet).
+    Cell values match iter_raw_rows: empty cells as "" and rows padded.
+    """
+
+    def __init__(self, wb: openpyxl.Workbook, file_path: str):
+        self._wb = wb
+        self._file_path = file_path
+        ws = wb.active
+        width = ws.max_column or 0
+        self.rows: list[list[Any]] = []
+        for values in ws.iter_rows(values_only=True):
+            self.rows.append(_raw_row(values, width))
+
+    def save(self, updates: list[tuple[int, int, Any]]) -> Result[int, Exception]:
+        try:
+            ws = self._wb.active
+            for row_idx, col_idx, value in updates:
+                ws.cell(row=row_idx, column=col_idx).value = value
+            _save_atomically(self._wb, self._file_path)
+            return Result.success(len(updates))
+        except WORKBOOK_ERRORS as e:
+            return Result.failure(InfrastructureError(f"Failed to update cells: {e}"))
+
+    def close(self) -> None:
+        self._wb.close()
+
+
+class PandasStatementRows(StatementRows):
+    """
+    StatementRows over the DataFrame read_statement parsed (header on the
+    first sheet row). Only the requested window is converted to dicts.
+    The last search mask, per-column sort order and resulting row order are
+    cached, so paging through a sorted or filtered sheet only slices.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df.reset_index(drop=True)
+        self.columns = [
+            "" if str(c).startswith("Unnamed:") else str(c) for c in df.columns
+        ]
+        self._text: pd.Series | None = None
+        self._mask: tuple[str, np.ndarray] | None = None
+        self._sorted: tuple[tuple[int, bool], np.ndarray] | None = None
+        self._order: tuple[tuple, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return len(self._df)
+
+    def page(self, query: PageQuery) -> PageResult[dict[str, Any]]:
+        order = self._row_order(
+            query.search.strip().lower(), query.sort_by, query.descending
+        )
+        if query.rows_per_page > 0:
+            window = order[query.offset : query.offset + query.rows_per_page]
+        else:
+            window = order
+        block = self._df.take(window)
+        items = []
+        for pos, values in zip(window, block.itertuples(index=False, name=None)):
+            # +2: 0-based position below the header row -> 1-based Excel row
+            row = {"row": int(pos) + 2}
+            row.update((f"c{i}", _cell(v)) for i, v in enumerate(values))
+            items.append(row)
+        return PageResult(items=items, total=len(order))
+
+    def _row_order(
+        self, search: str, sort_by: str | None, descending: bool
+    ) -> np.ndarray:
+        key = (search, sort_by, descending)
+        if self._order is not None and self._order[0] == key:
+            return self._order[1]
+
+        column = _column_index(sort_by, len(self.columns))
+        if column is None:
+            order = np.arange(len(self._df))
+            if sort_by == "row" and descending:
+                order = order[::-1]
+        else:
+            order = self._sort_order(column, descending)
+        if search:
+            order = order[self._search_mask(search)[order]]
+
+        self._order = (key, order)
+        return order
+
+    def _sort_order(self, column: int, descending: bool) -> np.ndarray:
+        """Row positions sorted by one column (stable, empty cells last)."""
+        key = (column, descending)
+        if self._sorted is not None and self._sorted[0] == key:
+            return self._sorted[1]
+        values = self._df.iloc[:, column]
+        present = values.notna().to_numpy()
+        values = values[present]
+        try:
+            ordered = values.sort_values(ascending=not descending, kind="stable")
+        except TypeError:
+            # Mixed types (e.g. numbers and text): compare as text
+            ordered = values.astype(str).sort_values(
+                ascending=not descending, kind="stable"
+            )
+        order = np.concatenate(
+            [ordered.index.to_numpy(dtype=np.int64), np.flatnonzero(~present)]
+        )
+        self._sorted = (key, order)
+        return order
+
+    def _search_mask(self, search: str) -> np.ndarray:
+        if self._mask is not None and self._mask[0] == search:
+            return self._mask[1]
+        if self._text is None:
+            # Every cell as lower-case text, one string per row (built once)
+            cells = [
+                self._df.iloc[:, i].fillna("").astype(str)
+                for i in range(len(self.columns))
+            ]
+            if cells:
+                self._text = cells[0].str.cat(cells[1:], sep="\x1f").str.lower()
+            else:
+                self._text = pd.Series([""] * len(self._df), dtype=str)
+        mask = self._text.str.contains(search, regex=False).to_numpy(dtype=bool)
+        self._mask = (search, mask)
+        return mask
+
+
+def _save_atomically(wb: openpyxl.Workbook, file_path: str) -> None:
+    """
+    Saves to a temp file and renames it over `file_path`: a failed save
+    leaves the original intact, and a hard-linked copy (see
+    ContentAddressedUploadStore) keeps its old content.
+    """
+    tmp_path = f"{file_path}.tmp"
+    try:
+        wb.save(tmp_path)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _column_index(sort_by: str | None, width: int) -> int | None:
+    """Position of a "c<N>" column key, or None (unsorted / by row number)."""
+    if sort_by and sort_by.startswith("c") and sort_by[1:].isdigit():
+        index = int(sort_by[1:])
+        if index < width:
+            return index
+    return None
+
+
+def _cell(value: Any) -> Any:
+    """A cell value the browser can display (JSON-safe, empty for NaN/NaT)."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
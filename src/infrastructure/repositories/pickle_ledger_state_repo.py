@@ -0,0 +1,99 @@
+import array
+import os
+import pickle
+
+from application.ports.repositories import LedgerStateRepository
+from common.errors import InfrastructureError
+from common.types import Result
+from domain.dto import separate_ledger
+from domain.dto.separate_ledger import LedgerRunState
+
+# Stored next to the report, e.g. ledger_separate_ledger.xlsx.ledger-state
+STATE_SUFFIX = ".ledger-state"
+
+# The only globals a state file may reference when unpickled
+_ALLOWED_GLOBALS = {
+    ("array", "array"),
+    ("array", "_array_reconstructor"),
+    *(
+        ("domain.dto.separate_ledger", name)
+        for name in (
+            "InvalidAmount",
+            "LawyerReport",
+            "LedgerDiff",
+            "LedgerRunState",
+            "LedgerSummary",
+            "SeparateLedgerResult",
+            "SeparateLedgerTable",
+        )
+    ),
+}
+
+# What unpickling a damaged file raises (a bad length or opcode argument can
+# surface as any of these, even MemoryError for a huge claimed size)
+_LOAD_ERRORS = (
+    OSError,
+    EOFError,
+    ValueError,
+    TypeError,
+    AttributeError,
+    OverflowError,
+    MemoryError,
+    pickle.UnpicklingError,
+)
+
+
+class _StateUnpickler(pickle.Unpickler):
+    """Refuses anything but the plain data classes a state file contains."""
+
+    def find_class(self, module: str, name: str):
+        if (module, name) not in _ALLOWED_GLOBALS:
+            raise pickle.UnpicklingError(f"Unexpected global {module}.{name}")
+        return getattr(array if module == "array" else separate_ledger, name)
+
+
+class PickleLedgerStateRepository(LedgerStateRepository):
+    """
+    Implementation of LedgerStateRepository as a sidecar file per report.
+    Arrays are pickled as raw bytes, so large states load quickly.
+    """
+
+    def load(self, output_path: str) -> Result[LedgerRunState | None, Exception]:
+        path = output_path + STATE_SUFFIX
+        if not os.path.exists(path):
+            return Result.success(None)
+        try:
+            with open(path, "rb") as f:
+                state = _StateUnpickler(f).load()
+        except _LOAD_ERRORS:
+            # Corrupt or foreign file: behave as if there was no previous run
+            return Result.success(None)
+        if not isinstance(state, LedgerRunState) or (
+            state.version != LedgerRunState().version
+        ):
+            return Result.success(None)
+        return Result.success(state)
+
+    def save(self, output_path: str, state: LedgerRunState) -> Result[None, Exception]:
+        path = output_path + STATE_SUFFIX
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            return Result.success(None)
+        except (OSError, pickle.PicklingError) as e:
+            return Result.failure(
+                InfrastructureError(f"Failed to save ledger state: {e}")
+            )
+
+    def delete(self, output_path: str) -> Result[None, Exception]:
+        try:
+            os.remove(output_path + STATE_SUFFIX)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            return Result.failure(
+                InfrastructureError(f"Failed to delete ledger state: {e}")
+            )
+        return Result.success(None)
@@ -1,7 +1,12 @@
-from application.ports.repositories import CodeReplacementRepository
+from application.ports.repositories import (
+    AsyncCodeReplacementRepository,
+    CodeReplacementRepository,
+)
 from domain.dto.code_replacement import CodeReplacement
+from domain.dto.page import PageQuery, PageResult
 from infrastructure.db.code_replacement import DbCodeReplacement
-from infrastructure.db.session import session_scope
+from infrastructure.db.paging import paginate
+from infrastructure.db.session import run_in_db_thread, session_scope
 
 
 class SQLACodeReplacementRepository(CodeReplacementRepository):
@@ -15,7 +20,29 @@ class SQLACodeReplacementRepository(CodeReplacementRepository):
                 for r in rows
             ]
 
-    def add(self, replacement: CodeReplacement) -> None:
+    def get_page(self, query: PageQuery) -> PageResult[CodeReplacement]:
+        with session_scope() as session:
+            rows, total = paginate(
+                session.query(DbCodeReplacement),
+                query,
+                search_column=DbCodeReplacement.source_code,
+                sortable={
+                    "id": DbCodeReplacement.id,
+                    "source_code": DbCodeReplacement.source_code,
+                },
+                default_sort="id",
+            )
+            return PageResult(
+                items=[
+                    CodeReplacement(
+                        id=r.id, source_code=r.source_code, target_codes=r.target_codes
+                    )
+                    for r in rows
+                ],
+                total=total,
+            )
+
+    def add(self, replacement: CodeReplacement) -> CodeReplacement:
         with session_scope() as session:
             # Check if source already exists? unique constraint handles it, but maybe check?
             # For simplicity, we trust VM handles validation or we catch integrity error.
@@ -24,6 +51,12 @@ class SQLACodeReplacementRepository(CodeReplacementRepository):
                 target_codes=replacement.target_codes,
             )
             session.add(db_obj)
+            session.flush()  # Assigns the autoincrement id
+            return CodeReplacement(
+                id=db_obj.id,
+                source_code=db_obj.source_code,
+                target_codes=db_obj.target_codes,
+            )
 
     def update(self, replacement: CodeReplacement) -> None:
         with session_scope() as session:
@@ -50,3 +83,65 @@ class SQLACodeReplacementRepository(CodeReplacementRepository):
                     id=r.id, source_code=r.source_code, target_codes=r.target_codes
                 )
             return None
+
+    def apply_batch(
+        self, upserts: list[CodeReplacement], delete_ids: list[int]
+    ) -> list[CodeReplacement]:
+        saved: list[CodeReplacement] = []
+        with session_scope() as session:
+            for id in delete_ids:
+                db_obj = session.get(DbCodeReplacement, id)
+                if db_obj:
+                    session.delete(db_obj)
+            # Flush deletes first so a re-added source_code doesn't trip UNIQUE
+            session.flush()
+
+            for item in upserts:
+                db_obj = session.get(DbCodeReplacement, item.id) if item.id else None
+                if db_obj:
+                    db_obj.source_code = item.source_code
+                    db_obj.target_codes = item.target_codes
+                else:
+                    db_obj = DbCodeReplacement(
+                        source_code=item.source_code, target_codes=item.target_codes
+                    )
+                    session.add(db_obj)
+                session.flush()
+                saved.append(
+                    CodeReplacement(
+                        id=db_obj.id,
+                        source_code=db_obj.source_code,
+                        target_codes=db_obj.target_codes,
+                    )
+                )
+        return saved
+
+
+class AsyncSQLACodeReplacementRepository(AsyncCodeReplacementRepository):
+    """Async CodeReplacementRepository that runs the SQLA repo on the DB thread."""
+
+    def __init__(self, repo: SQLACodeReplacementRepository | None = None):
+        self._repo = repo or SQLACodeReplacementRepository()
+
+    async def get_all(self) -> list[CodeReplacement]:
+        return await run_in_db_thread(self._repo.get_all)
+
+    async def get_page(self, query: PageQuery) -> PageResult[CodeReplacement]:
+        return await run_in_db_thread(self._repo.get_page, query)
+
+    async def add(self, replacement: CodeReplacement) -> CodeReplacement:
+        return await run_in_db_thread(self._repo.add, replacement)
+
+    async def update(self, replacement: CodeReplacement) -> None:
+        await run_in_db_thread(self._repo.update, replacement)
+
+    async def delete(self, id: int) -> None:
+        await run_in_db_thread(self._repo.delete, id)
+
+    async def get_by_source(self, source_code: str) -> CodeReplacement | None:
+        return await run_in_db_thread(self._repo.get_by_source, source_code)
+
+    async def apply_batch(
+        self, upserts: list[CodeReplacement], delete_ids: list[int]
+    ) -> list[CodeReplacement]:
+        return await run_in_db_thread(self._repo.apply_batch, upserts, delete_ids)
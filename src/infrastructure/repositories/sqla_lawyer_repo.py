@@ -1,7 +1,9 @@
-from application.ports.repositories import LawyerRepository
+from application.ports.repositories import AsyncLawyerRepository, LawyerRepository
 from domain.dto.lawyer import Lawyer
+from domain.dto.page import PageQuery, PageResult
 from infrastructure.db.lawyer import Lawyer as DbLawyer
-from infrastructure.db.session import session_scope
+from infrastructure.db.paging import paginate
+from infrastructure.db.session import run_in_db_thread, session_scope
 
 
 class SQLALawyerRepository(LawyerRepository):
@@ -13,16 +15,63 @@ class SQLALawyerRepository(LawyerRepository):
             db_lawyers = session.query(DbLawyer).order_by(DbLawyer.code).all()
             return [Lawyer(code=l.code) for l in db_lawyers]
 
-    def add(self, lawyer: Lawyer) -> None:
+    def get_page(self, query: PageQuery) -> PageResult[Lawyer]:
+        with session_scope() as session:
+            db_lawyers, total = paginate(
+                session.query(DbLawyer),
+                query,
+                search_column=DbLawyer.code,
+                sortable={"code": DbLawyer.code},
+                default_sort="code",
+            )
+            return PageResult(
+                items=[Lawyer(code=l.code) for l in db_lawyers], total=total
+            )
+
+    def get_existing_codes(self, codes: list[str]) -> set[str]:
+        if not codes:
+            return set()
+        with session_scope() as session:
+            rows = session.query(DbLawyer.code).filter(DbLawyer.code.in_(codes)).all()
+            return {r.code for r in rows}
+
+    def add(self, lawyer: Lawyer) -> bool:
         with session_scope() as session:
             if not session.get(DbLawyer, lawyer.code):
                 session.add(DbLawyer(code=lawyer.code))
+                return True
+            return False
 
-    def ensure_exists(self, codes: list[str]) -> None:
+    def ensure_exists(self, codes: list[str]) -> list[str]:
+        created: list[str] = []
         with session_scope() as session:
             for code in codes:
                 if not code or not code.strip():
                     continue
                 code = code.strip()
-                if session.get(DbLawyer, code) is None:
+                if code not in created and session.get(DbLawyer, code) is None:
                     session.add(DbLawyer(code=code))
+                    created.append(code)
+        return created
+
+
+class AsyncSQLALawyerRepository(AsyncLawyerRepository):
+    """Async LawyerRepository that runs SQLALawyerRepository on the DB thread."""
+
+    def __init__(self, repo: SQLALawyerRepository | None = None):
+        self._repo = repo or SQLALawyerRepository()
+
+    async def get_all(self) -> list[Lawyer]:
+        return await run_in_db_thread(self._repo.get_all)
+
+    async def get_page(self, query: PageQuery) -> PageResult[Lawyer]:
+        return await run_in_db_thread(self._repo.get_page, query)
+
+    async def get_existing_codes(self, codes: list[str]) -> set[str]:
+        return await run_in_db_thread(self._repo.get_existing_codes, codes)
+
+    async def add(self, lawyer: Lawyer) -> bool:
+        return await run_in_db_thread(self._repo.add, lawyer)
+
+    async def ensure_exists(self, codes: list[str]) -> list[str]:
+        return await run_in_db_thread(self._repo.ensure_exists, codes)
@@ -5,12 +5,23 @@ from pathlib import Path
 # Ensure 'app' (and root) is in python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from nicegui import ui
+# Before anything heavy is imported, so the trace sees every import
+from common import startup_trace
 
-from ui.routers.home import register_routes
+if startup_trace.enabled():
+    startup_trace.install()
 
 
 def run() -> None:
+    # Not at module level: spawned workers (report fan-out) re-import this
+    # module as __mp_main__ and should not pay for importing NiceGUI
+    from nicegui import app, ui
+
+    from ui.container import AppContainer
+    from ui.routers.home import register_routes
+
+    startup_trace.mark("imports done")
+
     # Fix for packaged GUI apps where stdout/stderr may be None (causes Uvicorn crash)
     # Briefcase does NOT set sys.frozen, so we check directly for None streams
     if sys.stdout is None or sys.stderr is None:
@@ -81,15 +92,35 @@ def run() -> None:
             # Fallback if logging fails
             pass
 
+    if startup_trace.enabled():
+        app.on_startup(lambda: startup_trace.mark("server started"))
+        # The first client connects once its page is rendered in the window
+        app.on_connect(startup_trace.report)
+
+    # Server mode: web UI for several users at once instead of a window
+    server_mode = "--server" in sys.argv[1:] or bool(os.getenv("SERVER_MODE"))
+
     # 1. Register Routes (and setup dependency graph)
-    register_routes()
+    register_routes(
+        AppContainer(max_jobs_per_client=int(os.getenv("MAX_JOBS_PER_CLIENT", "2")))
+    )
+    startup_trace.mark("routes registered")
 
     # Ensure clean exit on shutdown to prevent hanging processes (e.g. background threads)
-    from nicegui import app
-
     app.on_shutdown(lambda: os._exit(0))
 
     # 2. Run App
+    if server_mode:
+        ui.run(
+            title="Income Statement App (Clean Arch)",
+            host=os.getenv("SERVER_HOST", "0.0.0.0"),
+            port=int(os.getenv("SERVER_PORT", "8080")),
+            show=False,
+            reload=False,
+            favicon=resource_path("static/mom_accounting.ico"),
+        )
+        return
+
     ui.run(
         title="Income Statement App (Clean Arch)",
         native=True,
@@ -115,7 +146,10 @@ import multiprocessing
 if __name__ in {"__main__", "__mp_main__"}:
     # Required for PyInstaller on Windows when using multiprocessing (NiceGUI native uses it)
     multiprocessing.freeze_support()
-    try:
-        run()
-    except KeyboardInterrupt:
-        pass
+    # Spawned workers (native window, report fan-out) re-import this module
+    # as __mp_main__; only the main process starts the app.
+    if multiprocessing.current_process().name == "MainProcess":
+        try:
+            run()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,191 @@
+import hashlib
+import os
+import shutil
+import zipfile
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+
+from services.downloader import (
+    CHUNK_SIZE,
+    TIMEOUT,
+    HttpRangeFile,
+    probe,
+    sha256_file,
+)
+
+# Published next to each release zip as `<zip name>.manifest.json` (build.py)
+MANIFEST_SUFFIX = ".manifest.json"
+# Above this share of the release changed, the full zip is the cheaper fetch
+MAX_CHANGED_RATIO = 0.6
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    sha256: str
+    size: int
+
+
+@dataclass(frozen=True)
+class Manifest:
+    """
+    Files of a release, by path relative to the app folder (`root` in the
+    zip), e.g. {"_internal/python313.dll": ManifestEntry(...)}.
+    """
+
+    version: str
+    root: str
+    files: dict[str, ManifestEntry]
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Manifest":
+        """Raises ValueError for anything not shaped like build.py's output."""
+        try:
+            manifest = cls(
+                version=data.get("version", ""),
+                root=data["root"],
+                files={
+                    path: ManifestEntry(sha256=entry["sha256"], size=int(entry["size"]))
+                    for path, entry in data["files"].items()
+                },
+            )
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Malformed update manifest: {e!r}") from e
+        if not all(isinstance(name, str) for name in (manifest.root, *manifest.files)):
+            raise ValueError("Malformed update manifest: non-text path")
+        return manifest
+
+
+class DifferentialUpdater:
+    """
+    Stages a release from the installed copy plus only what changed:
+    installed files matching the manifest are hard-linked (or copied) into
+    the staging folder, and the others are read out of the release zip
+    with range requests, one member at a time, and checked against their
+    manifest hash.
+    """
+
+    def __init__(
+        self, session_factory: Callable[[], requests.Session] = requests.Session
+    ):
+        self._session_factory = session_factory
+
+    def stage(
+        self,
+        manifest_url: str,
+        zip_url: str,
+        installed_root: Path,
+        staging_dir: Path,
+        progress_callback: Callable[[float], None] | None = None,
+    ) -> Path | None:
+        """
+        Returns the staged app folder, or None when a full download is the
+        better choice (most files changed, or no range support).
+        """
+        with self._session_factory() as session:
+            response = session.get(manifest_url, timeout=TIMEOUT)
+            response.raise_for_status()
+            manifest = Manifest.from_json(response.json())
+
+            _check_paths(manifest, staging_dir)
+            unchanged, changed = plan(manifest, installed_root)
+            total = sum(entry.size for entry in manifest.files.values())
+            changed_bytes = sum(manifest.files[path].size for path in changed)
+            print(
+                f"Differential update: {len(changed)} of {len(manifest.files)} "
+                f"files changed ({changed_bytes} of {total} bytes)"
+            )
+            if total and changed_bytes / total > MAX_CHANGED_RATIO:
+                return None
+
+            zip_url, size, _ = probe(session, zip_url)
+            if size is None:
+                return None
+
+            app_dir = staging_dir / manifest.root
+            for path in unchanged:
+                _link_or_copy(installed_root / path, app_dir / path)
+
+            remote = HttpRangeFile(session, zip_url, size)
+            with zipfile.ZipFile(remote) as archive:
+                # In archive order, so neighbouring members share fetched blocks
+                members = sorted(
+                    (
+                        (archive.getinfo(f"{manifest.root}/{path}"), path)
+                        for path in changed
+                    ),
+                    key=lambda member: member[0].header_offset,
+                )
+                done = 0
+                for info, path in members:
+                    _extract_verified(
+                        archive, info, app_dir / path, manifest.files[path].sha256
+                    )
+                    done += manifest.files[path].size
+                    if progress_callback and changed_bytes:
+                        progress_callback(done / changed_bytes)
+            print(f"Differential update: fetched {remote.bytes_fetched} bytes")
+
+        if progress_callback:
+            progress_callback(1.0)
+        return app_dir
+
+
+def plan(manifest: Manifest, installed_root: Path) -> tuple[list[str], list[str]]:
+    """(paths already installed as released, paths to fetch)."""
+    unchanged, changed = [], []
+    for path, entry in manifest.files.items():
+        local = installed_root / path
+        try:
+            same = (
+                local.stat().st_size == entry.size
+                and sha256_file(local) == entry.sha256
+            )
+        except OSError:
+            same = False
+        (unchanged if same else changed).append(path)
+    return unchanged, changed
+
+
+def _check_paths(manifest: Manifest, staging_dir: Path) -> None:
+    """
+    The manifest is not checksummed, so its names are checked before any
+    is used: no absolute paths, drives, "." or ".." (which the streaming
+    extractor would drop; here they must still match the zip, so the
+    manifest is rejected), and nothing that resolves outside `staging_dir`.
+    """
+    base = staging_dir.resolve()
+    for name in (
+        manifest.root,
+        *(f"{manifest.root}/{path}" for path in manifest.files),
+    ):
+        parts = name.replace("\\", "/").split("/")
+        unsafe = any(
+            part in ("", ".", "..") or os.path.splitdrive(part)[0] for part in parts
+        )
+        if unsafe or not (base / name).resolve().is_relative_to(base):
+            raise ValueError(f"Unsafe path in update manifest: {name!r}")
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _extract_verified(
+    archive: zipfile.ZipFile, info: zipfile.ZipInfo, target: Path, sha256: str
+) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    # zipfile also checks the member CRC once it is fully read
+    with archive.open(info) as src, open(target, "wb") as dst:
+        while block := src.read(CHUNK_SIZE):
+            digest.update(block)
+            dst.write(block)
+    if digest.hexdigest() != sha256:
+        raise ValueError(f"SHA-256 mismatch for {info.filename}")
@@ -0,0 +1,359 @@
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+# Bytes per read from the response (larger reads keep fast links busy)
+CHUNK_SIZE = 1024 * 1024
+# Parallel range requests, and the smallest range worth its own request
+MAX_PARTS = 4
+MIN_PART_SIZE = 8 * 1024 * 1024
+# Progress of the ranges is saved this often (bytes per range)
+CHECKPOINT_EVERY = 4 * 1024 * 1024
+TIMEOUT = 30
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+class ResumableDownloader:
+    """
+    Downloads a file with parallel HTTP range requests.
+
+    The file is written to `<dest>.part`, with the progress of each range
+    in `<dest>.part.json`; an interrupted download resumes from there if
+    the server still reports the same size (and ETag). Servers without
+    range support get a single plain request (restarted from zero).
+
+    With `expected_sha256`, the file is hashed while it downloads, over the
+    contiguous prefix completed so far (which is also what a `consumer`
+    gets to see), and rejected on mismatch (the
+    partial file is discarded, so the next attempt starts clean).
+    """
+
+    def __init__(
+        self,
+        max_parts: int = MAX_PARTS,
+        chunk_size: int = CHUNK_SIZE,
+        session_factory: Callable[[], requests.Session] = requests.Session,
+    ):
+        self._max_parts = max_parts
+        self._chunk_size = chunk_size
+        self._session_factory = session_factory
+
+    def download(
+        self,
+        url: str,
+        dest: Path,
+        expected_sha256: str | None = None,
+        progress_callback: Callable[[float], None] | None = None,
+        consumer: Callable[[bytes], None] | None = None,
+    ) -> Path:
+        """
+        `consumer`, if given, receives the file's bytes in order while it
+        downloads (each byte once, also after a resume), e.g. to extract
+        it on the fly.
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part_path = dest.with_name(dest.name + ".part")
+        state_path = dest.with_name(dest.name + ".part.json")
+
+        if (
+            expected_sha256
+            and dest.exists()
+            and sha256_file(dest) == expected_sha256.lower()
+        ):
+            if consumer:
+                with open(dest, "rb") as f:
+                    while block := f.read(self._chunk_size):
+                        consumer(block)
+            if progress_callback:
+                progress_callback(1.0)
+            return dest  # Already downloaded
+
+        with self._session_factory() as session:
+            url, size, etag = probe(session, url)
+
+        if size is None:
+            sha = self._download_plain(url, part_path, progress_callback, consumer)
+        else:
+            state = _load_state(state_path, size, etag)
+            if state is None or not part_path.exists():
+                state = {
+                    "size": size,
+                    "etag": etag,
+                    "ranges": _split(size, self._max_parts),
+                }
+                with open(part_path, "wb") as f:
+                    f.truncate(size)
+                _save_state(state_path, state)
+            sha = self._download_ranges(
+                url, part_path, state_path, state, progress_callback, consumer
+            )
+
+        if expected_sha256 and sha != expected_sha256.lower():
+            part_path.unlink(missing_ok=True)
+            state_path.unlink(missing_ok=True)
+            raise ChecksumMismatch(
+                f"SHA-256 mismatch for {dest.name}: expected "
+                f"{expected_sha256}, got {sha}"
+            )
+
+        os.replace(part_path, dest)
+        state_path.unlink(missing_ok=True)
+        return dest
+
+    def _download_plain(
+        self,
+        url: str,
+        part_path: Path,
+        progress_callback: Callable[[float], None] | None,
+        consumer: Callable[[bytes], None] | None,
+    ) -> str:
+        digest = hashlib.sha256()
+        with (
+            self._session_factory() as session,
+            session.get(url, stream=True, timeout=TIMEOUT) as r,
+        ):
+            r.raise_for_status()
+            total = int(r.headers.get("content-length", 0))
+            done = 0
+            with open(part_path, "wb") as f:
+                for chunk in r.iter_content(chunk_size=self._chunk_size):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    if consumer:
+                        consumer(chunk)
+                    done += len(chunk)
+                    if progress_callback and total > 0:
+                        progress_callback(done / total)
+        return digest.hexdigest()
+
+    def _download_ranges(
+        self,
+        url: str,
+        part_path: Path,
+        state_path: Path,
+        state: dict,
+        progress_callback: Callable[[float], None] | None,
+        consumer: Callable[[bytes], None] | None,
+    ) -> str:
+        ranges = state["ranges"]  # [start, end (inclusive), bytes done]
+        size = state["size"]
+        lock = threading.Lock()
+        digest = hashlib.sha256()
+        hashed = 0
+
+        def fetch(index: int) -> None:
+            start, end, _ = ranges[index]
+            with self._session_factory() as session, open(part_path, "r+b") as f:
+                with lock:
+                    offset = start + ranges[index][2]
+                if offset > end:
+                    return
+                headers = {"Range": f"bytes={offset}-{end}"}
+                with session.get(
+                    url, headers=headers, stream=True, timeout=TIMEOUT
+                ) as r:
+                    r.raise_for_status()
+                    if r.status_code != 206:
+                        raise requests.HTTPError(
+                            f"Range request ignored (HTTP {r.status_code})"
+                        )
+                    f.seek(offset)
+                    unsaved = 0
+                    for chunk in r.iter_content(chunk_size=self._chunk_size):
+                        chunk = chunk[: end + 1 - offset]
+                        f.write(chunk)
+                        f.flush()  # Written before it is counted as done
+                        offset += len(chunk)
+                        unsaved += len(chunk)
+                        with lock:
+                            ranges[index][2] = offset - start
+                            if unsaved >= CHECKPOINT_EVERY:
+                                _save_state(state_path, state)
+                                unsaved = 0
+                        if offset > end:
+                            break
+                if offset <= end:
+                    raise requests.ConnectionError(
+                        f"Connection closed at byte {offset} of range {start}-{end}"
+                    )
+
+        def hash_prefix(f) -> None:
+            # Everything before the first unfinished byte is final
+            nonlocal hashed
+            with lock:
+                prefix = 0
+                for start, end, done in ranges:
+                    prefix = start + done
+                    if start + done <= end:
+                        break
+            f.seek(hashed)
+            while hashed < prefix:
+                block = f.read(min(self._chunk_size, prefix - hashed))
+                if not block:
+                    break
+                digest.update(block)
+                if consumer:
+                    consumer(block)
+                hashed += len(block)
+
+        with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [pool.submit(fetch, i) for i in range(len(ranges))]
+            # Unbuffered: a read-ahead would cache bytes not yet downloaded
+            with open(part_path, "rb", buffering=0) as f:
+                while not all(future.done() for future in futures):
+                    time.sleep(0.1)
+                    hash_prefix(f)
+                    if progress_callback:
+                        with lock:
+                            done = sum(r[2] for r in ranges)
+                        progress_callback(done / size if size else 1.0)
+                try:
+                    for future in futures:
+                        future.result()
+                finally:
+                    with lock:
+                        _save_state(state_path, state)
+                hash_prefix(f)
+        if progress_callback:
+            progress_callback(1.0)
+        return digest.hexdigest()
+
+
+def probe(session: requests.Session, url: str) -> tuple[str, int | None, str | None]:
+    """
+    (final URL after redirects, size if ranges are supported, ETag).
+    A one-byte GET instead of HEAD: signed asset URLs only allow GET.
+    """
+    with session.get(
+        url, headers={"Range": "bytes=0-0"}, stream=True, timeout=TIMEOUT
+    ) as r:
+        r.raise_for_status()
+        match = re.match(r"bytes 0-0/(\d+)", r.headers.get("Content-Range", ""))
+        if r.status_code != 206 or not match:
+            return r.url, None, None
+        return r.url, int(match.group(1)), r.headers.get("ETag")
+
+
+class HttpRangeFile(io.RawIOBase):
+    """
+    Read-only, seekable view of a remote file, read with range requests.
+    The file is cached in blocks of `block_size` (the most recent
+    `cached_blocks` of them); a read fetches all of its missing blocks in
+    one request. Lets zipfile read single members of a remote archive
+    without downloading all of it.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        url: str,
+        size: int,
+        block_size: int = 64 * 1024,
+        cached_blocks: int = 64,
+    ):
+        self._session = session
+        self._url = url
+        self._size = size
+        self._block_size = block_size
+        self._cached_blocks = cached_blocks
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._pos = 0
+        self.bytes_fetched = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}
+        self._pos = max(0, base[whence] + offset)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        length = min(len(view), self._size - self._pos)
+        if length <= 0:
+            return 0
+        first = self._pos // self._block_size
+        last = (self._pos + length - 1) // self._block_size
+        missing = []
+        for i in range(first, last + 1):
+            if i in self._blocks:
+                self._blocks.move_to_end(i)
+            else:
+                missing.append(i)
+        if missing:
+            self._fetch(missing[0], missing[-1])
+        data = b"".join(self._blocks[i] for i in range(first, last + 1))
+        skip = self._pos - first * self._block_size
+        view[:length] = data[skip : skip + length]
+        while len(self._blocks) > self._cached_blocks:
+            self._blocks.popitem(last=False)
+        self._pos += length
+        return length
+
+    def _fetch(self, first: int, last: int) -> None:
+        start = first * self._block_size
+        end = min((last + 1) * self._block_size, self._size) - 1
+        r = self._session.get(
+            self._url, headers={"Range": f"bytes={start}-{end}"}, timeout=TIMEOUT
+        )
+        r.raise_for_status()
+        if r.status_code != 206 or len(r.content) != end + 1 - start:
+            raise requests.HTTPError(f"Bad range response (HTTP {r.status_code})")
+        self.bytes_fetched += len(r.content)
+        for i in range(first, last + 1):
+            offset = (i - first) * self._block_size
+            self._blocks[i] = r.content[offset : offset + self._block_size]
+
+
+def _split(size: int, max_parts: int) -> list[list[int]]:
+    parts = max(1, min(max_parts, size // MIN_PART_SIZE))
+    step = -(-size // parts) if size else 0
+    ranges = []
+    for start in range(0, size, step or 1):
+        ranges.append([start, min(start + step, size) - 1, 0])
+    return ranges or [[0, -1, 0]]
+
+
+def _load_state(state_path: Path, size: int, etag: str | None) -> dict | None:
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if state.get("size") != size or state.get("etag") != etag:
+        return None  # A different file now: start over
+    return state
+
+
+def _save_state(state_path: Path, state: dict) -> None:
+    tmp_path = state_path.with_name(state_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp_path, state_path)
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(CHUNK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
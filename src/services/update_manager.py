@@ -1,10 +1,15 @@
+import asyncio
+import json
 import os
 import platform
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
+import time
 import zipfile
+import zlib
 from pathlib import Path
 
 
@@ -13,6 +18,9 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from common.version import __version__
+from services.differential_update import MANIFEST_SUFFIX, DifferentialUpdater
+from services.downloader import ResumableDownloader
+from services.zip_stream import StreamingZipExtractor, UnsupportedZip
 
 # Constants
 GITHUB_OWNER = "arfiligol"
@@ -20,6 +28,33 @@ GITHUB_REPO = "Income-Statement-App"
 GITHUB_API_URL = (
     f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/releases/latest"
 )
+# Kept between runs so an interrupted download can resume
+DOWNLOAD_DIR = Path(tempfile.gettempdir()) / "IncomeStatement_Updates"
+# Last release seen, with its ETag (see UpdateManager._fetch_release)
+RELEASE_CACHE_PATH = DOWNLOAD_DIR / "release.json"
+# GitHub is asked at most this often (seconds); the cache answers meanwhile
+CHECK_INTERVAL = 3600
+CHECK_TIMEOUT = 10
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """One session (and connection pool) with retries for all checks."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry_strategy = Retry(
+                total=2,
+                backoff_factor=1,
+                status_forcelist=[429, 500, 502, 503, 504],
+            )
+            adapter = HTTPAdapter(max_retries=retry_strategy)
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
 
 
 class UpdateManager:
@@ -27,27 +62,23 @@ class UpdateManager:
         self.current_version = __version__
         self.latest_version: str | None = None
         self.download_url: str | None = None
-
-    def check_for_update(self) -> tuple[bool, str | None]:
+        self.download_name: str | None = None
+        # SHA-256 of the asset, from the release (see _get_expected_sha256)
+        self.expected_sha256: str | None = None
+        # Published `<asset>.sha256`, read when downloading if needed
+        self.checksum_url: str | None = None
+        # File list of the release, for differential updates (see build.py)
+        self.manifest_url: str | None = None
+
+    def check_for_update(self, force: bool = False) -> tuple[bool, str | None]:
         """
         Check GitHub for the latest release.
         Returns: (has_update, latest_version_tag)
+        Within CHECK_INTERVAL of the last check the cached release is used
+        without asking GitHub (unless `force`).
         """
         try:
-            # Configure retry strategy
-            retry_strategy = Retry(
-                total=3,
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504],
-            )
-            adapter = HTTPAdapter(max_retries=retry_strategy)
-            session = requests.Session()
-            session.mount("https://", adapter)
-            session.mount("http://", adapter)
-
-            response = session.get(GITHUB_API_URL, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            data = self._fetch_release(force)
 
             tag_name = data.get("tag_name", "").strip().lstrip("v")
             assets = data.get("assets", [])
@@ -55,6 +86,23 @@ class UpdateManager:
             print(f"DEBUG: Available assets: {[a.get('name') for a in assets]}")
 
             self.download_url = self._get_asset_url(assets)
+            self.expected_sha256 = self._get_expected_sha256(assets)
+            self.checksum_url = next(
+                (
+                    a.get("browser_download_url")
+                    for a in assets
+                    if a.get("name") == f"{self.download_name}.sha256"
+                ),
+                None,
+            )
+            self.manifest_url = next(
+                (
+                    a.get("browser_download_url")
+                    for a in assets
+                    if a.get("name") == f"{self.download_name}{MANIFEST_SUFFIX}"
+                ),
+                None,
+            )
 
             if not tag_name or not self.download_url:
                 print("No valid release tag or asset found.")
@@ -80,9 +128,80 @@ class UpdateManager:
         for asset in assets:
             name = asset.get("name", "").lower()
             if target_os in name and name.endswith(".zip"):
+                self.download_name = asset.get("name")
                 return asset.get("browser_download_url")
         return None
 
+    def _fetch_release(self, force: bool) -> dict:
+        """
+        Latest release JSON, cached in RELEASE_CACHE_PATH with its ETag.
+        An expired cache is revalidated with If-None-Match: an unchanged
+        release costs a 304 without a body (and without using up GitHub's
+        rate limit). If GitHub is unreachable, the cached release is used.
+        """
+        try:
+            cache = json.loads(RELEASE_CACHE_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cache = None
+
+        if cache and not force and time.time() - cache["checked_at"] < CHECK_INTERVAL:
+            return cache["release"]
+
+        headers = {"Accept": "application/vnd.github+json"}
+        if cache and cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        try:
+            response = _get_session().get(
+                GITHUB_API_URL, headers=headers, timeout=CHECK_TIMEOUT
+            )
+            if response.status_code == 304 and cache:
+                release, etag = cache["release"], cache.get("etag")
+            else:
+                response.raise_for_status()
+                release, etag = response.json(), response.headers.get("ETag")
+        except (requests.RequestException, ValueError):  # ValueError: bad JSON
+            if cache:
+                print("Update check failed, using cached release info.")
+                return cache["release"]
+            raise
+
+        try:
+            RELEASE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = RELEASE_CACHE_PATH.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps(
+                    {"checked_at": time.time(), "etag": etag, "release": release}
+                ),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, RELEASE_CACHE_PATH)
+        except OSError as e:
+            print(f"Could not cache release info: {e}")
+        return release
+
+    def _get_expected_sha256(self, assets: list) -> str | None:
+        """
+        GitHub's own `digest` of the selected asset. Releases without one
+        publish `<asset>.sha256` instead (see checksum_url, build.py).
+        """
+        if not self.download_name:
+            return None
+        for asset in assets:
+            digest = asset.get("digest") or ""
+            if asset.get("name") == self.download_name and digest.startswith("sha256:"):
+                return digest.removeprefix("sha256:")
+        return None
+
+    def _fetch_checksum(self) -> str | None:
+        try:
+            response = _get_session().get(self.checksum_url, timeout=CHECK_TIMEOUT)
+            response.raise_for_status()
+            # "<hex>  <filename>" (sha256sum format) or just "<hex>"
+            return response.text.split()[0].lower()
+        except (requests.RequestException, IndexError) as e:  # IndexError: empty
+            print(f"Could not fetch checksum: {e}")
+            return None
+
     def download_and_install(self, progress_callback=None):
         """
         Download the update, extract, and run the swap script.
@@ -95,34 +214,42 @@ class UpdateManager:
 
         # 1. Download
         temp_dir = Path(tempfile.mkdtemp(prefix="IncomeStatement_Update_"))
-        zip_path = temp_dir / "update.zip"
+        extract_dir = temp_dir / "extracted"
 
-        print(f"Downloading to {zip_path}...")
         try:
-            with requests.get(self.download_url, stream=True) as r:
-                r.raise_for_status()
-                total_length = int(r.headers.get("content-length", 0))
-                print(f"DEBUG: Download size: {total_length} bytes")
-
-                downloaded = 0
-
-                with open(zip_path, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if progress_callback:
-                            if total_length > 0:
-                                progress_callback(downloaded / total_length)
-                            else:
-                                # Fallback if no length provided: indeterminate or fake progress
-                                # Just show something moving? Or keep at 0?
-                                pass
-
-            # 2. Extract
-            print("Extracting...")
-            extract_dir = temp_dir / "extracted"
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(extract_dir)
+            staged = None
+            if not is_dev and self.manifest_url:
+                staged = self._stage_differential(extract_dir, progress_callback)
+
+            if not staged:
+                # 2. Full download
+                if not self.expected_sha256 and self.checksum_url:
+                    self.expected_sha256 = self._fetch_checksum()
+                if not self.expected_sha256:
+                    # Fail closed: an unverified package is never installed
+                    raise ValueError(
+                        "No published checksum for the update, not installing it."
+                    )
+                zip_path = DOWNLOAD_DIR / (self.download_name or "update.zip")
+                print(f"Downloading to {zip_path}...")
+                self._clean_download_dir(keep=zip_path)
+                # Extracted while it downloads (members verified by CRC)
+                extractor = StreamingZipExtractor(extract_dir)
+                ResumableDownloader().download(
+                    self.download_url,
+                    zip_path,
+                    expected_sha256=self.expected_sha256,
+                    progress_callback=progress_callback,
+                    consumer=extractor.feed,
+                )
+                try:
+                    extractor.close()
+                    print(f"Extracted {extractor.members} entries while downloading")
+                except (UnsupportedZip, zipfile.BadZipFile, zlib.error, OSError) as e:
+                    print(f"Streaming extraction failed ({e}), extracting...")
+                    shutil.rmtree(extract_dir, ignore_errors=True)
+                    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+                        zip_ref.extractall(extract_dir)
 
             # Find the inner app folder
             new_app_path = self._find_app_root(extract_dir)
@@ -151,6 +278,45 @@ class UpdateManager:
             print(f"Update failed: {e}")
             raise e
 
+    def _stage_differential(
+        self, extract_dir: Path, progress_callback=None
+    ) -> Path | None:
+        """
+        Stages the update from the installed files plus the changed ones
+        only (see DifferentialUpdater). None means: download the full zip.
+        """
+        try:
+            return DifferentialUpdater().stage(
+                self.manifest_url,
+                self.download_url,
+                self._get_current_app_path(),
+                extract_dir,
+                progress_callback,
+            )
+        except (
+            requests.RequestException,
+            OSError,
+            ValueError,  # Bad manifest or member hash
+            KeyError,  # Manifest file missing from the zip
+            zipfile.BadZipFile,
+            zlib.error,
+            NotImplementedError,  # Compression zipfile cannot read
+        ) as e:
+            print(f"Differential update failed, downloading full package: {e}")
+            shutil.rmtree(extract_dir, ignore_errors=True)
+            return None
+
+    def _clean_download_dir(self, keep: Path):
+        """Removes downloads of other releases (a partial `keep` stays)."""
+        if not DOWNLOAD_DIR.is_dir():
+            return
+        for item in DOWNLOAD_DIR.iterdir():
+            if item != RELEASE_CACHE_PATH and not item.name.startswith(keep.name):
+                try:
+                    item.unlink()
+                except OSError:
+                    pass
+
     def _find_app_root(self, extract_dir: Path) -> Path | None:
         """Find the executable folder (Windows) or .app (macOS) in extracted files."""
         # Simple heuristic: Look for folder matching APP_NAME
@@ -268,3 +434,32 @@ open "$CURRENT"
 
         subprocess.Popen(["/bin/bash", str(script_path)])
         os._exit(0)
+
+
+class UpdateChecker:
+    """
+    Process-wide release check that never blocks the UI: start() runs
+    check_for_update on a worker thread (call it at startup), and every
+    page awaits the same result instead of checking on its own. After
+    CHECK_INTERVAL a new request to result() starts a fresh check, which
+    the release cache usually answers with a 304.
+    """
+
+    def __init__(self, manager: UpdateManager | None = None):
+        self.manager = manager or UpdateManager()
+        self._task: asyncio.Task | None = None
+        self._started_at = 0.0
+
+    def start(self) -> asyncio.Task:
+        """Starts a check unless one is running or finished recently."""
+        stale = time.monotonic() - self._started_at >= CHECK_INTERVAL
+        if self._task is None or (self._task.done() and stale):
+            self._started_at = time.monotonic()
+            self._task = asyncio.create_task(
+                asyncio.to_thread(self.manager.check_for_update)
+            )
+        return self._task
+
+    async def result(self) -> tuple[bool, str | None]:
+        # Shielded: a page closing must not cancel the shared check
+        return await asyncio.shield(self.start())
@@ -0,0 +1,186 @@
+import os
+import struct
+import zipfile
+import zlib
+from pathlib import Path
+
+# Local file header, see the ZIP spec (APPNOTE.TXT 4.3.7)
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_LOCAL_SIGNATURE = b"PK\x03\x04"
+# Where the members end: central directory (or end record of an empty zip)
+_END_SIGNATURES = (b"PK\x01\x02", b"PK\x05\x06")
+# Output per decompression step, so a highly compressed member stays bounded
+_MAX_OUTPUT = 1024 * 1024
+
+
+class UnsupportedZip(Exception):
+    pass
+
+
+class StreamingZipExtractor:
+    """
+    Extracts a zip archive from its bytes in order, as they arrive: feed()
+    what was downloaded so far, close() after the last byte. Members are
+    inflated straight to `target_dir` and checked against their CRC-32 and
+    size as they complete; memory use stays at about one fed block.
+
+    Reads the local headers only, so it needs archives whose headers carry
+    the sizes (as zipfile writes them to a regular file, see build.py).
+    Anything else (data descriptors, ZIP64, encryption) or a corrupt
+    member stops the extraction: feed() never raises, the problem is kept
+    in `error` and raised by close(), and the caller can fall back to
+    zipfile on the downloaded archive.
+    """
+
+    def __init__(self, target_dir: Path):
+        self._target_dir = Path(target_dir)
+        self._buffer = bytearray()
+        self._member = None  # _Member being extracted
+        self._finished = False
+        self.error: Exception | None = None
+        self.members = 0
+
+    def feed(self, data: bytes) -> None:
+        if self.error is not None or self._finished:
+            return
+        self._buffer += data
+        try:
+            with memoryview(self._buffer) as view:
+                consumed = self._process(view)
+        except (UnsupportedZip, zipfile.BadZipFile, zlib.error, OSError) as e:
+            self.error = e
+            self._abort()
+            return
+        # What is left is at most an incomplete header
+        del self._buffer[:consumed]
+
+    def close(self) -> None:
+        """Raises unless the whole archive was extracted and verified."""
+        if self.error is None and not self._finished:
+            self.error = UnsupportedZip("Archive ended before its central directory")
+            self._abort()
+        if self.error is not None:
+            raise self.error
+
+    def _process(self, view: memoryview) -> int:
+        pos = 0
+        while not self._finished:
+            if self._member is None:
+                header_end = self._read_header(view, pos)
+                if header_end is None:
+                    break  # Header not complete yet
+                pos = header_end
+            else:
+                take = min(self._member.remaining, len(view) - pos)
+                if take == 0 and self._member.remaining:
+                    break
+                self._member.write(view[pos : pos + take])
+                pos += take
+                if self._member.remaining == 0:
+                    self._member.finish()
+                    self._member = None
+                    self.members += 1
+        return pos
+
+    def _read_header(self, view: memoryview, pos: int) -> int | None:
+        if len(view) - pos < 4:
+            return None
+        signature = bytes(view[pos : pos + 4])
+        if signature in _END_SIGNATURES:
+            self._finished = True
+            return pos
+        if signature != _LOCAL_SIGNATURE:
+            raise zipfile.BadZipFile(f"Unexpected data after member {self.members}")
+        if len(view) - pos < _LOCAL_HEADER.size:
+            return None
+        (_, _, flags, method, _, _, crc, csize, usize, name_len, extra_len) = (
+            _LOCAL_HEADER.unpack_from(view, pos)
+        )
+        end = pos + _LOCAL_HEADER.size + name_len + extra_len
+        if len(view) < end:
+            return None
+
+        raw_name = bytes(view[pos + _LOCAL_HEADER.size : end - extra_len])
+        try:
+            name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+        except UnicodeDecodeError as e:
+            raise zipfile.BadZipFile(f"Bad name after member {self.members}") from e
+        if flags & 0x1:
+            raise UnsupportedZip(f"{name}: encrypted")
+        if flags & 0x8 or 0xFFFFFFFF in (csize, usize):
+            raise UnsupportedZip(f"{name}: sizes not in the local header")
+        if method not in (0, 8):
+            raise UnsupportedZip(f"{name}: compression method {method}")
+
+        target = self._target_path(name)
+        if name.endswith("/"):
+            target.mkdir(parents=True, exist_ok=True)
+            if csize:
+                raise UnsupportedZip(f"{name}: directory with data")
+            self.members += 1
+        else:
+            self._member = _Member(name, target, method, crc, csize, usize)
+            if csize == 0:
+                self._member.finish()
+                self._member = None
+                self.members += 1
+        return end
+
+    def _target_path(self, name: str) -> Path:
+        # Same rules as zipfile: no absolute paths, drives or "..", ever
+        parts = [
+            part
+            for part in name.replace("\\", "/").split("/")
+            if part not in ("", ".", "..")
+        ]
+        if parts:
+            parts[0] = os.path.splitdrive(parts[0])[1] or "_"
+        return self._target_dir.joinpath(*parts)
+
+    def _abort(self) -> None:
+        if self._member is not None:
+            self._member.close()
+            self._member = None
+
+
+class _Member:
+    def __init__(
+        self, name: str, target: Path, method: int, crc: int, csize: int, usize: int
+    ):
+        self.name = name
+        self.remaining = csize
+        self._crc = crc
+        self._usize = usize
+        self._actual_crc = 0
+        self._actual_size = 0
+        self._inflater = zlib.decompressobj(-15) if method == 8 else None
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Open across feed() calls; finish() or close() (on abort) closes it
+        self._file = open(target, "wb")  # noqa: SIM115
+
+    def write(self, data: memoryview) -> None:
+        self.remaining -= len(data)
+        if self._inflater is None:
+            self._output(data)
+            return
+        chunk = bytes(data)
+        while chunk:
+            self._output(self._inflater.decompress(chunk, _MAX_OUTPUT))
+            chunk = self._inflater.unconsumed_tail
+
+    def finish(self) -> None:
+        try:
+            if self._inflater is not None:
+                self._output(self._inflater.flush())
+        finally:
+            self.close()
+        if self._actual_crc != self._crc or self._actual_size != self._usize:
+            raise zipfile.BadZipFile(f"Bad CRC-32 or size for {self.name}")
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _output(self, data) -> None:
+        self._actual_crc = zlib.crc32(data, self._actual_crc)
+        self._actual_size += len(data)
+        self._file.write(data)
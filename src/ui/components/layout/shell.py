@@ -1,22 +1,21 @@
-import time
 from pathlib import Path
 from typing import Callable
 
-from nicegui import run, ui
+from nicegui import ui
 
-from services.update_manager import UpdateManager
+from services.update_manager import UpdateChecker
 from ui.components.dialogs.update_dialog import UpdateDialog
 from ui.state.app_store import AppStore
 
 _styles_loaded = False
-_last_check_time = 0.0
-_cached_update_info = (False, None, None)
 
 
-def app_shell(content_builder: Callable):
+def app_shell(content_builder: Callable, update_checker: UpdateChecker | None = None):
     """
     Main App Shell Layout.
     Provides Header, Sidebar, and Content Area.
+    With `update_checker`, the header offers an upgrade once its
+    background release check finds a newer version.
     """
     store = AppStore()
 
@@ -34,27 +33,15 @@ def app_shell(content_builder: Callable):
         )
 
     async def check_updates():
-        global _last_check_time, _cached_update_info
-
-        # Cache for 1 hour to prevent API rate limits
-        if time.time() - _last_check_time < 3600:
-            exists, ver, url = _cached_update_info
-        else:
-            mgr = UpdateManager()
-            exists, ver = await run.io_bound(mgr.check_for_update)
-            url = mgr.download_url
-            _last_check_time = time.time()
-            _cached_update_info = (exists, ver, url)
+        exists, ver = await update_checker.result()
 
         if exists and ver:
             update_btn.classes(remove="hidden")
             update_btn.tooltip(f"New version {ver} available")
 
             def start_update():
-                # Re-create manager with cached URL
-                m = UpdateManager()
-                m.download_url = url
-                UpdateDialog(m, ver).open()
+                # The checked manager knows the asset, checksum and manifest
+                UpdateDialog(update_checker.manager, ver).open()
 
             # Re-bind click to include version
             update_btn.on_click(start_update)
@@ -85,15 +72,9 @@ def app_shell(content_builder: Callable):
             .classes("mr-4 hidden font-bold")
         )
 
-        # Use a background task for update check that doesn't block shutdown
-        # Triggered once after startup. Using timer is fine if we handle exceptions or use run.io_bound correctly.
-        # But 'run.io_bound' keeps a thread pool.
-        # Let's try explicitly handling it or just re-enable it now that Ctrl+C is cleaner?
-        # User said "Window close -> delayed but clean" BUT "Ctrl+C -> error".
-        # We fixed Ctrl+C error.
-        # The delay might be unavoidable if requests is waiting.
-        # Let's uncomment it but maybe increase delay to ensure UI loads first?
-        ui.timer(2.0, check_updates, once=True)
+        # Waits for the shared background check (started with the app)
+        if update_checker is not None:
+            ui.timer(0.1, check_updates, once=True)
 
         # Dark Mode Toggle
         # Note: ui.dark_mode toggles Quasar's body--dark. We also need Tailwind's 'dark' class.
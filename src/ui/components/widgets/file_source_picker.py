@@ -1,4 +1,5 @@
 import asyncio
+from collections.abc import AsyncIterator, Awaitable
 from typing import Callable
 
 
@@ -18,11 +19,16 @@ class FileSourcePicker(ui.element):
         self,
         on_file_selected: Callable[[FileSource], None],
         is_native: bool | None = None,
+        on_file_uploaded: Callable[[str, AsyncIterator[bytes]], Awaitable[None]]
+        | None = None,
     ):
         super().__init__("div")
         from nicegui import app
 
         self.on_file_selected = on_file_selected
+        # Web mode: receives (filename, chunks) to store the upload itself;
+        # without it the upload is copied to a temp file
+        self.on_file_uploaded = on_file_uploaded
         if is_native is None:
             import sys
 
@@ -71,17 +77,20 @@ class FileSourcePicker(ui.element):
             "click", lambda: self.upload.run_method("pickFiles")
         )
 
-    def _handle_web_upload(self, e: events.UploadEventArguments):
-        import shutil
-        import tempfile
-
+    async def _handle_web_upload(self, e: events.UploadEventArguments):
         upload = e.file
-        filename = upload.filename or "upload.xlsx"
-        upload.file.seek(0)
+        filename = upload.name or "upload.xlsx"
+
+        if self.on_file_uploaded:
+            # Streamed in chunks, never held in memory as a whole
+            await self.on_file_uploaded(filename, upload.iterate())
+            return
+
+        import tempfile
 
         with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
-            shutil.copyfileobj(upload.file, tmp)
             temp_path = tmp.name
+        await upload.save(temp_path)
 
         source = FileSource(path=temp_path, filename=filename)
         self._emit_file_selected(source)
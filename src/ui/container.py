@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+from collections.abc import Callable
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from nicegui import Client
+
+if TYPE_CHECKING:
+    from application.services.knowledge_base import KnowledgeBaseService
+    from application.use_cases.import_excel import ImportExcelUseCase
+    from application.use_cases.separate_ledger import SeparateLedgerUseCase
+    from infrastructure.engines.pandas_ledger_engine import PandasLedgerSplitEngine
+    from infrastructure.repositories.content_addressed_upload_store import (
+        ContentAddressedUploadStore,
+    )
+    from infrastructure.repositories.excel_pandas_repo import ExcelPandasRepository
+    from infrastructure.repositories.sqla_code_replacement_repo import (
+        AsyncSQLACodeReplacementRepository,
+    )
+    from infrastructure.repositories.sqla_lawyer_repo import (
+        AsyncSQLALawyerRepository,
+        SQLALawyerRepository,
+    )
+    from services.update_manager import UpdateChecker
+    from ui.viewmodels.database_vm import DatabaseViewModel
+    from ui.viewmodels.job_manager import LockRegistry
+    from ui.viewmodels.statement_vm import StatementViewModel
+
+logger = logging.getLogger(__name__)
+
+# Modules behind the container, heaviest dependencies first (pandas,
+# openpyxl, SQLAlchemy); see AppContainer.prewarm().
+PREWARM_MODULES = (
+    "infrastructure.engines.pandas_ledger_engine",
+    "infrastructure.repositories.excel_pandas_repo",
+    "infrastructure.gateways.excel_report_gateway",
+    "infrastructure.gateways.csv_report_gateway",
+    "infrastructure.gateways.parquet_report_gateway",
+    "infrastructure.repositories.sqla_lawyer_repo",
+    "infrastructure.repositories.sqla_code_replacement_repo",
+    "infrastructure.repositories.pickle_ledger_state_repo",
+    "infrastructure.repositories.content_addressed_upload_store",
+    "ui.viewmodels.statement_vm",
+    "ui.viewmodels.database_vm",
+)
+
+T = TypeVar("T")
+
+
+class AppContainer:
+    """
+    Process-wide Composition Root.
+    Stateless infrastructure and use cases are lazy singletons: built on
+    first use, then shared by every page and client, so whatever they cache
+    survives navigation. Objects bound to one browser client (dialogs,
+    ViewModels) are scoped: built once per client, reused when the client
+    navigates between sub-pages, and released when it disconnects.
+    Clients share the lawyer/replacement knowledge base (one read-only
+    snapshot) and the workbook locks of their jobs; each client runs at
+    most `max_jobs_per_client` jobs at a time.
+    Infrastructure modules (and with them pandas, openpyxl and SQLAlchemy)
+    are imported on first use, not when the app starts.
+    Meant to be used from NiceGUI's event loop (page handlers).
+    """
+
+    def __init__(self, max_jobs_per_client: int = 2):
+        self._max_jobs_per_client = max_jobs_per_client
+        # client id -> {key: instance}
+        self._scopes: dict[str, dict[str, Any]] = {}
+        self._prewarm_started = False
+
+    def prewarm(self) -> None:
+        """
+        Imports the deferred modules on a background thread (once), so the
+        first step the user runs does not pay for them. Call it after the
+        first page is shown.
+        """
+        if self._prewarm_started:
+            return
+        self._prewarm_started = True
+        threading.Thread(
+            target=_import_all, args=(PREWARM_MODULES,), name="prewarm", daemon=True
+        ).start()
+
+    # --- Singletons: Infrastructure ---
+
+    @cached_property
+    def excel_repo(self) -> ExcelPandasRepository:
+        from infrastructure.repositories.excel_pandas_repo import (
+            ExcelPandasRepository,
+        )
+
+        return ExcelPandasRepository()
+
+    @cached_property
+    def lawyer_repo(self) -> SQLALawyerRepository:
+        from infrastructure.repositories.sqla_lawyer_repo import SQLALawyerRepository
+
+        return SQLALawyerRepository()
+
+    @cached_property
+    def async_lawyer_repo(self) -> AsyncSQLALawyerRepository:
+        from infrastructure.repositories.sqla_lawyer_repo import (
+            AsyncSQLALawyerRepository,
+        )
+
+        return AsyncSQLALawyerRepository(self.lawyer_repo)
+
+    @cached_property
+    def replacement_repo(self) -> AsyncSQLACodeReplacementRepository:
+        from infrastructure.repositories.sqla_code_replacement_repo import (
+            AsyncSQLACodeReplacementRepository,
+        )
+
+        return AsyncSQLACodeReplacementRepository()
+
+    @cached_property
+    def upload_store(self) -> ContentAddressedUploadStore:
+        from infrastructure.repositories.content_addressed_upload_store import (
+            ContentAddressedUploadStore,
+        )
+
+        return ContentAddressedUploadStore.from_env()
+
+    @cached_property
+    def split_engine(self) -> PandasLedgerSplitEngine:
+        from infrastructure.engines.pandas_ledger_engine import (
+            PandasLedgerSplitEngine,
+        )
+
+        return PandasLedgerSplitEngine()
+
+    @cached_property
+    def update_checker(self) -> UpdateChecker:
+        from services.update_manager import UpdateChecker
+
+        return UpdateChecker()
+
+    # --- Singletons: Application ---
+
+    @cached_property
+    def knowledge_base(self) -> KnowledgeBaseService:
+        from application.services.knowledge_base import KnowledgeBaseService
+
+        return KnowledgeBaseService(self.async_lawyer_repo, self.replacement_repo)
+
+    @cached_property
+    def job_locks(self) -> LockRegistry:
+        from ui.viewmodels.job_manager import LockRegistry
+
+        return LockRegistry()
+
+    @cached_property
+    def import_use_case(self) -> ImportExcelUseCase:
+        from application.use_cases.import_excel import ImportExcelUseCase
+
+        return ImportExcelUseCase(self.excel_repo)
+
+    @cached_property
+    def separate_ledger_use_case(self) -> SeparateLedgerUseCase:
+        from application.use_cases.separate_ledger import SeparateLedgerUseCase
+        from infrastructure.gateways.csv_report_gateway import CsvReportGateway
+        from infrastructure.gateways.excel_report_gateway import ExcelReportGateway
+        from infrastructure.gateways.parquet_report_gateway import (
+            ParquetReportGateway,
+        )
+        from infrastructure.repositories.pickle_ledger_state_repo import (
+            PickleLedgerStateRepository,
+        )
+
+        return SeparateLedgerUseCase(
+            self.excel_repo,
+            self.lawyer_repo,
+            ExcelReportGateway(),
+            self.split_engine,
+            report_gateways={
+                "csv": CsvReportGateway(),
+                "parquet": ParquetReportGateway(),
+            },
+            state_repo=PickleLedgerStateRepository(),
+        )
+
+    # --- Scoped: per client ---
+
+    def statement_vm(self, client: Client) -> StatementViewModel:
+        from application.use_cases.auto_fill import AutoFillUseCase
+        from application.use_cases.fill_and_split import FillAndSplitUseCase
+        from infrastructure.gateways.nicegui_interaction import (
+            NiceGUIInteractionGateway,
+        )
+        from infrastructure.gateways.nicegui_progress import NiceGUIProgressGateway
+        from ui.viewmodels.statement_vm import StatementViewModel
+
+        def build() -> StatementViewModel:
+            # Auto-fill asks the user through this client's dialogs
+            auto_fill = AutoFillUseCase(
+                self.excel_repo,
+                self.knowledge_base,
+                NiceGUIInteractionGateway(client),
+            )
+            return StatementViewModel(
+                self.import_use_case,
+                auto_fill,
+                self.separate_ledger_use_case,
+                FillAndSplitUseCase(
+                    self.excel_repo, auto_fill, self.separate_ledger_use_case
+                ),
+                max_concurrent_jobs=self._max_jobs_per_client,
+                progress_factory=NiceGUIProgressGateway,
+                upload_store=self.upload_store,
+                locks=self.job_locks,
+            )
+
+        return self._scoped(client, "statement_vm", build)
+
+    def database_vm(self, client: Client) -> DatabaseViewModel:
+        from ui.viewmodels.database_vm import DatabaseViewModel
+
+        return self._scoped(
+            client,
+            "database_vm",
+            # Writes go through the knowledge base, which then reloads
+            lambda: DatabaseViewModel(
+                self.knowledge_base.lawyers, self.knowledge_base.replacements
+            ),
+        )
+
+    def _scoped(self, client: Client, key: str, factory: Callable[[], T]) -> T:
+        scope = self._scopes.get(client.id)
+        if scope is None:
+            scope = self._scopes[client.id] = {}
+            client.on_delete(lambda: self._scopes.pop(client.id, None))
+        if key not in scope:
+            scope[key] = factory()
+        return scope[key]
+
+
+def _import_all(modules: tuple[str, ...]) -> None:
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # Not fatal: the import is retried (and reported) on first use
+            logger.exception(f"Prewarm failed for {name}")
@@ -1,7 +1,9 @@
-from nicegui import ui
+from nicegui import background_tasks, events, ui
 from nicegui.functions import notify as notify_fn
 
+from domain.dto.page import PageQuery
 from ui.components.layout.shell import app_shell
+from ui.viewmodels.base import Subscription
 from ui.viewmodels.database_vm import DatabaseViewModel
 
 
@@ -18,21 +20,38 @@ class DatabasePage:
         self.input_source = None
         self.input_targets = None
         self._client = None
+        self._subscriptions: list[Subscription] = []
 
     def render(self):
         app_shell(self._render_content)
         # Load initial data
-        self.vm.load_data()
+        background_tasks.create(self.vm.load_data())
 
     def render_content(self):
         self._render_content()
-        self.vm.load_data()
+        background_tasks.create(self.vm.load_data())
 
     def _render_content(self):
         self._client = ui.context.client
 
-        self.vm.on_effect(self._handle_effect)
-        self.vm.add_listener(self._on_state_change)
+        # Replaces the subscriptions of a previous render; all are dropped
+        # when the client goes away
+        for sub in self._subscriptions:
+            sub.dispose()
+        self._subscriptions = [
+            sub.dispose_with(self._client)
+            for sub in (
+                self.vm.on_effect(self._handle_effect),
+                self.vm.add_listener(
+                    self._on_lawyers_change,
+                    fields=("lawyers", "lawyer_query", "lawyer_total"),
+                ),
+                self.vm.add_listener(
+                    self._on_replacements_change,
+                    fields=("replacements", "replacement_query", "replacement_total"),
+                ),
+            )
+        ]
 
         # Header
         with ui.row().classes("w-full items-end justify-between mb-6"):
@@ -64,8 +83,14 @@ class DatabasePage:
                     with ui.row().classes("w-full items-center justify-between mb-4"):
                         ui.label("所有律師代碼").classes("text-lg font-bold")
                         with ui.row().classes("items-center gap-2"):
+                            ui.input(
+                                placeholder="搜尋代碼",
+                                on_change=lambda e: self.vm.search_lawyers(e.value),
+                            ).props("dense outlined clearable debounce=300").classes(
+                                "w-40"
+                            )
                             self.input_code = (
-                                ui.input(placeholder="新代碼")
+                                ui.input(placeholder="新代碼 (可用逗號批次)")
                                 .props("dense outlined")
                                 .classes("w-40")
                             )
@@ -79,18 +104,42 @@ class DatabasePage:
                             "label": "律師代碼",
                             "field": "code",
                             "align": "left",
+                            "sortable": True,
                         },
                     ]
+                    # Server-side mode: rowsNumber makes Quasar emit @request
+                    # instead of paging/sorting the rows itself.
                     self.table_lawyers = (
-                        ui.table(columns=cols, rows=[], pagination=10)
+                        ui.table(
+                            columns=cols,
+                            rows=[],
+                            row_key="code",
+                            pagination=self._to_pagination(
+                                self.vm.state.lawyer_query, 0
+                            ),
+                        )
                         .classes("w-full")
                         .props("flat")
                     )
+                    self.table_lawyers.on(
+                        "request", self._on_lawyers_request, ["pagination"]
+                    )
 
                 # Tab 2: Replacements
                 with ui.tab_panel(tab_replacements).classes("p-0"):
                     with ui.column().classes("w-full gap-4"):
-                        ui.label("自動替換規則 (Step 2)").classes("text-lg font-bold")
+                        with ui.row().classes("w-full items-center justify-between"):
+                            ui.label("自動替換規則 (Step 2)").classes(
+                                "text-lg font-bold"
+                            )
+                            ui.input(
+                                placeholder="搜尋來源代碼",
+                                on_change=lambda e: self.vm.search_replacements(
+                                    e.value
+                                ),
+                            ).props("dense outlined clearable debounce=300").classes(
+                                "w-40"
+                            )
                         with ui.row().classes("w-full items-center gap-2"):
                             self.input_source = (
                                 ui.input(placeholder="來源代碼 (如 KW)")
@@ -108,6 +157,11 @@ class DatabasePage:
                             ).classes("app-btn-primary rounded-lg shadow-sm").props(
                                 "unelevated no-caps"
                             )
+                            ui.button(
+                                "刪除所選",
+                                icon="delete_sweep",
+                                on_click=self._on_delete_selected_click,
+                            ).props("flat no-caps color=negative")
 
                         cols_rep = [
                             {
@@ -138,10 +192,21 @@ class DatabasePage:
                             },
                         ]
                         self.table_replacements = (
-                            ui.table(columns=cols_rep, rows=[], pagination=10)
+                            ui.table(
+                                columns=cols_rep,
+                                rows=[],
+                                row_key="id",
+                                selection="multiple",
+                                pagination=self._to_pagination(
+                                    self.vm.state.replacement_query, 0
+                                ),
+                            )
                             .classes("w-full")
                             .props("flat")
                         )
+                        self.table_replacements.on(
+                            "request", self._on_replacements_request, ["pagination"]
+                        )
                         # Add Action Slots
                         self.table_replacements.add_slot(
                             "body-cell-actions",
@@ -158,22 +223,71 @@ class DatabasePage:
                             lambda e: self.vm.delete_replacement(e.args["id"]),
                         )
 
-    def _on_add_click(self):
+    async def _on_add_click(self):
         if self.input_code:
-            self.vm.add_lawyer(self.input_code.value)
+            text = self.input_code.value or ""
             self.input_code.value = ""
+            codes = [c.strip() for c in text.replace("，", ",").split(",")]
+            codes = [c for c in codes if c]
+            if len(codes) > 1:
+                await self.vm.add_lawyers(codes)
+            else:
+                await self.vm.add_lawyer(text)
 
-    def _on_add_replacement_click(self):
+    async def _on_delete_selected_click(self):
+        if self.table_replacements and self.table_replacements.selected:
+            ids = [row["id"] for row in self.table_replacements.selected]
+            self.table_replacements.selected = []
+            await self.vm.delete_replacements(ids)
+
+    async def _on_add_replacement_click(self):
         if self.input_source and self.input_targets:
-            self.vm.add_replacement(self.input_source.value, self.input_targets.value)
+            source, targets = self.input_source.value, self.input_targets.value
             self.input_source.value = ""
             self.input_targets.value = ""
+            await self.vm.add_replacement(source, targets)
+
+    @staticmethod
+    def _to_pagination(query: PageQuery, total: int) -> dict:
+        return {
+            "page": query.page,
+            "rowsPerPage": query.rows_per_page,
+            "sortBy": query.sort_by,
+            "descending": query.descending,
+            "rowsNumber": total,
+        }
+
+    @staticmethod
+    def _from_pagination(pagination: dict, search: str) -> PageQuery:
+        return PageQuery(
+            page=pagination.get("page", 1),
+            rows_per_page=pagination.get("rowsPerPage", 10),
+            sort_by=pagination.get("sortBy"),
+            descending=bool(pagination.get("descending", False)),
+            search=search,
+        )
+
+    async def _on_lawyers_request(self, e: events.GenericEventArguments):
+        query = self._from_pagination(
+            e.args["pagination"], self.vm.state.lawyer_query.search
+        )
+        await self.vm.load_lawyers(query)
+
+    async def _on_replacements_request(self, e: events.GenericEventArguments):
+        query = self._from_pagination(
+            e.args["pagination"], self.vm.state.replacement_query.search
+        )
+        await self.vm.load_replacements(query)
 
-    def _on_state_change(self, state):
+    def _on_lawyers_change(self, state):
         if self.table_lawyers:
             self.table_lawyers.rows = [{"code": l.code} for l in state.lawyers]
+            self.table_lawyers.pagination = self._to_pagination(
+                state.lawyer_query, state.lawyer_total
+            )
             self.table_lawyers.update()
 
+    def _on_replacements_change(self, state):
         if self.table_replacements:
             self.table_replacements.rows = [
                 {
@@ -183,11 +297,14 @@ class DatabasePage:
                 }
                 for r in state.replacements
             ]
+            self.table_replacements.pagination = self._to_pagination(
+                state.replacement_query, state.replacement_total
+            )
             self.table_replacements.update()
 
     async def _on_confirm_create(self, dialog, payload):
         dialog.close()
-        self.vm.confirm_add_replacement_with_new_lawyers(
+        await self.vm.confirm_add_replacement_with_new_lawyers(
             payload["source"], payload["targets"], payload["missing"]
         )
 
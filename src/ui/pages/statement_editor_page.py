@@ -1,10 +1,52 @@
-from nicegui import ui
+import importlib.util
+
+from nicegui import events, ui
 from nicegui.functions import notify as notify_fn
 
+from domain.dto.page import PageQuery
 from ui.components.layout.shell import app_shell
 from ui.components.widgets.file_source_picker import FileSourcePicker
+from ui.viewmodels.base import Subscription
 from ui.viewmodels.statement_vm import StatementViewModel
 
+JOB_STATUS_LABELS = {
+    "queued": "排隊中",
+    "running": "執行中",
+    "succeeded": "完成",
+    "failed": "失敗",
+    "cancelled": "已取消",
+}
+REPORT_FORMATS = {
+    "xlsx": "Excel (.xlsx)",
+    "csv": "CSV (.csv, UTF-8)",
+    "parquet": "Parquet (.parquet)",
+}
+
+
+def _available_report_formats() -> dict[str, str]:
+    # Parquet needs pyarrow, which is optional (not in packaged builds)
+    if importlib.util.find_spec("pyarrow") is None:
+        return {k: v for k, v in REPORT_FORMATS.items() if k != "parquet"}
+    return REPORT_FORMATS
+
+
+JOB_STATUS_COLORS = {
+    "queued": "grey",
+    "running": "primary",
+    "succeeded": "positive",
+    "failed": "negative",
+    "cancelled": "grey",
+}
+
+
+PROGRESS_STAGE_LABELS = {
+    "reading": "讀取中",
+    "filling": "補全中",
+    "splitting": "分帳中",
+    "writing": "寫入中",
+    "done": "完成",
+}
+
 
 class StatementEditorPage:
     """
@@ -22,7 +64,12 @@ class StatementEditorPage:
         self.lbl_autofill_status = None
         self.lbl_ledger_status = None
         self.link_download = None
+        self.jobs_container = None
+        self.preview_card = None
+        self.lbl_preview_status = None
+        self.table_preview = None
         self._client = None
+        self._subscriptions: list[Subscription] = []
 
     def render(self):
         # We hook up the shell
@@ -34,9 +81,30 @@ class StatementEditorPage:
     def _render_content(self):
         self._client = ui.context.client
 
-        # Setup Effect Listeners
-        self.vm.on_effect(self._handle_effect)
-        self.vm.add_listener(self._on_state_change)
+        # Setup Effect Listeners (replacing those of a previous render; all
+        # are dropped when the client goes away)
+        for sub in self._subscriptions:
+            sub.dispose()
+        self._subscriptions = [
+            sub.dispose_with(self._client)
+            for sub in (
+                self.vm.on_effect(self._handle_effect),
+                self.vm.add_listener(self._on_file_change, fields=("file_source",)),
+                self.vm.add_listener(
+                    self._on_auto_fill_change,
+                    fields=("auto_fill_result", "is_loading", "separate_ledger_result"),
+                ),
+                self.vm.add_listener(
+                    self._on_ledger_change, fields=("separate_ledger_result",)
+                ),
+                self.vm.add_listener(self._on_jobs_change, fields=("jobs",)),
+                self.vm.add_listener(self._on_statement_change, fields=("statement",)),
+                self.vm.add_listener(
+                    self._on_preview_change,
+                    fields=("preview_rows", "preview_total", "preview_query"),
+                ),
+            )
+        ]
 
         # Custom styles for this page if needed (cleanup)
 
@@ -56,7 +124,45 @@ class StatementEditorPage:
                             "text-sm text-muted"
                         )
 
-                FileSourcePicker(on_file_selected=self.vm.handle_file_selected)
+                FileSourcePicker(
+                    on_file_selected=self.vm.handle_file_selected,
+                    on_file_uploaded=self.vm.handle_file_uploaded,
+                )
+
+        # Preview of the imported sheet
+        self.preview_card = ui.card().classes("w-full p-6 app-card text-fg hidden")
+        with self.preview_card:
+            with ui.row().classes("items-center justify-between w-full"):
+                with ui.row().classes("items-center gap-4"):
+                    ui.icon("table_view", size="32px").classes("text-primary")
+                    with ui.column().classes("gap-1"):
+                        ui.label("資料預覽").classes("text-lg font-bold")
+                        self.lbl_preview_status = ui.label("").classes(
+                            "text-sm text-muted"
+                        )
+                ui.input(
+                    placeholder="搜尋任一欄位",
+                    value=self.vm.state.preview_query.search,
+                    on_change=lambda e: self.vm.search_preview(e.value),
+                ).props("dense outlined clearable debounce=300").classes("w-56")
+            # Server-side mode (rowsNumber): only the current window of rows
+            # is sent to the browser; sorting and search run on the server.
+            self.table_preview = (
+                ui.table(
+                    columns=[],
+                    rows=[],
+                    row_key="row",
+                    pagination=self._to_pagination(self.vm.state.preview_query, 0),
+                )
+                .classes("w-full")
+                .style("max-height: 480px")
+                .props(
+                    "flat dense virtual-scroll "
+                    ":rows-per-page-options='[50, 100, 200, 500]'"
+                )
+            )
+            self.table_preview.on("request", self._on_preview_request, ["pagination"])
+        self._on_statement_change(self.vm.state)
 
         # Step 2: Auto Fill
         self.step2_card = ui.card().classes(
@@ -109,6 +215,38 @@ class StatementEditorPage:
                         ).classes("text-sm text-primary mt-2 hidden")
 
                 with ui.column().classes("items-end"):
+                    formats = _available_report_formats()
+                    report_format = self.vm.state.ledger_options.report_format
+                    ui.select(
+                        formats,
+                        label="輸出格式",
+                        value=report_format if report_format in formats else "xlsx",
+                        on_change=lambda e: self.vm.handle_set_report_format(e.value),
+                    ).classes("w-48").props("dense outlined").tooltip(
+                        "CSV / Parquet 僅含明細 (無總計列)，適合匯入 BI 工具，大檔案匯出快很多。"
+                        " Parquet 需安裝 pyarrow (uv sync --extra parquet) 才會出現。"
+                    )
+                    ui.checkbox(
+                        "串流模式 (大檔案)",
+                        value=self.vm.state.ledger_options.streaming,
+                        on_change=lambda e: self.vm.handle_set_streaming(e.value),
+                    ).classes("text-sm text-muted").tooltip(
+                        "逐列讀取與寫出，不保留明細於記憶體，適合數十萬列以上的帳冊。"
+                    )
+                    ui.checkbox(
+                        "每位律師各一份",
+                        value=self.vm.state.ledger_options.per_lawyer,
+                        on_change=lambda e: self.vm.handle_set_per_lawyer(e.value),
+                    ).classes("text-sm text-muted").tooltip(
+                        "另外為每個律師代碼產生獨立報表與索引檔 (不支援串流模式)。"
+                    )
+                    ui.checkbox(
+                        "增量更新",
+                        value=self.vm.state.ledger_options.incremental,
+                        on_change=lambda e: self.vm.handle_set_incremental(e.value),
+                    ).classes("text-sm text-muted").tooltip(
+                        "只重新分帳上次執行後有變動的列；內容未變時不重寫報表 (不支援串流模式)。"
+                    )
                     ui.button(
                         "產生報表",
                         icon="description",
@@ -116,13 +254,36 @@ class StatementEditorPage:
                     ).classes("app-btn-primary shadow-sm rounded-lg px-4 py-2").props(
                         "unelevated no-caps"
                     )
+                    ui.button(
+                        "補全並產生報表",
+                        icon="bolt",
+                        on_click=self.vm.handle_run_fill_and_split,
+                    ).classes("rounded-lg px-4 py-2").props("outline no-caps").tooltip(
+                        "一次執行 Step 2 與 Step 3：只讀取 Excel 一次，補全結果直接用於分帳。"
+                    )
                     # Link to download (Wait, local native path vs web download)
                     # If Native mode, we just show path. If Web, could use ui.download.
                     self.link_download = ui.link("開啟檔案", "#").classes(
                         "text-xs text-primary mt-2 hidden"
                     )
 
-    def _on_state_change(self, state):
+        # Background jobs (status panel)
+        with ui.card().classes("w-full p-6 app-card text-fg"):
+            with ui.row().classes("items-center gap-4"):
+                ui.icon("pending_actions", size="32px").classes("text-primary")
+                with ui.column().classes("gap-1"):
+                    ui.label("背景工作").classes("text-lg font-bold")
+                    ui.label("可同時處理多個檔案；同一檔案的工作依序執行。").classes(
+                        "text-sm text-muted"
+                    )
+            self.jobs_container = ui.column().classes("w-full gap-1 mt-2")
+        # The ViewModel outlives this view (one per client): show its state
+        self._on_file_change(self.vm.state)
+        self._on_auto_fill_change(self.vm.state)
+        self._on_ledger_change(self.vm.state)
+        self._on_jobs_change(self.vm.state)
+
+    def _on_file_change(self, state):
         # Update File Label
         if state.file_source:
             self.lbl_file_status.text = f"已選擇: {state.file_source.filename}"
@@ -137,6 +298,76 @@ class StatementEditorPage:
             self.lbl_step2_instruction.classes(add="hidden")
             self.lbl_step3_instruction.classes(add="hidden")
 
+    def _on_statement_change(self, state):
+        if not self.table_preview:
+            return
+        rows = state.statement.rows if state.statement else None
+        if rows is None:
+            self.preview_card.classes(add="hidden")
+            return
+        self.table_preview.columns = [
+            {
+                "name": "row",
+                "label": "列",
+                "field": "row",
+                "align": "right",
+                "sortable": True,
+            }
+        ] + [
+            {
+                "name": f"c{i}",
+                "label": label,
+                "field": f"c{i}",
+                "align": "left",
+                "sortable": True,
+            }
+            for i, label in enumerate(rows.columns)
+        ]
+        self.preview_card.classes(remove="hidden")
+        self._on_preview_change(state)
+
+    def _on_preview_change(self, state):
+        if not self.table_preview:
+            return
+        self.table_preview.rows = state.preview_rows
+        self.table_preview.pagination = self._to_pagination(
+            state.preview_query, state.preview_total
+        )
+        self.table_preview.update()
+        if state.statement and state.statement.rows is not None:
+            total = len(state.statement.rows)
+            status = f"共 {total:,} 列"
+            if state.preview_query.search:
+                status += f"，符合 {state.preview_total:,} 列"
+            self.lbl_preview_status.text = status
+
+    async def _on_preview_request(self, e: events.GenericEventArguments):
+        query = self._from_pagination(
+            e.args["pagination"], self.vm.state.preview_query.search
+        )
+        await self.vm.load_preview(query)
+
+    @staticmethod
+    def _to_pagination(query: PageQuery, total: int) -> dict:
+        return {
+            "page": query.page,
+            "rowsPerPage": query.rows_per_page,
+            "sortBy": query.sort_by,
+            "descending": query.descending,
+            "rowsNumber": total,
+        }
+
+    @staticmethod
+    def _from_pagination(pagination: dict, search: str) -> PageQuery:
+        return PageQuery(
+            page=pagination.get("page", 1),
+            rows_per_page=pagination.get("rowsPerPage", 50),
+            sort_by=pagination.get("sortBy"),
+            descending=bool(pagination.get("descending", False)),
+            search=search,
+        )
+
+    def _on_auto_fill_change(self, state):
         # Update AutoFill Status & Step 3 Enable
         if state.auto_fill_result:
             self.lbl_autofill_status.text = (
@@ -150,13 +381,48 @@ class StatementEditorPage:
             # Only show loading on Step 2 label if step 3 not active? Simplified logic.
             self.lbl_autofill_status.text = "執行中..."
 
+    def _on_ledger_change(self, state):
         # Update Ledger Status
         if state.separate_ledger_result:
-            path = state.separate_ledger_result.output_path
-            self.lbl_ledger_status.text = f"報表已產生: {path}"
+            result = state.separate_ledger_result
+            status = f"報表已產生: {result.output_path}"
+            if result.index_path:
+                count = len(result.lawyer_reports)
+                status += f" (律師報表 {count} 份，索引: {result.index_path})"
+            self.lbl_ledger_status.text = status
             self.lbl_ledger_status.classes(replace="text-success")
             # Link logic todo if needed
 
+    def _on_jobs_change(self, state):
+        if not self.jobs_container:
+            return
+        self.jobs_container.clear()
+        with self.jobs_container:
+            if not state.jobs:
+                ui.label("目前沒有工作。").classes("text-sm text-muted")
+            for job in state.jobs:
+                with ui.row().classes("items-center justify-between w-full"):
+                    with ui.row().classes("items-center gap-2"):
+                        ui.badge(
+                            JOB_STATUS_LABELS[job.status],
+                            color=JOB_STATUS_COLORS[job.status],
+                        )
+                        ui.label(f"#{job.id} {job.label}").classes("text-sm")
+                        if job.progress and job.is_active:
+                            ui.label(_progress_text(job.progress)).classes(
+                                "text-xs font-mono text-muted"
+                            )
+                        if job.error:
+                            ui.label(job.error).classes("text-xs text-negative")
+                    if job.is_active:
+                        ui.button(
+                            "取消",
+                            icon="close",
+                            on_click=lambda _, job_id=job.id: self.vm.handle_cancel_job(
+                                job_id
+                            ),
+                        ).props("flat dense no-caps size=sm")
+
     def _handle_effect(self, effect):
         if effect.get("type") == "toast":
             self._notify(effect["message"], level=effect.get("level", "info"))
@@ -167,3 +433,19 @@ class StatementEditorPage:
         options = {"message": str(message), "type": level}
         options = {notify_fn.ARG_MAP.get(k, k): v for k, v in options.items()}
         self._client.outbox.enqueue_message("notify", options, self._client.id)
+
+
+def _progress_text(update) -> str:
+    """e.g. '補全中 · 12,000/100,000 列 · 自動 800 · 詢問 3'."""
+    parts = [PROGRESS_STAGE_LABELS.get(update.stage, update.stage)]
+    if update.rows_scanned:
+        total = f"/{update.rows_total:,}" if update.rows_total else ""
+        parts.append(f"{update.rows_scanned:,}{total} 列")
+    if update.matched:
+        parts.append(f"自動 {update.matched:,}")
+    if update.prompted:
+        parts.append(f"詢問 {update.prompted:,}")
+    if update.written:
+        total = f"/{update.rows_total:,}" if update.rows_total else ""
+        parts.append(f"已寫入 {update.written:,}{total}")
+    return " · ".join(parts)
@@ -1,68 +1,41 @@
-from nicegui import ui
+from nicegui import app, ui
 
-from application.use_cases.auto_fill import AutoFillUseCase
-from application.use_cases.import_excel import ImportExcelUseCase
-from application.use_cases.separate_ledger import SeparateLedgerUseCase
-from infrastructure.gateways.excel_report_gateway import ExcelReportGateway
-from infrastructure.gateways.nicegui_interaction import NiceGUIInteractionGateway
-from infrastructure.repositories.excel_pandas_repo import ExcelPandasRepository
-from infrastructure.repositories.sqla_code_replacement_repo import (
-    SQLACodeReplacementRepository,
-)
-from infrastructure.repositories.sqla_lawyer_repo import SQLALawyerRepository
 from ui.components.layout.shell import app_shell
+from ui.container import AppContainer
 from ui.pages.database_page import DatabasePage
 from ui.pages.statement_editor_page import StatementEditorPage
-from ui.viewmodels.database_vm import DatabaseViewModel
-from ui.viewmodels.statement_vm import StatementViewModel
 
 
-def register_routes():
+def register_routes(container: AppContainer | None = None):
     """
     Registers the routes for the application.
-    Acts as the Composition Root for the Page Graph.
+    Object graphs come from the shared `container`: pages are cheap views
+    over the client's ViewModels, rebuilt on every sub-page render.
+    Nothing here imports pandas, openpyxl or SQLAlchemy; the container
+    defers them to first use (or to prewarm, after the first paint).
     """
+    container = container or AppContainer()
+    # Heavy libraries load in the background once the first page is shown
+    app.on_connect(container.prewarm)
+    # The release check runs in the background; pages only await its result
+    app.on_startup(lambda: container.update_checker.start())
 
     @ui.page("/")
     def home_page():
-        def render_toolbox():
-            # 1. Infrastructure
-            excel_repo = ExcelPandasRepository()
-            lawyer_repo = SQLALawyerRepository()
-            replacement_repo = SQLACodeReplacementRepository()
-            interaction_gw = NiceGUIInteractionGateway()
-            report_gw = ExcelReportGateway()
-
-            # 2. Application
-            import_use_case = ImportExcelUseCase(excel_repo)
-            auto_fill_use_case = AutoFillUseCase(
-                excel_repo, lawyer_repo, replacement_repo, interaction_gw
-            )
-            sep_ledger_use_case = SeparateLedgerUseCase(
-                excel_repo, lawyer_repo, report_gw
-            )
+        client = ui.context.client
 
-            # 3. UI (ViewModel + Page)
-            vm = StatementViewModel(
-                import_use_case, auto_fill_use_case, sep_ledger_use_case
-            )
-            page = StatementEditorPage(vm)
+        def render_toolbox():
+            page = StatementEditorPage(container.statement_vm(client))
 
-            # 4. Render content only (shell handled by root)
+            # Render content only (shell handled by root)
             page.render_content()
 
         def render_database():
-            # 1. Infrastructure
-            lawyer_repo = SQLALawyerRepository()
-            replacement_repo = SQLACodeReplacementRepository()
-
-            # 2. UI
-            vm = DatabaseViewModel(lawyer_repo, replacement_repo)
-            page = DatabasePage(vm)
+            page = DatabasePage(container.database_vm(client))
 
             page.render_content()
 
         def render_content():
             subpages = ui.sub_pages({"/": render_toolbox, "/database": render_database})
 
-        app_shell(render_content)
+        app_shell(render_content, update_checker=container.update_checker)
@@ -1,20 +1,81 @@
+import asyncio
+import inspect
+import weakref
+from collections.abc import Iterable
 from typing import Any, Callable, Generic, TypeVar
 
-from nicegui import ui
+from nicegui import Client, ui
 
 TState = TypeVar("TState")
 
 
+def _has_changed(old: Any, new: Any) -> bool:
+    if old is new:
+        return False
+    try:
+        return bool(old != new)
+    except (ValueError, TypeError):
+        return True  # Not comparable (e.g. arrays): assume it changed
+
+
+def _callback_ref(callback: Callable) -> Callable[[], Callable | None]:
+    """
+    Weak reference for bound methods (the usual page callbacks), so a VM
+    does not keep dead pages alive. Plain functions and lambdas are held
+    strongly: nothing else references them, a weak ref would die at once.
+    """
+    if inspect.ismethod(callback):
+        return weakref.WeakMethod(callback)
+    return lambda: callback
+
+
+class Subscription:
+    """Handle returned by add_listener/on_effect; dispose() unsubscribes."""
+
+    def __init__(self, entries: list, entry: Any):
+        self._entries = entries
+        self._entry = entry
+
+    @property
+    def is_disposed(self) -> bool:
+        return self._entry is None
+
+    def dispose(self) -> None:
+        if self._entry is None:
+            return
+        # By identity: another entry may hold an equal callback
+        for i, entry in enumerate(self._entries):
+            if entry is self._entry:
+                del self._entries[i]
+                break
+        self._entry = None
+
+    def dispose_with(self, client: Client) -> "Subscription":
+        """Disposes this subscription when the NiceGUI client is deleted."""
+        client.on_delete(self.dispose)
+        return self
+
+
 class BaseViewModel(Generic[TState]):
     """
     Base class for ViewModels.
     Manages State, Intents, and Effects.
+    State updates are coalesced: fields changed by several update_state()
+    calls in the same event-loop tick reach listeners in one notification,
+    and a listener registered for specific fields only runs when one of
+    them actually changed.
+    Listeners and effect handlers return a Subscription; bound methods are
+    held weakly and dropped once their object is gone.
     """
 
     def __init__(self, initial_state: TState):
         self._state = initial_state
-        self._listeners: list[Callable[[TState], None]] = []
-        self._effect_handlers: list[Callable[[Any], None]] = []
+        # [callback ref, fields it watches or None for any field]
+        self._listeners: list[list] = []
+        self._effect_handlers: list[list] = []
+        # Field -> value before its first change since the last flush
+        self._pending: dict[str, Any] = {}
+        self._flush_scheduled = False
 
     @property
     def state(self) -> TState:
@@ -22,26 +83,84 @@ class BaseViewModel(Generic[TState]):
 
     def update_state(self, **kwargs):
         """
-        Partially updates state and notifies listeners.
+        Partially updates state and notifies listeners of the changed fields.
         Note: TState should ideally be a dataclass.
         """
         for key, value in kwargs.items():
             if hasattr(self._state, key):
+                old = getattr(self._state, key)
+                if key not in self._pending and _has_changed(old, value):
+                    self._pending[key] = old
                 setattr(self._state, key, value)
 
-        self.notify_listeners()
+        if self._pending:
+            self._schedule_flush()
 
-    def add_listener(self, callback: Callable[[TState], None]):
-        self._listeners.append(callback)
+    def add_listener(
+        self,
+        callback: Callable[[TState], None],
+        fields: Iterable[str] | None = None,
+    ) -> Subscription:
+        """Registers `callback`; with `fields`, it only runs when one of them changes."""
+        entry = [
+            _callback_ref(callback),
+            frozenset(fields) if fields is not None else None,
+        ]
+        self._listeners.append(entry)
+        return Subscription(self._listeners, entry)
 
     def notify_listeners(self):
-        for callback in self._listeners:
+        """Runs every listener now, regardless of what changed."""
+        self._pending.clear()
+        for callback, _ in self._live(self._listeners):
             callback(self._state)
 
+    def flush(self):
+        """Delivers pending field changes now instead of on the next tick."""
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        # Fields set back to their old value within the tick did not change
+        changed = {
+            key
+            for key, old in pending.items()
+            if _has_changed(old, getattr(self._state, key))
+        }
+        if not changed:
+            return
+        for callback, fields in self._live(self._listeners):
+            if fields is None or not fields.isdisjoint(changed):
+                callback(self._state)
+
     def emit_effect(self, effect: Any):
         """Emits a side effect (toast, dialog, navigation)."""
-        for handler in self._effect_handlers:
+        for handler, _ in self._live(self._effect_handlers):
             handler(effect)
 
-    def on_effect(self, handler: Callable[[Any], None]):
-        self._effect_handlers.append(handler)
+    def on_effect(self, handler: Callable[[Any], None]) -> Subscription:
+        entry = [_callback_ref(handler), None]
+        self._effect_handlers.append(entry)
+        return Subscription(self._effect_handlers, entry)
+
+    @staticmethod
+    def _live(entries: list[list]) -> list[tuple[Callable, Any]]:
+        """Resolved (callback, fields) pairs; entries of collected owners are pruned."""
+        live = []
+        for entry in entries:
+            callback = entry[0]()
+            if callback is not None:
+                live.append((callback, entry[1]))
+        if len(live) != len(entries):
+            entries[:] = [entry for entry in entries if entry[0]() is not None]
+        return live
+
+    def _schedule_flush(self):
+        if self._flush_scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): nothing to coalesce with
+            self.flush()
+            return
+        self._flush_scheduled = True
+        loop.call_soon(self.flush)
@@ -1,19 +1,57 @@
-from dataclasses import dataclass, field
-
+from dataclasses import dataclass, field, replace
 
 from application.ports.repositories import (
-    CodeReplacementRepository,
-    LawyerRepository,
+    AsyncCodeReplacementRepository,
+    AsyncLawyerRepository,
 )
+from common.errors import AppError
 from domain.dto.code_replacement import CodeReplacement
 from domain.dto.lawyer import Lawyer
+from domain.dto.page import PageQuery
 from ui.viewmodels.base import BaseViewModel
 
 
+def _matches_search(query: PageQuery, key: str) -> bool:
+    prefix = query.search.strip()
+    return not prefix or key.startswith(prefix)
+
+
+def _insert_into_page[TRow: (Lawyer, CodeReplacement)](
+    rows: list[TRow], item: TRow, query: PageQuery, default_sort: str
+) -> list[TRow]:
+    """
+    Returns the visible page with `item` inserted at its sorted position.
+    Rows that would land on another page are left for the next page request.
+    """
+    attr = query.sort_by or default_sort
+    key = getattr(item, attr)
+    pos = len(rows)
+    for idx, row in enumerate(rows):
+        row_key = getattr(row, attr)
+        if (row_key < key) if query.descending else (row_key > key):
+            pos = idx
+            break
+
+    limit = query.rows_per_page
+    if limit > 0 and pos >= limit:
+        return rows  # Sorts after the visible page
+    if pos == 0 and query.page > 1:
+        return rows  # Sorts before the visible page
+    new_rows = rows[:pos] + [item] + rows[pos:]
+    return new_rows[:limit] if limit > 0 else new_rows
+
+
 @dataclass
 class DatabaseState:
+    # Only the currently visible page of each table is held in state.
     lawyers: list[Lawyer] = field(default_factory=list)
+    lawyer_query: PageQuery = field(default_factory=lambda: PageQuery(sort_by="code"))
+    lawyer_total: int = 0
     replacements: list[CodeReplacement] = field(default_factory=list)
+    replacement_query: PageQuery = field(
+        default_factory=lambda: PageQuery(sort_by="id")
+    )
+    replacement_total: int = 0
     is_loading: bool = False
     error_message: str | None = None
 
@@ -24,28 +62,76 @@ class DatabaseViewModel(BaseViewModel[DatabaseState]):
     """
 
     def __init__(
-        self, lawyer_repo: LawyerRepository, replacement_repo: CodeReplacementRepository
+        self,
+        lawyer_repo: AsyncLawyerRepository,
+        replacement_repo: AsyncCodeReplacementRepository,
     ):
         super().__init__(DatabaseState())
         self._lawyer_repo = lawyer_repo
         self._replacement_repo = replacement_repo
 
-    def load_data(self):
-        """Intent: Load all initial data."""
+    async def load_data(self):
+        """Intent: Load the first visible page of each table."""
         self.update_state(is_loading=True)
         try:
-            lawyers = self._lawyer_repo.get_all()
-            replacements = self._replacement_repo.get_all()
+            lawyers = await self._lawyer_repo.get_page(self.state.lawyer_query)
+            replacements = await self._replacement_repo.get_page(
+                self.state.replacement_query
+            )
             self.update_state(
-                lawyers=lawyers, replacements=replacements, is_loading=False
+                lawyers=lawyers.items,
+                lawyer_total=lawyers.total,
+                replacements=replacements.items,
+                replacement_total=replacements.total,
+                is_loading=False,
             )
-        except Exception as e:
+        except (AppError, OSError) as e:
             self.update_state(is_loading=False, error_message=str(e))
             self.emit_effect(
                 {"type": "toast", "message": f"Load failed: {e}", "level": "error"}
             )
 
-    def add_lawyer(self, code: str):
+    async def load_lawyers(self, query: PageQuery | None = None):
+        """Intent: Fetch one page of lawyers (paging / sorting / search)."""
+        query = query or self.state.lawyer_query
+        try:
+            result = await self._lawyer_repo.get_page(query)
+            self.update_state(
+                lawyers=result.items, lawyer_total=result.total, lawyer_query=query
+            )
+        except (AppError, OSError) as e:
+            self.emit_effect(
+                {"type": "toast", "message": f"Load failed: {e}", "level": "error"}
+            )
+
+    async def search_lawyers(self, prefix: str):
+        """Intent: Prefix-search lawyer codes, restarting at page 1."""
+        await self.load_lawyers(
+            replace(self.state.lawyer_query, search=prefix or "", page=1)
+        )
+
+    async def load_replacements(self, query: PageQuery | None = None):
+        """Intent: Fetch one page of replacement rules."""
+        query = query or self.state.replacement_query
+        try:
+            result = await self._replacement_repo.get_page(query)
+            self.update_state(
+                replacements=result.items,
+                replacement_total=result.total,
+                replacement_query=query,
+            )
+        except (AppError, OSError) as e:
+            self.emit_effect(
+                {"type": "toast", "message": f"Load failed: {e}", "level": "error"}
+            )
+
+    async def search_replacements(self, prefix: str):
+        """Intent: Prefix-search replacement source codes, restarting at page 1."""
+        await self.load_replacements(
+            replace(self.state.replacement_query, search=prefix or "", page=1)
+        )
+
+    async def add_lawyer(self, code: str):
         """Intent: Add a new lawyer."""
         if not code or not code.strip():
             self.emit_effect(
@@ -55,21 +141,50 @@ class DatabaseViewModel(BaseViewModel[DatabaseState]):
 
         self.update_state(is_loading=True)
         try:
-            self._lawyer_repo.add(Lawyer(code=code.strip()))
+            lawyer = Lawyer(code=code.strip())
+            created = await self._lawyer_repo.add(lawyer)
 
-            # Refresh list
-            lawyers = self._lawyer_repo.get_all()
-            self.update_state(lawyers=lawyers, is_loading=False)
+            # Patch visible page in place
+            self.update_state(
+                **self._lawyer_insert_patch([lawyer.code] if created else []),
+                is_loading=False,
+            )
             self.emit_effect(
                 {"type": "toast", "message": f"Lawyer {code} added", "level": "success"}
             )
-        except Exception as e:
+        except (AppError, OSError) as e:
+            self.update_state(is_loading=False, error_message=str(e))
+            self.emit_effect(
+                {"type": "toast", "message": f"Add failed: {e}", "level": "error"}
+            )
+
+    async def add_lawyers(self, codes: list[str]):
+        """Intent: Add many lawyers in one transaction with one notification."""
+        codes = [c.strip() for c in codes if c and c.strip()]
+        if not codes:
+            self.emit_effect(
+                {"type": "toast", "message": "Code cannot be empty", "level": "warning"}
+            )
+            return
+
+        self.update_state(is_loading=True)
+        try:
+            created = await self._lawyer_repo.ensure_exists(codes)
+            self.update_state(**self._lawyer_insert_patch(created), is_loading=False)
+            self.emit_effect(
+                {
+                    "type": "toast",
+                    "message": f"{len(created)} lawyers added",
+                    "level": "success",
+                }
+            )
+        except (AppError, OSError) as e:
             self.update_state(is_loading=False, error_message=str(e))
             self.emit_effect(
                 {"type": "toast", "message": f"Add failed: {e}", "level": "error"}
             )
 
-    def add_replacement(self, source: str, targets: str):
+    async def add_replacement(self, source: str, targets: str):
         """Intent: Add a new replacement rule."""
         if not source or not targets:
             self.emit_effect(
@@ -96,8 +211,8 @@ class DatabaseViewModel(BaseViewModel[DatabaseState]):
             return
 
         # Check missing lawyers
-        # We rely on current state for existing lawyers check
-        existing_codes = {l.code for l in self.state.lawyers}
+        # State only holds the visible page, so ask the repository.
+        existing_codes = await self._lawyer_repo.get_existing_codes(target_list)
         missing = [code for code in target_list if code not in existing_codes]
 
         if missing:
@@ -115,7 +230,7 @@ class DatabaseViewModel(BaseViewModel[DatabaseState]):
             return
 
         # Check if source already exists
-        existing = self._replacement_repo.get_by_source(source.strip())
+        existing = await self._replacement_repo.get_by_source(source.strip())
         if existing:
             self.emit_effect(
                 {
@@ -133,12 +248,12 @@ class DatabaseViewModel(BaseViewModel[DatabaseState]):
             item = CodeReplacement(
                 id=None, source_code=source.strip(), target_codes=normalized_targets
             )
-            self._replacement_repo.add(item)
-            self._reload_replacements()
+            saved = await self._replacement_repo.add(item)
+            self.update_state(**self._replacement_insert_patch([saved]))
             self.emit_effect(
                 {"type": "toast", "message": "Replacement added", "level": "success"}
             )
-        except Exception as e:
+        except (AppError, OSError) as e:
             self.emit_effect(
                 {
                     "type": "toast",
@@ -147,18 +262,17 @@ class DatabaseViewModel(BaseViewModel[DatabaseState]):
                 }
             )
 
-    def confirm_add_replacement_with_new_lawyers(
+    async def confirm_add_replacement_with_new_lawyers(
         self, source: str, targets: str, new_codes: list[str]
     ):
         """Intent: Create missing lawyers and then add replacement."""
         try:
-            self._lawyer_repo.ensure_exists(new_codes)
-            # Reload lawyers to update state and ensure checking passes
-            self.update_state(lawyers=self._lawyer_repo.get_all())
+            created = await self._lawyer_repo.ensure_exists(new_codes)
+            self.update_state(**self._lawyer_insert_patch(created))
 
             # Proceed to add replacement
-            self.add_replacement(source, targets)
-        except Exception as e:
+            await self.add_replacement(source, targets)
+        except (AppError, OSError) as e:
             self.emit_effect(
                 {
                     "type": "toast",
@@ -167,15 +281,15 @@ class DatabaseViewModel(BaseViewModel[DatabaseState]):
                 }
             )
 
-    def delete_replacement(self, id: int):
+    async def delete_replacement(self, id: int):
         """Intent: Delete a replacement rule."""
         try:
-            self._replacement_repo.delete(id)
-            self._reload_replacements()
+            await self._replacement_repo.delete(id)
+            await self._refresh_replacements([], [id], {})
             self.emit_effect(
                 {"type": "toast", "message": "Replacement deleted", "level": "info"}
             )
-        except Exception as e:
+        except (AppError, OSError) as e:
             self.emit_effect(
                 {
                     "type": "toast",
@@ -184,15 +298,15 @@ class DatabaseViewModel(BaseViewModel[DatabaseState]):
                 }
             )
 
-    def update_replacement(self, item: CodeReplacement):
+    async def update_replacement(self, item: CodeReplacement):
         """Intent: Update a replacement rule."""
         try:
-            self._replacement_repo.update(item)
-            self._reload_replacements()
+            await self._replacement_repo.update(item)
+            await self._refresh_replacements([], [], {item.id: item})
             self.emit_effect(
                 {"type": "toast", "message": "Replacement updated", "level": "success"}
             )
-        except Exception as e:
+        except (AppError, OSError) as e:
             self.emit_effect(
                 {
                     "type": "toast",
@@ -201,6 +315,99 @@ class DatabaseViewModel(BaseViewModel[DatabaseState]):
                 }
             )
 
-    def _reload_replacements(self):
-        replacements = self._replacement_repo.get_all()
-        self.update_state(replacements=replacements)
+    async def delete_replacements(self, ids: list[int]):
+        """Intent: Delete many replacement rules in one transaction."""
+        await self.apply_replacement_batch([], ids)
+
+    async def apply_replacement_batch(
+        self, upserts: list[CodeReplacement], delete_ids: list[int]
+    ):
+        """
+        Intent: Apply many replacement edits (id=None inserts, others update)
+        in a single transaction, followed by a single state notification.
+        """
+        if not upserts and not delete_ids:
+            return
+        try:
+            saved = await self._replacement_repo.apply_batch(upserts, delete_ids)
+            updated_ids = {u.id for u in upserts if u.id is not None}
+            inserted = [s for s in saved if s.id not in updated_ids]
+            updated = {s.id: s for s in saved if s.id in updated_ids}
+            await self._refresh_replacements(inserted, delete_ids, updated)
+            self.emit_effect(
+                {
+                    "type": "toast",
+                    "message": f"{len(saved) + len(delete_ids)} replacements saved",
+                    "level": "success",
+                }
+            )
+        except (AppError, OSError) as e:
+            self.emit_effect(
+                {
+                    "type": "toast",
+                    "message": f"Batch update failed: {e}",
+                    "level": "error",
+                }
+            )
+
+    def _lawyer_insert_patch(self, created: list[str]) -> dict:
+        """State patch for newly created lawyer codes (no re-query)."""
+        query = self.state.lawyer_query
+        rows = self.state.lawyers
+        total = self.state.lawyer_total
+        for code in created:
+            if not _matches_search(query, code):
+                continue
+            rows = _insert_into_page(rows, Lawyer(code=code), query, "code")
+            total += 1
+        return {"lawyers": rows, "lawyer_total": total}
+
+    async def _refresh_replacements(
+        self,
+        inserted: list[CodeReplacement],
+        deleted_ids: list[int],
+        updated: dict[int | None, CodeReplacement],
+    ) -> None:
+        """
+        Brings the visible page up to date after a write. Inserts and edits
+        of target codes only are patched locally; deletes, and edits that
+        may move a row (its source code decides sort order and search
+        match), re-query the page, whose total then comes from the
+        repository.
+        """
+        on_page = {r.id: r for r in self.state.replacements}
+        moved = any(
+            item_id not in on_page or on_page[item_id].source_code != item.source_code
+            for item_id, item in updated.items()
+        )
+        if deleted_ids or moved:
+            await self._reload_replacement_page()
+            return
+        rows = [updated.get(r.id, r) for r in self.state.replacements]
+        self.update_state(**self._replacement_insert_patch(inserted, rows))
+
+    async def _reload_replacement_page(self) -> None:
+        query = self.state.replacement_query
+        await self.load_replacements(query)
+        # Deleting the last rows of the last page: show the new last page
+        limit = query.rows_per_page
+        total = self.state.replacement_total
+        if not self.state.replacements and total and limit > 0 and query.page > 1:
+            last_page = -(-total // limit)
+            await self.load_replacements(replace(query, page=last_page))
+
+    def _replacement_insert_patch(
+        self,
+        inserted: list[CodeReplacement],
+        rows: list[CodeReplacement] | None = None,
+    ) -> dict:
+        """State patch adding new replacement rules to the page (no re-query)."""
+        query = self.state.replacement_query
+        rows = self.state.replacements if rows is None else rows
+        total = self.state.replacement_total
+        for item in inserted:
+            if not _matches_search(query, item.source_code):
+                continue
+            rows = _insert_into_page(rows, item, query, "id")
+            total += 1
+        return {"replacements": rows, "replacement_total": total}
@@ -0,0 +1,199 @@
+import asyncio
+import itertools
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Literal
+
+from application.ports.gateways import ProgressGateway
+from common.types import Result
+from domain.dto.progress import ProgressUpdate
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+@dataclass(frozen=True)
+class Job:
+    """Snapshot of a background job, as shown in the status panel."""
+
+    id: int
+    kind: str
+    label: str
+    status: JobStatus = "queued"
+    error: str | None = None
+    created_at: datetime | None = None
+    finished_at: datetime | None = None
+    # Latest progress reported by the use case, if any
+    progress: ProgressUpdate | None = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+
+class LockRegistry:
+    """
+    Named asyncio locks, created on first use and dropped once no job holds
+    or awaits them. One registry shared by several JobManagers (e.g. every
+    client's) makes their jobs on the same key exclude each other.
+    """
+
+    def __init__(self):
+        # Lock per key, with the number of jobs holding or awaiting it
+        self._locks: dict[str, tuple[asyncio.Lock, int]] = {}
+
+    def use(self, key: str) -> asyncio.Lock:
+        lock, users = self._locks.get(key) or (asyncio.Lock(), 0)
+        self._locks[key] = (lock, users + 1)
+        return lock
+
+    def release(self, key: str) -> None:
+        lock, users = self._locks[key]
+        if users > 1:
+            self._locks[key] = (lock, users - 1)
+        else:
+            del self._locks[key]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+class JobManager:
+    """
+    Runs workflow steps as background asyncio jobs.
+    At most `max_concurrent` jobs run at a time; the rest wait in FIFO order.
+    Jobs sharing a lock key (e.g. the same workbook) never overlap.
+    Every status change is reported through `on_change` with a fresh
+    snapshot list (newest first, finished jobs capped at `keep_finished`).
+    Cancelling a job that runs in a worker thread stops waiting for it; the
+    thread finishes in the background and its result is discarded.
+    Each job's `run` receives a ProgressGateway made by `progress_factory`
+    from a sink that stores updates on the job (a no-op without a factory).
+    Lock keys live in `locks` (a private LockRegistry by default).
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[list[Job]], None],
+        max_concurrent: int = 2,
+        keep_finished: int = 20,
+        progress_factory: Callable[[Callable[[ProgressUpdate], None]], ProgressGateway]
+        | None = None,
+        locks: LockRegistry | None = None,
+    ):
+        self._on_change = on_change
+        self._progress_factory = progress_factory
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._keep_finished = keep_finished
+        self._ids = itertools.count(1)
+        self._jobs: dict[int, Job] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._locks = locks if locks is not None else LockRegistry()
+
+    @property
+    def jobs(self) -> list[Job]:
+        return sorted(self._jobs.values(), key=lambda j: j.id, reverse=True)
+
+    @property
+    def has_active(self) -> bool:
+        return any(job.is_active for job in self._jobs.values())
+
+    def submit(
+        self,
+        kind: str,
+        label: str,
+        run: Callable[[ProgressGateway | None], Awaitable[Result[Any, Exception]]],
+        on_done: Callable[[Result[Any, Exception]], None],
+        locks: Iterable[str] = (),
+    ) -> Job:
+        """
+        Queues `run` (a coroutine factory taking the job's progress gateway
+        and returning a Result) and returns the job. `on_done` receives the
+        Result unless the job was cancelled.
+        """
+        job = Job(id=next(self._ids), kind=kind, label=label, created_at=datetime.now())
+        self._jobs[job.id] = job
+        task = asyncio.create_task(self._run(job.id, run, on_done, sorted(set(locks))))
+        task.add_done_callback(lambda _: self._finalize(job.id))
+        self._tasks[job.id] = task
+        self._changed()
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def _run(
+        self,
+        job_id: int,
+        run: Callable[[ProgressGateway | None], Awaitable[Result[Any, Exception]]],
+        on_done: Callable[[Result[Any, Exception]], None],
+        lock_keys: list[str],
+    ) -> None:
+        locks = [self._locks.use(key) for key in lock_keys]
+        acquired: list[asyncio.Lock] = []
+        try:
+            # Keys in sorted order, so two jobs never wait on each other
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            async with self._slots:
+                self._update(job_id, status="running")
+                progress = None
+                if self._progress_factory:
+                    progress = self._progress_factory(
+                        lambda update: self._set_progress(job_id, update)
+                    )
+                try:
+                    result = await run(progress)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:  # noqa: BLE001 - any job error fails the job
+                    result = Result.failure(e)
+
+            if result.is_success:
+                self._update(job_id, status="succeeded")
+            else:
+                self._update(job_id, status="failed", error=str(result.error))
+            on_done(result)
+
+        except asyncio.CancelledError:
+            self._update(job_id, status="cancelled")
+        finally:
+            for lock in acquired:
+                lock.release()
+            for key in lock_keys:
+                self._locks.release(key)
+
+    def _finalize(self, job_id: int) -> None:
+        self._tasks.pop(job_id, None)
+        job = self._jobs.get(job_id)
+        if job is not None and job.is_active:
+            # Cancelled before it started running
+            self._update(job_id, status="cancelled")
+
+    def _set_progress(self, job_id: int, update: ProgressUpdate) -> None:
+        # Throttled updates may arrive after the job finished or was pruned
+        job = self._jobs.get(job_id)
+        if job is not None and job.is_active:
+            self._jobs[job_id] = replace(job, progress=update)
+            self._changed()
+
+    def _update(self, job_id: int, **changes) -> None:
+        job = replace(self._jobs[job_id], **changes)
+        if not job.is_active:
+            job = replace(job, finished_at=datetime.now())
+        self._jobs[job_id] = job
+        self._prune()
+        self._changed()
+
+    def _prune(self) -> None:
+        finished = [job.id for job in self.jobs if not job.is_active]
+        for job_id in finished[self._keep_finished :]:
+            del self._jobs[job_id]
+
+    def _changed(self) -> None:
+        self._on_change(self.jobs)
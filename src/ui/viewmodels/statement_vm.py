@@ -1,22 +1,44 @@
-from dataclasses import dataclass, field
-
+import asyncio
+import os
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field, replace
 
+from application.ports.gateways import ProgressGateway
+from application.ports.repositories import UploadStore
 from application.use_cases.auto_fill import AutoFillUseCase
+from application.use_cases.fill_and_split import FillAndSplitUseCase
 from application.use_cases.import_excel import ImportExcelUseCase
 from application.use_cases.separate_ledger import SeparateLedgerUseCase
 from domain.dto.auto_fill import AutoFillResult
 from domain.dto.file_source import FileSource
-from domain.dto.separate_ledger import SeparateLedgerResult
+from domain.dto.page import PageQuery
+from domain.dto.progress import ProgressUpdate
+from domain.dto.separate_ledger import (
+    ReportFormat,
+    SeparateLedgerOptions,
+    SeparateLedgerResult,
+)
 from domain.dto.statement import Statement
 from ui.viewmodels.base import BaseViewModel
+from ui.viewmodels.job_manager import Job, JobManager, LockRegistry
 
 
 @dataclass
 class StatementState:
     file_source: FileSource | None = None
     statement: Statement | None = None
+    # Preview grid: one window of the imported sheet (server-side row model)
+    preview_query: PageQuery = field(
+        default_factory=lambda: PageQuery(rows_per_page=50)
+    )
+    preview_rows: list[dict] = field(default_factory=list)
+    preview_total: int = 0
     auto_fill_result: AutoFillResult | None = None
     separate_ledger_result: SeparateLedgerResult | None = None
+    ledger_options: SeparateLedgerOptions = field(default_factory=SeparateLedgerOptions)
+    # Background jobs, newest first (see JobManager)
+    jobs: list[Job] = field(default_factory=list)
+    # True while any job is queued or running
     is_loading: bool = False
     error_message: str | None = None
 
@@ -28,6 +50,12 @@ class StatementState:
 class StatementViewModel(BaseViewModel[StatementState]):
     """
     ViewModel for the Statement Editor / Workflow Page.
+    Import, Auto-Fill and Separate Ledger run as background jobs, so several
+    workbooks can be processed while the page stays usable. Jobs on the same
+    workbook run one after another; results update the state only if their
+    workbook is still the selected one (toasts are always shown).
+    With a shared `locks` registry, that also holds across clients: two
+    users never rewrite the same workbook at the same time.
     """
 
     def __init__(
@@ -35,49 +63,184 @@ class StatementViewModel(BaseViewModel[StatementState]):
         import_use_case: ImportExcelUseCase,
         auto_fill_use_case: AutoFillUseCase,
         separate_ledger_use_case: SeparateLedgerUseCase,
+        fill_and_split_use_case: FillAndSplitUseCase | None = None,
+        max_concurrent_jobs: int = 2,
+        progress_factory: Callable[[Callable[[ProgressUpdate], None]], ProgressGateway]
+        | None = None,
+        upload_store: UploadStore | None = None,
+        locks: LockRegistry | None = None,
     ):
         super().__init__(StatementState())
+        self._upload_store = upload_store
         self._import_use_case = import_use_case
         self._auto_fill_use_case = auto_fill_use_case
         self._separate_ledger_use_case = separate_ledger_use_case
+        self._fill_and_split_use_case = fill_and_split_use_case
+        self._jobs = JobManager(
+            self._on_jobs_changed,
+            max_concurrent_jobs,
+            progress_factory=progress_factory,
+            locks=locks,
+        )
+        # Jobs that may prompt this client's user: one dialog at a time
+        self._prompt_lock = f"prompt:{id(self)}"
 
     async def handle_file_selected(self, source: FileSource):
         """Intent: User selected a file (Uploaded or Native Picked)."""
-        self.update_state(file_source=source, is_loading=True, error_message=None)
+        self.update_state(
+            file_source=source,
+            statement=None,
+            preview_rows=[],
+            preview_total=0,
+            auto_fill_result=None,
+            separate_ledger_result=None,
+            error_message=None,
+        )
+        self._jobs.submit(
+            "import",
+            f"匯入 {source.filename}",
+            lambda progress: asyncio.to_thread(self._import_use_case.execute, source),
+            lambda result: self._on_import_done(source, result),
+            locks=[_file_lock(source)],
+        )
 
-        try:
-            result = self._import_use_case.execute(source)
-            if result.is_success:
-                self.update_state(statement=result.value, is_loading=False)
-                self.emit_effect(
-                    {
-                        "type": "toast",
-                        "message": "File imported successfully!",
-                        "level": "success",
-                    }
-                )
-            else:
-                error_msg = str(result.error)
-                self.update_state(is_loading=False, error_message=error_msg)
-                self.emit_effect(
-                    {
-                        "type": "toast",
-                        "message": f"Import failed: {error_msg}",
-                        "level": "error",
-                    }
-                )
-        except Exception as e:
-            self.update_state(is_loading=False, error_message=str(e))
+    async def handle_file_uploaded(self, filename: str, chunks: AsyncIterator[bytes]):
+        """Intent: User uploaded a file (Web mode); it is stored, then selected."""
+        if self._upload_store is None:
             self.emit_effect(
                 {
                     "type": "toast",
-                    "message": f"Unexpected error: {str(e)}",
+                    "message": "Uploads are not available.",
                     "level": "error",
                 }
             )
+            return
+        result = await self._upload_store.put(chunks, filename)
+        if not result.is_success:
+            self.emit_effect(
+                {
+                    "type": "toast",
+                    "message": f"Upload failed: {result.error}",
+                    "level": "error",
+                }
+            )
+            return
+        await self.handle_file_selected(result.value)
+
+    async def load_preview(self, query: PageQuery | None = None):
+        """
+        Intent: Show another window of the imported sheet (page, sort,
+        search). Sorting or searching a large sheet runs off the event loop;
+        a response is dropped if a newer request came in meanwhile.
+        """
+        statement = self.state.statement
+        if statement is None or statement.rows is None:
+            return
+        query = query or self.state.preview_query
+        self.update_state(preview_query=query)
+        try:
+            result = await asyncio.to_thread(statement.rows.page, query)
+        except Exception as e:  # noqa: BLE001 - StatementRows declares no errors
+            self.emit_effect(
+                {"type": "toast", "message": f"Preview failed: {e}", "level": "error"}
+            )
+            return
+        if self.state.preview_query is query and self.state.statement is statement:
+            self.update_state(preview_rows=result.items, preview_total=result.total)
+
+    async def search_preview(self, text: str):
+        """Intent: Filter the preview to rows containing `text` in any cell."""
+        await self.load_preview(
+            replace(self.state.preview_query, search=text or "", page=1)
+        )
 
     async def handle_run_auto_fill(self):
         """Intent: Run Step 2 (Auto Fill Lawyers)."""
+        source = self._require_file()
+        if source is None:
+            return
+        self._jobs.submit(
+            "auto_fill",
+            f"自動補全 {source.filename}",
+            lambda progress: self._auto_fill_use_case.execute(source, progress),
+            lambda result: self._on_auto_fill_done(source, result),
+            locks=[_file_lock(source), self._prompt_lock],
+        )
+
+    def handle_set_report_format(self, report_format: ReportFormat):
+        """Intent: Choose the Step 3 output format (xlsx / csv / parquet)."""
+        self.update_state(
+            ledger_options=replace(
+                self.state.ledger_options, report_format=report_format
+            )
+        )
+
+    def handle_set_streaming(self, enabled: bool):
+        """Intent: Toggle streaming mode for Step 3 (large files)."""
+        self.update_state(
+            ledger_options=replace(self.state.ledger_options, streaming=enabled)
+        )
+
+    def handle_set_per_lawyer(self, enabled: bool):
+        """Intent: Toggle one report per lawyer (plus index) for Step 3."""
+        self.update_state(
+            ledger_options=replace(self.state.ledger_options, per_lawyer=enabled)
+        )
+
+    def handle_set_incremental(self, enabled: bool):
+        """Intent: Toggle re-splitting only changed rows for Step 3."""
+        self.update_state(
+            ledger_options=replace(self.state.ledger_options, incremental=enabled)
+        )
+
+    async def handle_run_separate_ledger(self):
+        """Intent: Run Step 3 (Separate Ledger)."""
+        source = self._require_file()
+        if source is None:
+            return
+        # Options as of now; later changes apply to the next run
+        options = self.state.ledger_options
+        self._jobs.submit(
+            "separate_ledger",
+            f"分帳報表 {source.filename}",
+            lambda progress: asyncio.to_thread(
+                self._separate_ledger_use_case.execute, source, options, progress
+            ),
+            lambda result: self._on_separate_ledger_done(source, result),
+            locks=[_file_lock(source)],
+        )
+
+    async def handle_run_fill_and_split(self):
+        """Intent: Run Step 2 and Step 3 together on one read of the file."""
+        source = self._require_file()
+        if source is None:
+            return
+        options = self.state.ledger_options
+        self._jobs.submit(
+            "fill_and_split",
+            f"補全並分帳 {source.filename}",
+            lambda progress: self._fill_and_split_use_case.execute(
+                source, options, progress
+            ),
+            lambda result: self._on_fill_and_split_done(source, result),
+            locks=[_file_lock(source), self._prompt_lock],
+        )
+
+    def handle_cancel_job(self, job_id: int):
+        """Intent: Cancel a queued or running job."""
+        if not self._jobs.cancel(job_id):
+            self.emit_effect(
+                {
+                    "type": "toast",
+                    "message": "Job already finished.",
+                    "level": "info",
+                }
+            )
+
+    def _on_jobs_changed(self, jobs: list[Job]):
+        self.update_state(jobs=jobs, is_loading=any(job.is_active for job in jobs))
+
+    def _require_file(self) -> FileSource | None:
         if not self.state.file_source:
             self.emit_effect(
                 {
@@ -86,84 +249,127 @@ class StatementViewModel(BaseViewModel[StatementState]):
                     "level": "warning",
                 }
             )
-            return
+            return None
+        return self.state.file_source
 
-        self.update_state(is_loading=True)
-        try:
-            result = await self._auto_fill_use_case.execute(self.state.file_source)
-            if result.is_success:
-                self.update_state(auto_fill_result=result.value, is_loading=False)
-                count = result.value.updated_count
-                self.emit_effect(
-                    {
-                        "type": "toast",
-                        "message": f"Auto-fill complete. Corrected {count} items.",
-                        "level": "success",
-                    }
-                )
-            else:
-                error_msg = str(result.error)
-                self.update_state(is_loading=False, error_message=error_msg)
-                self.emit_effect(
-                    {
-                        "type": "toast",
-                        "message": f"Auto-fill failed: {error_msg}",
-                        "level": "error",
-                    }
-                )
-        except Exception as e:
-            self.update_state(is_loading=False, error_message=str(e))
+    def _is_current(self, source: FileSource) -> bool:
+        return source == self.state.file_source
+
+    def _on_import_done(self, source: FileSource, result):
+        if result.is_success:
+            if self._is_current(source):
+                self._show_statement(result.value)
             self.emit_effect(
                 {
                     "type": "toast",
-                    "message": f"Unexpected error: {str(e)}",
-                    "level": "error",
+                    "message": "File imported successfully!",
+                    "level": "success",
                 }
             )
+        else:
+            self._on_failed(source, "Import failed", result.error)
 
-    async def handle_run_separate_ledger(self):
-        """Intent: Run Step 3 (Separate Ledger)."""
-        if not self.state.file_source:
+    def _show_statement(self, statement: Statement):
+        # First window of a fresh import: unsorted and unfiltered, so cheap
+        query = PageQuery(rows_per_page=self.state.preview_query.rows_per_page)
+        page = statement.rows.page(query) if statement.rows else None
+        self.update_state(
+            statement=statement,
+            preview_query=query,
+            preview_rows=page.items if page else [],
+            preview_total=page.total if page else 0,
+        )
+
+    def _on_auto_fill_done(self, source: FileSource, result):
+        if result.is_success:
+            if self._is_current(source):
+                self.update_state(auto_fill_result=result.value)
+            count = result.value.updated_count
             self.emit_effect(
                 {
                     "type": "toast",
-                    "message": "Please select a file first.",
-                    "level": "warning",
+                    "message": f"Auto-fill complete. Corrected {count} items.",
+                    "level": "success",
                 }
             )
-            return
+        else:
+            self._on_failed(source, "Auto-fill failed", result.error)
 
-        self.update_state(is_loading=True)
-        try:
-            # We assume AutoFill is done or implicit.
-            result = self._separate_ledger_use_case.execute(self.state.file_source)
-            if result.is_success:
-                self.update_state(separate_ledger_result=result.value, is_loading=False)
-                # Effect: Download or Show success
-                path = result.value.output_path
-                self.emit_effect(
-                    {
-                        "type": "toast",
-                        "message": f"Report generated at {path}",
-                        "level": "success",
-                    }
-                )
-            else:
-                error_msg = str(result.error)
-                self.update_state(is_loading=False, error_message=error_msg)
-                self.emit_effect(
-                    {
-                        "type": "toast",
-                        "message": f"Separate Ledger failed: {error_msg}",
-                        "level": "error",
-                    }
+    def _on_separate_ledger_done(self, source: FileSource, result):
+        if result.is_success:
+            if self._is_current(source):
+                self.update_state(separate_ledger_result=result.value)
+            self._emit_ledger_toasts(result.value)
+        else:
+            self._on_failed(source, "Separate Ledger failed", result.error)
+
+    def _on_fill_and_split_done(self, source: FileSource, result):
+        if result.is_success:
+            if self._is_current(source):
+                self.update_state(
+                    auto_fill_result=result.value.auto_fill,
+                    separate_ledger_result=result.value.ledger,
                 )
-        except Exception as e:
-            self.update_state(is_loading=False, error_message=str(e))
+            count = result.value.auto_fill.updated_count
             self.emit_effect(
                 {
                     "type": "toast",
-                    "message": f"Unexpected error: {str(e)}",
-                    "level": "error",
+                    "message": f"Auto-fill complete. Corrected {count} items.",
+                    "level": "success",
+                }
+            )
+            self._emit_ledger_toasts(result.value.ledger)
+        else:
+            self._on_failed(source, "Fill & Split failed", result.error)
+
+    def _on_failed(self, source: FileSource, title: str, error: Exception):
+        error_msg = str(error)
+        if self._is_current(source):
+            self.update_state(error_message=error_msg)
+        self.emit_effect(
+            {
+                "type": "toast",
+                "message": f"{title}: {error_msg}",
+                "level": "error",
+            }
+        )
+
+    def _emit_ledger_toasts(self, result: SeparateLedgerResult):
+        # Effect: Download or Show success
+        path = result.output_path
+        message = f"Report generated at {path}"
+        if result.lawyer_reports:
+            count = len(result.lawyer_reports)
+            message += f" (+{count} lawyer reports)"
+        diff = result.diff
+        if diff is not None:
+            message += (
+                f" [{diff.reused_rows} rows reused, {diff.added_rows} "
+                f"re-split, {diff.removed_rows} removed]"
+            )
+        self.emit_effect(
+            {
+                "type": "toast",
+                "message": message,
+                "level": "success",
+            }
+        )
+        invalid = result.invalid_amounts
+        if invalid:
+            rows = ", ".join(str(i.row_number) for i in invalid[:10])
+            more = "..." if len(invalid) > 10 else ""
+            self.emit_effect(
+                {
+                    "type": "toast",
+                    "message": f"{len(invalid)} amount cells could not be "
+                    f"parsed and were not split (rows {rows}{more}).",
+                    "level": "warning",
                 }
             )
+
+
+def _file_lock(source: FileSource) -> str:
+    """Jobs on the same workbook share this lock key (whatever path spelling)."""
+    if source.path:
+        return f"file:{os.path.normcase(os.path.realpath(source.path))}"
+    return f"file:{source.upload_id or source.filename}"